@@ -0,0 +1,106 @@
+"""
+Computation of the features
+
+Times each feature of the training pipeline, computed by its vectorized kernel
+(`src.train.features`), against its previous, DataFrame-based implementation
+(`src.train.features.reference`), including a row-wise `DataFrame.apply`. The
+whole features generator (`features_generator`, which writes all the kernels
+into a single matrix) is timed too, against the previous features computed
+one after the other, and then against a `FeatureUnion` of the same kernels,
+along with the peak memory of both. Data points are taken from the raw data
+file, repeated to reach each number of rows.
+
+On 10M rows, the previous `distance.travelled.ratio` takes minutes per run:
+`--repeat 1` keeps the whole benchmark under half an hour.
+
+Usage, from the root of the project:
+
+    python benchmarks/features.py [--repeat N]
+"""
+import argparse
+from pathlib import Path
+import sys
+import timeit
+import tracemalloc
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+import numpy as np  # noqa: E402
+from sklearn.base import clone  # noqa: E402
+from sklearn.pipeline import FeatureUnion  # noqa: E402
+
+from src.train.data import DATA_FILEPATH, load_raw_data  # noqa: E402
+from src.train.features import features_generator  # noqa: E402
+from src.train.features.reference import reference_transformer  # noqa: E402
+
+ROW_COUNTS = [10000, 1000000, 10000000]
+
+PARSER = argparse.ArgumentParser()
+PARSER.add_argument('--repeat', type=int, default=3,
+                    help='Number of runs per feature and number of rows (the '
+                         'best is kept)')
+
+
+def load_data():
+    """Raw data, reduced to the columns the features are computed from."""
+    data = load_raw_data(DATA_FILEPATH, use_cache=False)
+    columns = list(dict.fromkeys(
+        c for _, f in features_generator.transformer_list for c in f.columns))
+    return data[columns]
+
+
+def time_transform(transformer, X, repeat: int) -> float:
+    """Best time of `transformer.transform(X)`, in milliseconds."""
+    return min(timeit.repeat(lambda: transformer.transform(X), number=1,
+                             repeat=repeat)) * 1000
+
+
+def peak_memory(transformer, X) -> float:
+    """Peak memory allocated by `transformer.transform(X)`, in megabytes."""
+    tracemalloc.start()
+    try:
+        transformer.transform(X)
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def print_row(n: int, name: str, previous: float, current: float) -> None:
+    print(f'{n:>10}  {name:<34}{previous:>15.2f}{current:>14.2f}'
+          f'{previous / current:>9.1f}x')
+
+
+def benchmark(X, repeat: int) -> None:
+    """Time each feature, and then all of them, on the rows of `X`."""
+    generator = clone(features_generator).fit(X)
+    previous_total = 0.
+    for name, feature in generator.transformer_list:
+        current = time_transform(feature, X, repeat)
+        previous = time_transform(reference_transformer(feature).fit(X), X,
+                                  repeat)
+        print_row(len(X), name, previous, current)
+        previous_total += previous
+    print_row(len(X), 'all (features generator)', previous_total,
+              time_transform(generator, X, repeat))
+
+    # The same kernels, concatenated by a `FeatureUnion`
+    union = FeatureUnion(generator.transformer_list)
+    print_row(len(X), 'all (fused vs FeatureUnion)',
+              time_transform(union, X, repeat),
+              time_transform(generator, X, repeat))
+    print_row(len(X), 'peak memory, MB (fused vs union)',
+              peak_memory(union, X), peak_memory(generator, X))
+
+
+def main(repeat: int = 3) -> None:
+    print(f"{'rows':>10}  {'feature':<34}{'previous (ms)':>15}"
+          f"{'current (ms)':>14}{'speedup':>10}")
+    data = load_data()
+    for n in ROW_COUNTS:
+        benchmark(data.take(np.resize(np.arange(len(data)), n)), repeat)
+
+
+if __name__ == '__main__':
+    args = PARSER.parse_args()
+    main(args.repeat)
@@ -0,0 +1,76 @@
+"""
+Parsing of prediction requests
+
+Times `src.serve.parser.parse_datapoints`, which validates data points and
+builds their typed columns in a single pass, against the previous parse path:
+validating and reordering each data point as a dict, and then building a
+DataFrame from the list of dicts (`pandas.DataFrame(feed)`). Data points are
+taken from the raw data file, repeated to reach each batch size.
+
+Usage, from the root of the project:
+
+    python benchmarks/parser.py [--repeat N]
+"""
+import argparse
+from collections import OrderedDict
+import json
+from pathlib import Path
+import sys
+import timeit
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+import pandas as pd  # noqa: E402
+
+from src.config import TARGET  # noqa: E402
+from src.serve.parser import EXPECTED_KEYS, parse_datapoints  # noqa: E402
+from src.train.data import DATA_FILEPATH  # noqa: E402
+
+BATCH_SIZES = [1, 100, 1000, 5000]
+
+PARSER = argparse.ArgumentParser()
+PARSER.add_argument('--repeat', type=int, default=5,
+                    help='Number of runs per batch size (the best is kept)')
+
+
+def previous_parse(data: list) -> pd.DataFrame:
+    """Parse path of the `serve` system before `parse_datapoints`."""
+    def is_valid_datapoint(obj):
+        keys, values = obj.keys(), obj.values()
+        return (set(keys) == set(EXPECTED_KEYS)
+                and not any(v is None for v in values))
+
+    def reorder(datapoint):
+        return OrderedDict([(key, datapoint[key]) for key in EXPECTED_KEYS])
+
+    assert all(is_valid_datapoint(datapoint) for datapoint in data)
+    return pd.DataFrame([reorder(datapoint) for datapoint in data])
+
+
+def load_datapoints(n: int) -> list:
+    data = pd.read_csv(DATA_FILEPATH).drop(columns=TARGET)
+    datapoints = json.loads(data.to_json(orient='records'))
+    return (datapoints * (n // len(datapoints) + 1))[:n]
+
+
+def main(repeat: int = 5) -> None:
+    datapoints = load_datapoints(max(BATCH_SIZES))
+    print(f"{'data points':>12}{'previous (ms)':>15}{'current (ms)':>14}"
+          f"{'speedup':>9}")
+    for size in BATCH_SIZES:
+        batch = datapoints[:size]
+        assert parse_datapoints(batch) is not None
+        timings = []
+        for parse in [previous_parse, parse_datapoints]:
+            number = max(1, 1000 // size)
+            runs = timeit.repeat(lambda: parse(batch), number=number,
+                                 repeat=repeat)
+            timings.append(min(runs) / number * 1000)
+        print(f'{size:>12}{timings[0]:>15.3f}{timings[1]:>14.3f}'
+              f'{timings[0] / timings[1]:>8.1f}x')
+
+
+if __name__ == '__main__':
+    args = PARSER.parse_args()
+    main(args.repeat)
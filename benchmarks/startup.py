@@ -0,0 +1,108 @@
+"""
+Startup time of the `src.main` commands
+
+Each command is started in fresh interpreters, which import the same modules
+as the command does (see `src.main.main`) and then exit: the time measured is
+what a command costs before doing any actual work. The best of `--repeat` runs
+is kept.
+
+The benchmark fails (ie. exits with status 1) if a command imports a library
+it doesn't use, or if it starts slower than its budget multiplied by
+`--tolerance`.
+
+Usage, from the root of the project:
+
+    python benchmarks/startup.py [--repeat N] [--tolerance X]
+"""
+import argparse
+import json
+from pathlib import Path
+import subprocess
+import sys
+import time
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+# Command: modules it imports, libraries it must not import, and budget (in
+# seconds, on a laptop)
+COMMANDS = {
+    '--help': (
+        ['src.main'],
+        ['numpy', 'pandas', 'sklearn', 'boto3', 'flask'],
+        0.3
+    ),
+    '--predict': (
+        ['src.main', 'src.predict.main'],
+        ['sklearn', 'boto3', 'flask', 'src.train', 'src.serve'],
+        0.8
+    ),
+    '--predict --input-file': (
+        ['src.main', 'src.predict.batch'],
+        ['sklearn', 'boto3', 'flask', 'src.train', 'src.serve'],
+        0.8
+    ),
+    '--serve': (
+        ['src.main', 'src.serve.app'],
+        ['sklearn', 'boto3', 'src.train'],
+        1.
+    ),
+    '--features': (
+        ['src.main', 'src.train.features.main'],
+        ['boto3', 'flask', 'src.serve', 'src.predict'],
+        2.5
+    ),
+    '--train': (
+        ['src.main', 'src.train.main'],
+        ['boto3', 'flask', 'src.serve', 'src.predict'],
+        3.
+    ),
+    '--deploy-model': (
+        ['src.main', 'src.deploy_model'],
+        ['boto3', 'flask', 'src.serve'],
+        3.
+    ),
+}
+
+PARSER = argparse.ArgumentParser()
+PARSER.add_argument('--repeat', type=int, default=5,
+                    help='Number of runs per command (the best is kept)')
+PARSER.add_argument('--tolerance', type=float, default=1.,
+                    help='Factor applied to the budgets (eg. 2 on a slow '
+                         'machine)')
+
+
+def time_command(modules: list, forbidden: list) -> tuple:
+    """Start an interpreter importing `modules`.
+
+    The returned value is the time it took, and the `forbidden` libraries it
+    imported.
+    """
+    code = (
+        'import importlib, json, sys\n'
+        f'for module in {modules!r}:\n'
+        '    importlib.import_module(module)\n'
+        f'print(json.dumps([m for m in {forbidden!r} if m in sys.modules]))\n'
+    )
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT_DIR,
+                            check=True, capture_output=True, text=True).stdout
+    return time.perf_counter() - start, json.loads(output.splitlines()[-1])
+
+
+def main(repeat: int = 5, tolerance: float = 1.) -> bool:
+    succeeded = True
+    print(f"{'command':<24}{'seconds':>8}{'budget':>8}  imported")
+    for command, (modules, forbidden, budget) in COMMANDS.items():
+        runs = [time_command(modules, forbidden) for _ in range(repeat)]
+        duration = min(seconds for seconds, _ in runs)
+        imported = runs[0][1]
+        failed = imported or duration > budget * tolerance
+        succeeded &= not failed
+        print(f"{command:<24}{duration:>8.2f}{budget * tolerance:>8.2f}  "
+              f"{', '.join(imported) or '-'}{'  FAILED' if failed else ''}")
+    return succeeded
+
+
+if __name__ == '__main__':
+    args = PARSER.parse_args()
+    sys.exit(0 if main(args.repeat, args.tolerance) else 1)
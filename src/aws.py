@@ -1,50 +1,134 @@
 from logging import getLogger
-from functools import wraps
-from typing import Callable
-
-import boto3
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Any, BinaryIO, Union
 
 from .config import (AWS_S3_BUCKET_NAME, AWS_SECRET_ACCESS_KEY,
-                     AWS_ACCESS_KEY_ID)
+                     AWS_ACCESS_KEY_ID, AWS_S3_ENDPOINT_URL,
+                     S3_MULTIPART_THRESHOLD, S3_MULTIPART_CHUNKSIZE,
+                     S3_MAX_CONCURRENCY, S3_KEY_PREFIX)
+from .utils import open_for_writing
 
-SESSION = boto3.Session(AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY)
-S3 = SESSION.client('s3')
 REQUIRED_ENV_VARS = (
-    AWS_S3_BUCKET_NAME, AWS_SECRET_ACCESS_KEY, AWS_ACCESS_KEY_ID
+    AWS_S3_BUCKET_NAME, AWS_SECRET_ACCESS_KEY, AWS_ACCESS_KEY_ID,
+    S3_KEY_PREFIX
 )
 
 logger = getLogger(__name__)
 
+_CLIENTS = {}  # S3 client of each process, by process ID
+_CLIENTS_LOCK = threading.Lock()
 
-def upload_data_to_s3(data: bytes, key: str,
-                      bucket: str = AWS_S3_BUCKET_NAME) -> None:
-    if any(key is None for key in REQUIRED_ENV_VARS):
-        raise ValueError(
-            "AWS credentials and default bucket name must be "
-            "provided as enviroment variables. Check 'config.py' for info."
-        )
-    logger.info(f'Uploading {len(data) / 1000:.2f} kb of data to S3...')
-    S3.put_object(
-        ACL='private',
-        Bucket=bucket,
-        Body=data,
-        Key=key
+
+def get_s3_client() -> Any:
+    """Return the S3 client of the current process, created on first use.
+
+    boto3 is only imported then, so commands that don't use S3 don't pay for
+    it. A process forked from another one (eg. a server's worker) creates its
+    own client, rather than sharing the parent's connections.
+    """
+    pid = os.getpid()
+    with _CLIENTS_LOCK:
+        if pid not in _CLIENTS:
+            import boto3
+
+            session = boto3.Session(AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY)
+            _CLIENTS.clear()  # the clients of parent processes, if any
+            _CLIENTS[pid] = session.client('s3',
+                                           endpoint_url=AWS_S3_ENDPOINT_URL)
+        return _CLIENTS[pid]
+
+
+def get_transfer_config() -> Any:
+    from boto3.s3.transfer import TransferConfig
+
+    return TransferConfig(
+        multipart_threshold=S3_MULTIPART_THRESHOLD,
+        multipart_chunksize=S3_MULTIPART_CHUNKSIZE,
+        max_concurrency=S3_MAX_CONCURRENCY
     )
 
 
-def download_data_from_s3(key: str, bucket: str = AWS_S3_BUCKET_NAME) -> bytes:
-    if any(key is None for key in REQUIRED_ENV_VARS):
+def _check_env_vars() -> None:
+    if any(var is None for var in REQUIRED_ENV_VARS):
         raise ValueError(
-            "AWS credentials and default bucket name must be "
+            "AWS credentials, default bucket name and USERNAME must be "
             "provided as enviroment variables. Check 'config.py' for info."
         )
+
+
+def upload_file_to_s3(filepath: Union[Path, str], key: str,
+                      bucket: str = AWS_S3_BUCKET_NAME) -> dict:
+    """Upload a file to S3 without loading it in memory.
+
+    Files larger than `S3_MULTIPART_THRESHOLD` are sent with a multipart
+    upload, whose parts are uploaded concurrently. The returned value
+    describes the transfer (see `_transfer_stats`).
+    """
+    _check_env_vars()
+    logger.info(f"Uploading '{Path(filepath).name}' to S3...")
+    start = time.time()
+    get_s3_client().upload_file(str(filepath), bucket, key,
+                                ExtraArgs={'ACL': 'private'},
+                                Config=get_transfer_config())
+    return _transfer_stats('Uploaded', key, os.path.getsize(filepath), start)
+
+
+def download_file_from_s3(key: str, filepath: Union[Path, str],
+                          bucket: str = AWS_S3_BUCKET_NAME) -> dict:
+    """Download an S3 object to a file without loading it in memory.
+
+    The object is written to a temporary file which then replaces `filepath`,
+    so readers never see a partial file. See `download_fileobj_from_s3`.
+    """
+    with open_for_writing(filepath) as fp:
+        return download_fileobj_from_s3(key, fp, bucket)
+
+
+def download_fileobj_from_s3(key: str, fp: BinaryIO,
+                             bucket: str = AWS_S3_BUCKET_NAME) -> dict:
+    """Download an S3 object into a binary file object (which must be
+    seekable).
+
+    Objects larger than `S3_MULTIPART_THRESHOLD` are downloaded by ranges,
+    concurrently. The returned value describes the transfer (see
+    `_transfer_stats`).
+    """
+    _check_env_vars()
     logger.info(f"Downloading '{key}' from S3 bucket...")
-    resp = S3.get_object(
+    start = time.time()
+    get_s3_client().download_fileobj(bucket, key, fp,
+                                     Config=get_transfer_config())
+    fp.flush()
+    # Ranges are written at their offsets, in any order
+    size = os.fstat(fp.fileno()).st_size
+    return _transfer_stats('Downloaded', key, size, start)
+
+
+def _transfer_stats(action: str, key: str, size: int, start: float) -> dict:
+    duration = max(time.time() - start, 1e-6)
+    throughput = size / 1e6 / duration
+    logger.info(f"{action} '{key}': {size / 1e6:.2f} MB in {duration:.2f}s "
+                f"({throughput:.2f} MB/s)")
+    return {
+        'key': key,
+        'bytes': size,
+        'seconds': duration,
+        'throughput': throughput  # MB/s
+    }
+
+
+def get_s3_object_version(key: str, bucket: str = AWS_S3_BUCKET_NAME) -> str:
+    """Return an identifier that changes whenever the S3 object changes.
+
+    Only the object's metadata is requested, so this is cheap to call.
+    """
+    _check_env_vars()
+    resp = get_s3_client().head_object(
         Bucket=bucket,
         Key=key
     )
-    # Response's body is a bytes-stream object that we need to read in order
-    # to get the binary object's content. Depending on the object size, the
-    # reading action can take time, and this simple implementation may not be
-    # appropriate.
-    return resp['Body'].read()
+    # 'VersionId' is only set on versioned buckets, the ETag always is
+    return resp.get('VersionId') or resp['ETag']
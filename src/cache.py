@@ -0,0 +1,330 @@
+"""
+Cache subsystem
+
+Cached data is stored on disk under `config.CACHE_DIR`, in one directory per
+namespace (eg. 'models'). An entry of a namespace is either a single file or a
+directory of files (eg. the columns of a dataset, or a model along with its
+version), and is evicted as a whole.
+"""
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from logging import getLogger
+import os
+from pathlib import Path
+import shutil
+import threading
+import time
+from typing import (Any, BinaryIO, Collection, Dict, Iterator, List,
+                    Optional, Union)
+
+from . import serialization
+from .config import CACHE_DIR, CACHE_MAX_AGE, CACHE_MAX_BYTES, CACHE_ENABLED
+from .utils import open_for_writing
+
+logger = getLogger(__name__)
+
+NAMESPACES = ('models', 'datasets', 'features', 'transformers')
+COUNTERS = ('hits', 'misses', 'bytes_read', 'bytes_written', 'evictions')
+
+
+class Cache:
+    """Objects and files cached on disk, by namespace.
+
+    Entries are addressed by a namespace and a name, which may contain
+    subdirectories: the first part of the name identifies the entry (eg.
+    'australian_open' for 'australian_open/metadata.pkl').
+
+    Files are written to a temporary file that then replaces the target, so
+    readers never see partial files. Once written, the least recently used
+    entries are evicted until the cache holds at most `max_bytes`. Within a
+    `batch`, the cache is only trimmed once all the files are written. Entries
+    are marked as used (by setting their access time) whenever they are read
+    through the cache.
+
+    The size and last use of each entry are indexed in memory, so that
+    neither `stats` nor `trim` walks the cache: the index is built from disk
+    on first use, and then updated by the writes and evictions of this
+    process. Files written by other libraries (eg. the joblib store of the
+    fitted transformers) are accounted for with `refresh`.
+
+    When the cache is disabled, lookups always miss (ie. cached data is
+    computed or downloaded again), but writes still refresh the cache.
+
+    Public interface
+    ================
+    Attributes:
+        * `root` (Path) - Directory holding the namespaces
+        * `max_bytes` (int) - Maximum size of the cache
+        * `enabled` (bool) - Whether lookups can hit
+        * `stats` (dict) - Counters of this process and size, by namespace
+
+    Methods:
+        * `path(namespace, name)` - Return the path of an entry's file
+        * `load(namespace, name)` - Load an object stored in the cache
+        * `store(obj, namespace, name)` - Store an object in the cache
+        * `lookup(namespace, name)` - Return the path of an existing file
+        * `open_for_writing(namespace, name)` - Write a file into the cache
+        * `batch()` - Trim the cache once after several writes
+        * `mark_as_used(namespace, name)` - Mark an entry as recently used
+        * `refresh(namespace, name)` - Index the size of an entry from disk
+        * `enable()` / `disable()` - Switch the cache on / off
+        * `trim()` - Evict entries until the cache fits in `max_bytes`
+        * `log_stats()` - Log a summary of `stats`
+    """
+    def __init__(self,
+                 root: Union[Path, str] = CACHE_DIR,
+                 max_bytes: int = CACHE_MAX_BYTES,
+                 enabled: bool = True):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._counters = defaultdict(Counter)
+        self._lock = threading.RLock()  # `trim` counts evictions
+        self._batch = threading.local()  # entries written in a batch, if any
+        self._index = None  # see `_entries`
+
+    @property
+    def stats(self) -> dict:
+        sizes, entries = Counter(), Counter()
+        with self._lock:
+            for namespace, size, _ in self._entries().values():
+                sizes[namespace] += size
+                entries[namespace] += 1
+        return {
+            'enabled': self.enabled,
+            'max_bytes': self.max_bytes,
+            'bytes': sum(sizes.values()),
+            'namespaces': {
+                namespace: {
+                    **{counter: self._counters[namespace][counter]
+                       for counter in COUNTERS},
+                    'bytes': sizes[namespace],
+                    'entries': entries[namespace],
+                }
+                for namespace in NAMESPACES
+            }
+        }
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def path(self, namespace: str, name: str) -> Path:
+        if namespace not in NAMESPACES:
+            raise ValueError(f"Unknown cache namespace '{namespace}'. "
+                             f"Must be one of {list(NAMESPACES)}.")
+        return self.root / namespace / name
+
+    def lookup(self, namespace: str, name: str,
+               max_age: Optional[float] = CACHE_MAX_AGE) -> Path:
+        """Return the path of a cached file, and count the hit.
+
+        A `FileNotFoundError` is raised if the cache is disabled, or if the
+        file doesn't exist or is older than `max_age` seconds (None means the
+        file never expires). It is the responsibility of the caller to deal
+        with the error.
+        """
+        filepath = self.path(namespace, name)
+        try:
+            if not self.enabled:
+                raise FileNotFoundError(f"Cache is disabled: '{filepath}'")
+            modified = os.stat(filepath).st_mtime
+            if max_age is not None and time.time() - modified > max_age:
+                self._evict(self._entry_path(namespace, name))
+                raise FileNotFoundError(f"Cache file expired: '{filepath}'")
+        except FileNotFoundError:
+            self._count(namespace, 'misses')
+            raise
+
+        self._count(namespace, 'hits')
+        self._count(namespace, 'bytes_read', os.path.getsize(filepath))
+        self.mark_as_used(namespace, name)
+        return filepath
+
+    def load(self, namespace: str, name: str,
+             max_age: Optional[float] = CACHE_MAX_AGE) -> Any:
+        """Load an object stored in the cache, memory-mapping its buffers.
+
+        Raise a `FileNotFoundError` on cache misses, see `lookup`.
+        """
+        filepath = self.lookup(namespace, name, max_age)
+        with open(filepath, 'rb') as fp:
+            return serialization.load(fp)
+
+    def store(self, obj: Any, namespace: str, name: str) -> int:
+        """Serialize an object into the cache.
+
+        The returned value is the number of bytes that were stored.
+        """
+        with self.open_for_writing(namespace, name) as fp:
+            return serialization.dump(obj, fp)
+
+    @contextmanager
+    def open_for_writing(self, namespace: str,
+                         name: str) -> Iterator[BinaryIO]:
+        """Open a binary file that replaces the cache file once written."""
+        filepath = self.path(namespace, name)
+        entry = self._entry_path(namespace, name)
+        previous_size = _file_size(filepath)  # of the file being replaced
+        with open_for_writing(filepath) as fp:
+            yield fp
+        size = os.path.getsize(filepath)
+        self._count(namespace, 'bytes_written', size)
+        with self._lock:
+            if self._index is not None:  # otherwise, indexed from disk
+                _, entry_size, _ = self._index.get(entry, (namespace, 0, 0))
+                self._index[entry] = [
+                    namespace, entry_size + size - previous_size, 0]
+        self.mark_as_used(namespace, name)
+        written = getattr(self._batch, 'written', None)
+        if written is None:
+            self.trim(keep=[entry])
+        else:
+            written.add(entry)
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Defer trimming the cache until the files written within are done.
+
+        The cache is then trimmed once, and none of the entries written is
+        evicted. Batches of the same thread can be nested, the outermost one
+        trims the cache.
+        """
+        if getattr(self._batch, 'written', None) is not None:
+            yield
+            return
+        self._batch.written = written = set()
+        try:
+            yield
+        finally:
+            del self._batch.written
+        self.trim(keep=written)
+
+    def mark_as_used(self, namespace: str, name: str) -> None:
+        """Mark the entry of a file as used, eg. read by another library."""
+        path = self._entry_path(namespace, name)
+        now = time.time_ns()
+        try:
+            # The modification time is left untouched: it tells the age of
+            # the data, and whether a file changed
+            os.utime(path, ns=(now, path.stat().st_mtime_ns))
+        except FileNotFoundError:  # evicted meanwhile
+            pass
+        with self._lock:
+            if self._index is not None and path in self._index:
+                self._index[path][2] = now / 1e9
+
+    def refresh(self, namespace: str, name: str) -> None:
+        """Index the size of an entry written outside of the cache."""
+        path = self._entry_path(namespace, name)
+        with self._lock:
+            if self._index is None:
+                return  # indexed from disk on first use
+            try:
+                self._index[path] = [namespace, _size(path),
+                                     path.stat().st_atime]
+            except FileNotFoundError:
+                self._index.pop(path, None)
+
+    def trim(self, keep: Collection[Path] = ()) -> int:
+        """Evict the least recently used entries beyond `max_bytes`.
+
+        The entries at `keep` (eg. the ones just written) are never evicted.
+        The returned value is the number of evicted entries.
+        """
+        with self._lock:
+            entries = self._entries()
+            size = sum(entry_size for _, entry_size, _ in entries.values())
+            evicted = 0
+            for path in sorted(entries, key=lambda path: entries[path][2]):
+                if size <= self.max_bytes:
+                    break
+                if path in keep:
+                    continue
+                namespace, entry_size, _ = entries[path]
+                logger.debug(f"Evicting '{path.relative_to(self.root)}' "
+                             f"({entry_size} bytes) from cache")
+                self._evict(path)
+                self._count(namespace, 'evictions')
+                size -= entry_size
+                evicted += 1
+        return evicted
+
+    def log_stats(self) -> None:
+        stats = self.stats
+        summary = ', '.join(
+            f"{namespace} {counters['hits']} hits / "
+            f"{counters['misses']} misses"
+            for namespace, counters in stats['namespaces'].items()
+            if counters['hits'] or counters['misses']
+        )
+        logger.info(f"Cache: {summary or 'unused'} "
+                    f"({stats['bytes'] / 1e6:.2f} MB on disk, max "
+                    f"{stats['max_bytes'] / 1e6:.0f} MB)")
+        logger.debug(f'Cache stats: {stats}')
+
+    def _entries(self) -> Dict[Path, List]:
+        """Return the namespace, size and last use of all entries, by path.
+
+        Must be called with `_lock` held. The cache is only walked on the
+        first call.
+        """
+        if self._index is not None:
+            return self._index
+        self._index = {}
+        for namespace in NAMESPACES:
+            directory = self.root / namespace
+            if not directory.is_dir():
+                continue
+            for path in directory.iterdir():
+                if path.name.startswith('.'):  # eg. files being written
+                    continue
+                try:
+                    last_used = path.stat().st_atime
+                    self._index[path] = [namespace, _size(path), last_used]
+                except FileNotFoundError:  # removed meanwhile
+                    continue
+        return self._index
+
+    def _evict(self, path: Path) -> None:
+        with self._lock:
+            self._remove(path)
+            if self._index is not None:
+                self._index.pop(path, None)
+
+    def _entry_path(self, namespace: str, name: str) -> Path:
+        return self.path(namespace, Path(name).parts[0])
+
+    def _count(self, namespace: str, counter: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[namespace][counter] += value
+
+    @staticmethod
+    def _remove(path: Path) -> None:
+        # Processes that memory-mapped a removed file can still read it
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _file_size(filepath: Path) -> int:
+    try:
+        return os.path.getsize(filepath)
+    except FileNotFoundError:
+        return 0
+
+
+def _size(path: Path) -> int:
+    if not path.is_dir():
+        return path.stat().st_size
+    return sum(f.stat().st_size for f in path.rglob('*') if f.is_file())
+
+
+# Process-wide cache, used by all systems
+CACHE = Cache(CACHE_DIR, CACHE_MAX_BYTES, enabled=CACHE_ENABLED)
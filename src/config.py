@@ -5,10 +5,9 @@ from pathlib import Path
 
 from dotenv import load_dotenv, find_dotenv
 
-try:
-    load_dotenv(find_dotenv(raise_error_if_not_found=True))
-except OSError:
-    raise RuntimeError("'.env' file not found.")
+# Variables missing from the environment are read from the `.env` file, if
+# any. The systems that need them (eg. S3 credentials) check them on use.
+load_dotenv(find_dotenv())
 
 __LOC__ = Path(__file__).resolve()
 
@@ -19,6 +18,22 @@ LOG_DIR = ROOT_DIR / 'logs'
 
 CACHE_DIR = ROOT_DIR / 'cache'
 CACHE_MAX_AGE = 24 * 3600  # seconds
+# Maximum disk space used by the cache, beyond which the least recently used
+# entries are evicted (see `src.cache`)
+CACHE_MAX_BYTES = int(os.environ.get('CACHE_MAX_BYTES', 10 * 1024 ** 3))
+CACHE_ENABLED = os.environ.get('CACHE_ENABLED', '1') == '1'
+
+# Maximum disk space used to memoize fitted transformers during training, out
+# of the cache's `CACHE_MAX_BYTES`
+TRANSFORMERS_CACHE_BYTES_LIMIT = 2 * 1024 ** 3  # bytes
+
+# Delay between two checks of the production model's version on S3, made in
+# the background by the `predict` system
+MODEL_REFRESH_INTERVAL = float(
+    os.environ.get('MODEL_REFRESH_INTERVAL', 10))  # seconds
+# Maximum time a process waits for another one to download the model
+MODEL_DOWNLOAD_TIMEOUT = float(
+    os.environ.get('MODEL_DOWNLOAD_TIMEOUT', 300))  # seconds
 
 PROJECT_NAME = ROOT_DIR.name
 
@@ -30,8 +45,50 @@ TARGET = 'outcome'
 AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
 AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
 AWS_S3_BUCKET_NAME = os.environ.get('AWS_S3_BUCKET_NAME')
-
-S3_KEY_PREFIX = os.environ['USERNAME']
+# Set to use an S3-compatible service instead of AWS (eg. a local MinIO)
+AWS_S3_ENDPOINT_URL = os.environ.get('AWS_S3_ENDPOINT_URL')
+
+# Files larger than the threshold are transferred to/from S3 by parts (ie.
+# multipart uploads and ranged downloads), several of them at once
+S3_MULTIPART_THRESHOLD = 8 * 1024 ** 2  # bytes
+S3_MULTIPART_CHUNKSIZE = 8 * 1024 ** 2  # bytes
+S3_MAX_CONCURRENCY = 10  # parts transferred at once, per file
+
+S3_KEY_PREFIX = os.environ.get('USERNAME')
+
+# Opt-in micro-batching of concurrent prediction requests in the `serve`
+# system: requests are grouped until the batch reaches a maximum number of
+# data points or the first request has waited long enough.
+PREDICT_BATCHING = os.environ.get('PREDICT_BATCHING', '0') == '1'
+PREDICT_BATCH_MAX_SIZE = int(os.environ.get('PREDICT_BATCH_MAX_SIZE', 512))
+PREDICT_BATCH_MAX_WAIT = float(
+    os.environ.get('PREDICT_BATCH_MAX_WAIT', 0.005))  # seconds
+
+# Engine used by the `predict` system: 'sklearn' runs the fitted Pipeline,
+# 'compiled' runs the array-only version built by the `deploy` system (see
+# `src.predict.compiled`), which is much faster on small batches.
+PREDICT_ENGINE = os.environ.get('PREDICT_ENGINE', 'sklearn')
+
+# Format of the objects (eg. models) written to files: 'buffers' stores large
+# arrays as raw buffers that are memory-mapped when loaded (see
+# `src.serialization`), 'pickle' is the plain Pickle format. Files in either
+# format can always be read.
+SERIALIZER = os.environ.get('SERIALIZER', 'buffers')
+
+# Maximum number of predictions kept in memory by the `predict` system, to
+# answer data points that were already predicted. 0 disables the cache.
+PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', 0))
+
+# Production webserver of the `serve` system
+SERVER_HOST = os.environ.get('SERVER_HOST', '0.0.0.0')
+SERVER_PORT = int(os.environ.get('SERVER_PORT', 8000))
+SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS', os.cpu_count() or 1))
+# Threads per worker. Use more than one to let `PREDICT_BATCHING` group the
+# requests handled concurrently by a worker.
+SERVER_THREADS = int(os.environ.get('SERVER_THREADS', 1))
+# Number of requests after which a worker is replaced with a fresh one
+SERVER_MAX_REQUESTS = int(os.environ.get('SERVER_MAX_REQUESTS', 10000))
+SERVER_TIMEOUT = int(os.environ.get('SERVER_TIMEOUT', 30))  # seconds
 
 # S3 storage keys for modelization data. We store the training logs and the
 # training data along with the serialized model so we can compare with future
@@ -39,6 +96,8 @@ S3_KEY_PREFIX = os.environ['USERNAME']
 # NOTE: S3 takes care of versionning the actual object, so we can always
 # rollback to an earlier version of the production model.
 MODEL_S3_STORAGE_KEY = f'{S3_KEY_PREFIX}/production/model.pkl'
+COMPILED_MODEL_S3_STORAGE_KEY = \
+    f'{S3_KEY_PREFIX}/production/compiled_model.pkl'
 DATASET_S3_STORAGE_KEY = f'{S3_KEY_PREFIX}/production/training_dataset.pkl'
 TRAINING_REPORT_S3_STORAGE_KEY = f'{S3_KEY_PREFIX}/production/report.json'
 
@@ -79,19 +138,12 @@ LOGGING_CONFIG = {
 }
 
 
-def _create_directories():
-    for directory in [OUTPUT_DIR, DATA_DIR, LOG_DIR, CACHE_DIR]:
-        if not directory.exists():
-            directory.mkdir()
-
+def configure_logging():
+    """Set up logging, as described by `LOGGING_CONFIG`.
 
-def _configure_logging():
+    This is called by the entry points (eg. `src.main`), rather than when
+    this module is imported, so that importing `src` has no side effects.
+    """
+    # Other directories (eg. `OUTPUT_DIR`) are created when written to
+    LOG_DIR.mkdir(exist_ok=True)
     logging.config.dictConfig(LOGGING_CONFIG)
-
-
-def _setup():
-    _create_directories()
-    _configure_logging()
-
-
-_setup()
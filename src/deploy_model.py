@@ -1,17 +1,29 @@
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
 from pathlib import Path
 import re
+import time
 
-from .aws import upload_data_to_s3
-from .config import ( MODEL_S3_STORAGE_KEY, DATASET_S3_STORAGE_KEY,
-                     TRAINING_REPORT_S3_STORAGE_KEY)
+from .aws import upload_file_to_s3
+from .config import (MODEL_S3_STORAGE_KEY, DATASET_S3_STORAGE_KEY,
+                     TRAINING_REPORT_S3_STORAGE_KEY,
+                     COMPILED_MODEL_S3_STORAGE_KEY, configure_logging)
+from .predict.compiled import compile_pipeline, verify
+from .train.dataset import split_labels
 from .train.log import MODEL_FILENAME, REPORT_FILENAME, DATASET_FILENAME
-from .utils import read_binary_data_from_file, find_experiment_directory
+from .utils import (read_binary_data_from_file, find_experiment_directory,
+                    deserialize, write_object_to_file)
+
+logger = getLogger(__name__)
+
+COMPILED_MODEL_FILENAME = 'compiled_model.pkl'
 
 FILENAME_TO_S3_KEY = {
     # Map local file names to S3 keys
     MODEL_FILENAME: MODEL_S3_STORAGE_KEY,
     REPORT_FILENAME: TRAINING_REPORT_S3_STORAGE_KEY,
-    DATASET_FILENAME: DATASET_S3_STORAGE_KEY
+    DATASET_FILENAME: DATASET_S3_STORAGE_KEY,
+    COMPILED_MODEL_FILENAME: COMPILED_MODEL_S3_STORAGE_KEY
 }
 
 
@@ -25,12 +37,62 @@ def main() -> None:
     print('---\nModel successfully deployed!')
 
 
-def deploy(experiment_directory: Path) -> None:
-    """Upload a fitted model along with its experiment artifacts to S3."""
-    for name in [MODEL_FILENAME, REPORT_FILENAME, DATASET_FILENAME]:
-        data = read_binary_data_from_file(f'{experiment_directory}/{name}')
-        upload_data_to_s3(data, FILENAME_TO_S3_KEY[name])
+def deploy(experiment_directory: Path) -> float:
+    """Upload a fitted model along with its experiment artifacts to S3.
+
+    The artifacts are uploaded concurrently, each of them streamed from its
+    file. The returned value is the overall throughput (in MB/s).
+
+    A model that can't be compiled (as its experiment has no dataset to check
+    it against) is also uploaded in place of the compiled model, so that the
+    'compiled' engine never serves a previous model.
+    """
+    uploads = [(name, FILENAME_TO_S3_KEY[name])
+               for name in [MODEL_FILENAME, REPORT_FILENAME]]
+    if Path(experiment_directory, DATASET_FILENAME).exists():
+        # Compile the model first, so nothing is deployed if it fails
+        compile_model(experiment_directory)
+        uploads += [(name, FILENAME_TO_S3_KEY[name])
+                    for name in [DATASET_FILENAME, COMPILED_MODEL_FILENAME]]
+    else:  # eg. out-of-core trainings
+        logger.warning("The experiment has no dataset, so the model can't be "
+                       "compiled: the 'compiled' engine will serve the model "
+                       "as is.")
+        uploads.append((MODEL_FILENAME, COMPILED_MODEL_S3_STORAGE_KEY))
+
+    start = time.time()
+    with ThreadPoolExecutor(len(uploads)) as pool:
+        transfers = list(pool.map(
+            lambda upload: upload_file_to_s3(
+                f'{experiment_directory}/{upload[0]}', upload[1]),
+            uploads
+        ))
+
+    size = sum(transfer['bytes'] for transfer in transfers)
+    duration = time.time() - start
+    throughput = size / 1e6 / duration
+    logger.info(f'{len(transfers)} artifacts ({size / 1e6:.2f} MB) uploaded '
+                f'in {duration:.2f}s ({throughput:.2f} MB/s)')
+    return throughput
+
+
+def compile_model(experiment_directory: Path) -> None:
+    """Compile an experiment's model, and check it against the training data.
+
+    The compiled model is stored in the experiment directory.
+    """
+    model = deserialize(read_binary_data_from_file(
+        f'{experiment_directory}/{MODEL_FILENAME}'))
+    dataset = deserialize(read_binary_data_from_file(
+        f'{experiment_directory}/{DATASET_FILENAME}'))
+
+    compiled_model = compile_pipeline(model)
+    X, _ = split_labels(dataset)
+    verify(compiled_model, model, X)
+    write_object_to_file(compiled_model,
+                         f'{experiment_directory}/{COMPILED_MODEL_FILENAME}')
 
 
 if __name__ == '__main__':
+    configure_logging()
     main()
@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
 import argparse
 import json
+import os
 from typing import Any
 
-from . import utils
+from .cache import CACHE
+from .config import configure_logging
 
 
 PARSER = argparse.ArgumentParser()
@@ -17,14 +19,53 @@ PARSER.add_argument('-hp', '--hyperopt', action='store_true', default=False,
                     help='Train the model using hyperparameter optimization '
                          "(only valid with '--train')")
 
+PARSER.add_argument('--search', choices=['grid', 'halving'], default='grid',
+                    help="Hyperparameter search strategy: exhaustive 'grid' "
+                         "search, or successive 'halving' (only valid with "
+                         "'--hyperopt')")
+
+PARSER.add_argument('--time-budget', type=float, metavar='SECONDS',
+                    help="Stop the successive halving search before it "
+                         "exceeds this duration (only valid with '--search "
+                         "halving')")
+
+PARSER.add_argument('--warm-start', metavar='MODEL_ID',
+                    help="Add trees fitted on new data to the model of a "
+                         "previous experiment, instead of training from "
+                         "scratch (only valid with '--train')")
+
+PARSER.add_argument('--stream', action='store_true', default=False,
+                    help="Train a model that can be fitted incrementally, by "
+                         "reading the data by chunks instead of loading it in "
+                         "memory (only valid with '--train')")
+
+PARSER.add_argument('--chunk-size', type=int,
+                    help="Number of rows read at once (only valid with "
+                         "'--stream' or '--input-file')")
+
 PARSER.add_argument('-p', '--predict', action='store_true', default=False,
                     help="Make a prediciton on sample data. "
-                         "('--input' required)")
+                         "('--input' or '--input-file' required)")
 
 PARSER.add_argument('-s', '--serve', action='store_true', default=False,
                     help='Run a webserver locally to enable access to the '
                          'prediction service via HTTP requests.')
 
+PARSER.add_argument('--production', action='store_true', default=False,
+                    help="Use a production webserver with preforked worker "
+                         "processes (only valid with '--serve')")
+
+PARSER.add_argument('--host', help="Address the production webserver binds "
+                                   "to (only valid with '--production')")
+
+PARSER.add_argument('--port', type=int,
+                    help="Port of the production webserver (only valid with "
+                         "'--production')")
+
+PARSER.add_argument('--workers', type=int,
+                    help="Number of worker processes of the production "
+                         "webserver (only valid with '--production')")
+
 PARSER.add_argument('-d', '--deploy-model', action='store_true', default=False,
                     help='Deploy a serialized model to S3 for using in '
                          'production.')
@@ -33,28 +74,58 @@ PARSER.add_argument('--input',
                     help='A JSON-formatted string to use as feed for the '
                          'predict system.')
 
+PARSER.add_argument('--input-file',
+                    help='Path of a CSV or Parquet file to use as feed for '
+                         'the predict system.')
+
+PARSER.add_argument('--output-file',
+                    help="Path of the CSV or Parquet file where predictions "
+                         "are written (required with '--input-file')")
+
+PARSER.add_argument('-j', '--jobs', type=int,
+                    help='Number of processes to use (defaults to the number '
+                         'of CPUs)')
+
 PARSER.add_argument('--disable-cache', action='store_true', default=False,
                     help='Disable the caching system used to improve '
                          'I/O performance.')
 
 
 def main(args):
-    # Import here to allow monkey-patching of `load_from_cache` at runtime
-    from .deploy_model import main as run_deployment
-    from .predict.main import predict as run_prediction_system
-    from .serve.app import main as run_serving_system
-    from .train.main import main as run_training_system
-    from .train.features.main import main as run_features_generation
-
+    # Systems are imported only when used, so each command only pays for the
+    # libraries it needs (see `benchmarks/startup.py`)
     if args.features:
+        from .train.features.main import main as run_features_generation
         run_features_generation()
     elif args.train:
-        run_training_system(args.hyperopt)
+        from .train.main import main as run_training_system
+        chunk_size = {} if args.chunk_size is None else {
+            'chunk_size': args.chunk_size}
+        run_training_system(args.hyperopt, n_jobs=args.jobs or os.cpu_count(),
+                            search=args.search, time_budget=args.time_budget,
+                            parent_id=args.warm_start,
+                            stream=args.stream, **chunk_size)
     elif args.deploy_model:
+        from .deploy_model import main as run_deployment
         run_deployment()
     elif args.serve:
-        run_serving_system()
+        from .serve.app import main as run_serving_system
+        server_options = {
+            option: getattr(args, option)
+            for option in ['host', 'port', 'workers']
+            if getattr(args, option) is not None
+        }
+        run_serving_system(args.production, **server_options)
+    elif args.predict and args.input_file is not None:
+        from .predict.batch import predict_file as run_batch_prediction_system
+        assert args.output_file is not None, \
+            "An '--output-file' is required along with '--input-file'."
+        chunk_size = {} if args.chunk_size is None else {
+            'chunk_size': args.chunk_size}
+        run_batch_prediction_system(args.input_file, args.output_file,
+                                    n_jobs=args.jobs, **chunk_size)
     elif args.predict:
+        from .predict.main import predict as run_prediction_system
         assert getattr(args, 'input') is not None, \
             "JSON-formatted data is required as '--input' parameter."
         feed = parse_input(args.input)
@@ -67,19 +138,14 @@ def main(args):
         )
 
 
-def disable_cache():
-    """Monkey-patch the `load_from_cache` util function to always raise."""
-    def cache_not_found(*args, **kwargs):
-        raise FileNotFoundError
-    utils.load_from_cache = cache_not_found
-
-
 def parse_input(raw_input: str) -> Any:
     return json.loads(raw_input)
 
 
 if __name__ == '__main__':
     args = PARSER.parse_args()
+    configure_logging()
     if args.disable_cache:
-        disable_cache()
+        CACHE.disable()
     main(args)
+    CACHE.log_stats()
@@ -0,0 +1,147 @@
+"""
+Offline predictions on large files
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from logging import getLogger
+import os
+from pathlib import Path
+import time
+from typing import Iterator, Optional, Union
+
+import pandas as pd
+from pandas import DataFrame
+
+from ..schema import READER_DTYPES, build_frame, select_datapoints
+from .main import MODEL_HOLDER
+from .utils import warn_if_model_not_shared
+
+logger = getLogger(__name__)
+
+CHUNK_SIZE = 50000  # number of rows read and predicted at once
+ID_COLUMN = 'id'
+PREDICTION_COLUMN = 'prediction'
+
+
+def predict_file(input_path: Union[Path, str],
+                 output_path: Union[Path, str],
+                 n_jobs: Optional[int] = None,
+                 chunk_size: int = CHUNK_SIZE) -> int:
+    """Predict all rows of a CSV or Parquet file into a CSV or Parquet file.
+
+    The input file is read by chunks that are predicted by a pool of `n_jobs`
+    processes (defaults to the number of CPUs). Rows are validated as the
+    `serve` system validates data points, except that the `id` column is
+    optional: a `ValueError` is raised for the first invalid chunk.
+    Predictions are written in the same order as the input rows, along with
+    their `id` column if any. At most two chunks per process are held in
+    memory at any time.
+
+    The returned value is the number of rows that were predicted.
+    """
+    n_jobs = n_jobs or os.cpu_count() or 1
+    start = time.time()
+    n_rows = 0
+    logger.info(f"Predicting '{input_path}' with {n_jobs} processes...")
+    warn_if_model_not_shared(n_jobs)
+
+    with ProcessPoolExecutor(n_jobs, initializer=_load_model) as pool, \
+            _ChunkWriter(output_path) as writer:
+        pending = deque()
+        for chunk in read_chunks(input_path, chunk_size):
+            pending.append(pool.submit(_predict_chunk, chunk))
+            if len(pending) >= 2 * n_jobs:
+                n_rows += writer.write(pending.popleft().result())
+        while pending:
+            n_rows += writer.write(pending.popleft().result())
+
+    duration = time.time() - start
+    logger.info(f'{n_rows} rows predicted in {duration:.2f}s '
+                f"and written to '{output_path}'")
+    return n_rows
+
+
+def read_chunks(filepath: Union[Path, str],
+                chunk_size: int = CHUNK_SIZE) -> Iterator[DataFrame]:
+    """Read the data points of a CSV or Parquet file by chunks.
+
+    Chunks are validated as the `serve` system validates data points (see
+    `src.schema.select_datapoints`), except that the `id` column is optional.
+    """
+    if Path(filepath).suffix == '.parquet':
+        parquet = _import_pyarrow_parquet()
+        batches = parquet.ParquetFile(filepath).iter_batches(chunk_size)
+        chunks = (batch.to_pandas() for batch in batches)
+    else:
+        chunks = pd.read_csv(filepath, dtype=READER_DTYPES,
+                             chunksize=chunk_size)
+
+    # Reading a chunk can fail too, eg. on a value that isn't a number
+    chunks, first_row = iter(chunks), 0
+    while True:
+        try:
+            chunk = next(chunks, None)
+            if chunk is None:
+                return
+            chunk = select_datapoints(build_frame(chunk),
+                                      optional=[ID_COLUMN])
+        except ValueError as e:
+            raise ValueError(f"Invalid rows in '{filepath}' from row "
+                             f"{first_row}: {e}") from None
+        yield chunk
+        first_row += len(chunk)
+
+
+def _load_model() -> None:
+    # Run once in each worker process, so the model is loaded only once
+    MODEL_HOLDER.get()
+
+
+def _predict_chunk(chunk: DataFrame) -> DataFrame:
+    predictions = DataFrame({PREDICTION_COLUMN:
+                             MODEL_HOLDER.get().predict(chunk)})
+    if ID_COLUMN in chunk.columns:
+        predictions.insert(0, ID_COLUMN, chunk[ID_COLUMN].values)
+    return predictions
+
+
+class _ChunkWriter:
+    """Append DataFrames with the same columns to a CSV or Parquet file."""
+    def __init__(self, filepath: Union[Path, str]):
+        self.filepath = Path(filepath)
+        self._parquet_writer = None
+        self._header = True
+
+    def write(self, chunk: DataFrame) -> int:
+        if self.filepath.suffix == '.parquet':
+            self._write_parquet(chunk)
+        else:
+            chunk.to_csv(self.filepath, mode='w' if self._header else 'a',
+                         header=self._header, index=False)
+        self._header = False
+        return len(chunk)
+
+    def _write_parquet(self, chunk: DataFrame) -> None:
+        import pyarrow as pa
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if self._parquet_writer is None:
+            parquet = _import_pyarrow_parquet()
+            self._parquet_writer = parquet.ParquetWriter(self.filepath,
+                                                         table.schema)
+        self._parquet_writer.write_table(table)
+
+    def __enter__(self) -> '_ChunkWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+def _import_pyarrow_parquet():
+    try:
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet files require the 'pyarrow' package to be "
+                           "installed.")
+    return pyarrow.parquet
@@ -0,0 +1,105 @@
+from collections import OrderedDict
+from logging import getLogger
+import threading
+from typing import Callable, Hashable
+
+import numpy as np
+from pandas import DataFrame
+from pandas.util import hash_pandas_object
+
+logger = getLogger(__name__)
+
+
+class PredictionCache:
+    """A bounded, thread-safe LRU cache of predictions.
+
+    Entries are keyed on a hash of the data points' values, taken in column
+    name order. The cache is bound to a model version (eg. a weak reference
+    to the model along with the version of its file): all entries are dropped
+    as soon as a prediction is requested for another version. The version is
+    kept until then, so it should not hold the model itself.
+
+    Public interface
+    ================
+    Attributes:
+        * `max_size` (int) - Maximum number of cached predictions
+        * `stats` (dict) - Hit/miss counts and current size of the cache
+
+    Method:
+        * `predict(predict, X, version)` - Predict `X`, only calling
+          `predict` on the data points that are not in cache
+    """
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+        self._version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._entries),
+            'max_size': self.max_size,
+        }
+
+    def predict(self,
+                predict: Callable[[DataFrame], np.ndarray],
+                X: DataFrame,
+                version: Hashable) -> np.ndarray:
+        keys = hash_rows(X)
+        results = [None] * len(keys)
+        misses = []
+
+        with self._lock:
+            if version != self._version:
+                if self._entries:
+                    logger.info('Model version changed, clearing the '
+                                'prediction cache')
+                self._entries.clear()
+                self._version = version
+
+            for i, key in enumerate(keys):
+                try:
+                    results[i] = self._entries[key]
+                except KeyError:
+                    misses.append(i)
+                else:
+                    self._entries.move_to_end(key)
+            self.hits += len(keys) - len(misses)
+            self.misses += len(misses)
+
+        if not misses:
+            return np.array(results)
+
+        predictions = predict(X.iloc[misses] if len(misses) < len(keys) else X)
+        self._store(version, keys[misses], predictions)
+        if len(misses) == len(keys):
+            return predictions
+
+        for i, prediction in zip(misses, predictions):
+            results[i] = prediction
+        return np.array(results, dtype=predictions.dtype)
+
+    def _store(self,
+               version: Hashable,
+               keys: np.ndarray,
+               predictions: np.ndarray) -> None:
+        with self._lock:
+            if version != self._version:  # the model was reloaded meanwhile
+                return
+            for key, prediction in zip(keys, predictions):
+                self._entries[key] = prediction
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+def hash_rows(X: DataFrame) -> np.ndarray:
+    """Return a 64-bit hash of each row, independent of the column order."""
+    columns = sorted(X.columns)
+    return hash_pandas_object(X[columns], index=False).values
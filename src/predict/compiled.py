@@ -0,0 +1,208 @@
+"""
+Compiled prediction engine
+
+A fitted Pipeline (`src.train.pipeline`) is compiled into a `CompiledPipeline`
+that only relies on NumPy arrays:
+    * each feature is turned into an expression over raw column arrays, based
+      on its vectorized kernel
+    * the trees of the forest are flattened into a few contiguous arrays, and
+      traversed for all samples and all trees at once
+
+The compiled pipeline is meant to give the exact same predictions as the
+original one, which is checked by `verify` before deploying it.
+"""
+from functools import partial
+from logging import getLogger
+from typing import Callable, List, Mapping
+
+import numpy as np
+from pandas import DataFrame
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.pipeline import FeatureUnion, Pipeline
+
+from ..train.features.base import KernelMixin
+from ..utils import SklearnEstimator
+
+logger = getLogger(__name__)
+
+Columns = Mapping[str, np.ndarray]
+FeatureExpression = Callable[[Columns], np.ndarray]
+
+# Forests whose trees can be flattened (see `FlatForest`)
+FOREST_CLASSIFIERS = (RandomForestClassifier, ExtraTreesClassifier)
+
+# Number of samples whose trees are traversed at once, to bound the memory
+# used by the (n_samples, n_trees) arrays of node indices.
+BATCH_SIZE = 10000
+
+
+class CompiledPipeline:
+    """An array-only equivalent of a fitted features + forest Pipeline.
+
+    Public interface
+    ================
+    Attributes:
+        * `classes_` (np.ndarray) - Class labels, as in the original estimator
+        * `input_columns` (list) - Raw columns used by the features
+
+    Methods:
+        * `predict(X)` - Predict class labels of a DataFrame of data points
+        * `predict_proba(X)` - Predict class probabilities
+    """
+    def __init__(self,
+                 input_columns: List[str],
+                 features: List[FeatureExpression],
+                 forest: 'FlatForest',
+                 classes: np.ndarray):
+        self.input_columns = input_columns
+        self.classes_ = classes
+        self._features = features
+        self._forest = forest
+
+    def predict(self, X: DataFrame) -> np.ndarray:
+        proba = self.predict_proba(X)
+        return self.classes_.take(np.argmax(proba, axis=1), axis=0)
+
+    def predict_proba(self, X: DataFrame) -> np.ndarray:
+        return self._forest.predict_proba(self.transform(X))
+
+    def transform(self, X: DataFrame) -> np.ndarray:
+        columns = {name: X[name].to_numpy() for name in self.input_columns}
+        features = np.hstack([feature(columns) for feature in self._features])
+        # Trees work on float32 data, just like scikit-learn's
+        return features.astype(np.float32)
+
+
+class FlatForest:
+    """The trees of a fitted forest, flattened into contiguous arrays.
+
+    Nodes of all trees are stored one after the other: `roots` holds the
+    index of each tree's root node. Leaves point to themselves, so that all
+    samples can be moved down the trees for `max_depth` steps without having
+    to check which ones already reached a leaf.
+    """
+    def __init__(self, estimators: list):
+        features, thresholds, lefts, rights, missing_left = [], [], [], [], []
+        probas, roots = [], []
+        offset = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+
+            roots.append(offset)
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            lefts.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+            rights.append(
+                np.where(is_leaf, nodes, tree.children_right) + offset)
+            missing_left.append(
+                getattr(tree, 'missing_go_to_left',
+                        np.zeros(tree.node_count)).astype(bool))
+
+            # Same normalization as `DecisionTreeClassifier.predict_proba`
+            proba = tree.value[:, 0, :].copy()
+            normalizer = proba.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            probas.append(proba / normalizer)
+
+            offset += tree.node_count
+
+        self.roots = np.array(roots)
+        self.feature = np.concatenate(features)
+        self.threshold = np.concatenate(thresholds)
+        self.left = np.concatenate(lefts)
+        self.right = np.concatenate(rights)
+        self.missing_go_to_left = np.concatenate(missing_left)
+        self.proba = np.concatenate(probas)
+        self.max_depth = max(e.tree_.max_depth for e in estimators)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        return np.vstack([self._predict_proba(X[start:start + BATCH_SIZE])
+                          for start in range(0, len(X), BATCH_SIZE)]
+                         or [np.empty((0, self.proba.shape[1]))])
+
+    def _predict_proba(self, X: np.ndarray) -> np.ndarray:
+        rows = np.arange(len(X))[:, np.newaxis]
+        nodes = np.repeat(self.roots[np.newaxis, :], len(X), axis=0)
+        for _ in range(self.max_depth):
+            values = X[rows, self.feature[nodes]]
+            go_left = np.where(np.isnan(values),
+                               self.missing_go_to_left[nodes],
+                               values <= self.threshold[nodes])
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        # Sum trees' probabilities in the same order as scikit-learn does, so
+        # that the rounding errors (and thus the predictions) are the same.
+        leaf_probas = self.proba[nodes]
+        proba = np.zeros((len(X), self.proba.shape[1]))
+        for i in range(len(self.roots)):
+            proba += leaf_probas[:, i, :]
+        proba /= len(self.roots)
+        return proba
+
+
+def compile_pipeline(pipeline: Pipeline) -> CompiledPipeline:
+    """Compile a fitted features + forest Pipeline.
+
+    A `TypeError` is raised if any step of the pipeline is not supported.
+    """
+    features_union, estimator = [step for _, step in pipeline.steps]
+    if not isinstance(features_union, FeatureUnion):
+        raise TypeError('First step of the pipeline must be a FeatureUnion.')
+    if features_union.transformer_weights:
+        raise TypeError('Weighted FeatureUnion cannot be compiled.')
+    if (not isinstance(estimator, FOREST_CLASSIFIERS)
+            or estimator.n_outputs_ != 1):
+        raise TypeError('Last step of the pipeline must be a single-output '
+                        'forest classifier.')
+
+    input_columns, features = [], []
+    for _, feature in features_union.transformer_list:
+        if feature == 'drop':
+            continue
+        columns, expression = compile_feature(feature)
+        input_columns.extend(c for c in columns if c not in input_columns)
+        features.append(expression)
+
+    return CompiledPipeline(input_columns, features,
+                            FlatForest(estimator.estimators_),
+                            estimator.classes_)
+
+
+def compile_feature(feature: SklearnEstimator):
+    """Return the raw columns used by a fitted feature and its expression.
+
+    The expression takes a mapping of column names to arrays, and returns a
+    2D array with the same values as the feature's `transform`. Expressions
+    are partials of module-level functions, so that compiled pipelines can be
+    pickled.
+    """
+    if isinstance(feature, KernelMixin):
+        return feature.columns, partial(_apply_kernel, feature.kernel,
+                                        feature.columns,
+                                        reshape=feature.n_outputs == 1)
+
+    raise TypeError(f'Feature {feature.__class__.__name__} cannot be '
+                    f'compiled.')
+
+
+def _apply_kernel(kernel: Callable[..., np.ndarray],
+                  cnames: List[str],
+                  columns: Columns,
+                  reshape: bool = True) -> np.ndarray:
+    res = kernel(*[columns[cname] for cname in cnames])
+    return res[:, np.newaxis] if reshape else res
+
+
+def verify(compiled: CompiledPipeline,
+           pipeline: Pipeline,
+           X: DataFrame) -> None:
+    """Raise a `ValueError` if both pipelines don't predict the same labels."""
+    expected = pipeline.predict(X)
+    actual = compiled.predict(X)
+    mismatches = np.count_nonzero(expected != actual)
+    if mismatches:
+        raise ValueError(f'Compiled pipeline disagrees with the original one '
+                         f'on {mismatches}/{len(X)} data points.')
+    logger.info(f'Compiled pipeline verified on {len(X)} data points')
@@ -0,0 +1,133 @@
+from logging import getLogger
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Callable, Optional, Tuple, Union
+
+from ..config import MODEL_REFRESH_INTERVAL
+from ..utils import SklearnEstimator
+from .utils import MODEL_CACHE_KEY
+
+logger = getLogger(__name__)
+
+ModelLoader = Callable[[], SklearnEstimator]
+ModelVersion = Optional[Tuple[int, int]]  # see `_file_version`
+
+
+class ModelHolder:
+    """Keep the production model in memory for the lifetime of the process.
+
+    The model is loaded on the first call to `get()` and then served from
+    memory. It is reloaded only when the cache file changes on disk.
+
+    `sync` updates the cache file when a new model is available (eg. by
+    downloading it). It is called before the model is first loaded, and then
+    every `refresh_interval` seconds by a background thread, once started with
+    `start_sync()`. New models are thus served shortly after they are
+    available.
+
+    A reload happens in the calling thread while the other threads keep being
+    served the current model, which is then swapped with the new one in a
+    single assignment. The model and its version are held together, so that
+    `get_with_version()` never pairs a model with the version of another.
+
+    Public interface
+    ================
+    Attributes:
+        * `version` (tuple) - Identifies the model currently held in memory
+        * `refresh_interval` (float) - Seconds between two calls to `sync`
+
+    Methods:
+        * `get()` - Return the model, (re)loading it if needed
+        * `get_with_version()` - Return the model along with its version
+        * `start_sync()` - Start calling `sync` in a background thread
+    """
+    def __init__(self,
+                 loader: ModelLoader,
+                 sync: Optional[Callable[[], bool]] = None,
+                 refresh_interval: float = MODEL_REFRESH_INTERVAL):
+        # eg. `src.predict.main.get_model`
+        self._loader = loader
+        self._sync = sync
+        self.refresh_interval = refresh_interval
+
+        self._current = (None, None)  # model, version
+        self._failed_version = None
+        self._lock = threading.Lock()
+        self._sync_pid = None
+
+    @property
+    def version(self) -> ModelVersion:
+        return self._current[1]
+
+    def get(self) -> SklearnEstimator:
+        return self.get_with_version()[0]
+
+    def get_with_version(self) -> Tuple[SklearnEstimator, ModelVersion]:
+        if self._current[0] is None:
+            with self._lock:
+                if self._current[0] is None:  # may have been loaded meanwhile
+                    self._run_sync()
+                    self._load()
+        elif self._is_stale() and self._lock.acquire(blocking=False):
+            # Only one thread reloads the model, the others don't wait for it
+            try:
+                self._load()
+            except Exception as e:
+                logger.error(f'Failed to reload model, keeping the current '
+                             f'one in memory: {e}')
+            finally:
+                self._lock.release()
+        return self._current
+
+    def start_sync(self) -> None:
+        """Start the background thread calling `sync`, if not yet started.
+
+        Threads don't survive a fork, so this must be called in each process
+        (eg. in each worker of a preforking server, after the fork).
+        """
+        if self._sync is None or self._sync_pid == os.getpid():
+            return
+        self._sync_pid = os.getpid()
+        threading.Thread(target=self._sync_forever, name='model-sync',
+                         daemon=True).start()
+
+    def _is_stale(self) -> bool:
+        version = _file_version(MODEL_CACHE_KEY)
+        return version != self.version and version != self._failed_version
+
+    def _load(self) -> None:
+        # Checked before loading, so that a change while loading is seen
+        version = _file_version(MODEL_CACHE_KEY)
+        try:
+            model = self._loader()
+        except Exception:
+            # Don't retry until the cache file changes again
+            self._failed_version = version
+            raise
+
+        self._current = (model, version)
+        logger.info(f'Model loaded in memory (version: {self.version})')
+
+    def _run_sync(self) -> None:
+        if self._sync is None:
+            return
+        try:
+            if self._sync():
+                logger.info('New model available')
+        except Exception as e:
+            logger.warning(f'Could not check for a new model: {e}')
+
+    def _sync_forever(self) -> None:
+        while True:
+            time.sleep(self.refresh_interval)
+            self._run_sync()
+
+
+def _file_version(filepath: Union[Path, str]) -> ModelVersion:
+    try:
+        stats = os.stat(filepath)
+    except FileNotFoundError:
+        return None
+    return stats.st_mtime_ns, stats.st_size
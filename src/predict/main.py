@@ -1,22 +1,36 @@
 from logging import getLogger
 import time
-from typing import List
+from typing import List, Union
+import weakref
 
 import numpy as np
+from pandas import DataFrame
 
-from .utils import load_model_from_cache, load_model_from_s3, parse
+from .cache import PredictionCache
+from .holder import ModelHolder
+from .utils import (load_model_from_cache, load_model_from_s3,
+                    sync_model_cache, parse)
+from ..config import PREDICTION_CACHE_SIZE
 from ..utils import SklearnEstimator
 
 logger = getLogger(__name__)
 
 
-def predict(feed: List[dict]) -> np.ndarray:
+def predict(feed: Union[List[dict], DataFrame]) -> np.ndarray:
     X = parse(feed)
-    model = get_model()
+    model, version = MODEL_HOLDER.get_with_version()
     start = time.time()
     logger.debug('Running prediction...')
 
-    prediction = model.predict(X)
+    if PREDICTION_CACHE is not None:
+        # Keyed on the model too: a file replaced within the resolution of
+        # its modification time, with the same size, keeps its version. A
+        # weak reference is used, so the cache doesn't keep a reloaded model
+        # in memory until the next prediction.
+        prediction = PREDICTION_CACHE.predict(
+            model.predict, X, version=(weakref.ref(model), version))
+    else:
+        prediction = model.predict(X)
 
     duration = time.time() - start
     logger.info(f'Prediction completed in {duration:.2f}s')
@@ -37,3 +51,10 @@ def get_model(from_cache: bool = True) -> SklearnEstimator:
 
     logger.debug('Downloading model from S3 bucket...')
     return load_model_from_s3()
+
+
+# Process-wide holder, so the model is not re-loaded on every prediction
+MODEL_HOLDER = ModelHolder(get_model, sync=sync_model_cache)
+
+PREDICTION_CACHE = (PredictionCache(PREDICTION_CACHE_SIZE)
+                    if PREDICTION_CACHE_SIZE > 0 else None)
@@ -1,31 +1,133 @@
 from collections import defaultdict
 from functools import reduce
-from typing import List
+from logging import getLogger
+from typing import List, Optional, Union
 
 from pandas import DataFrame
 
-from ..aws import download_data_from_s3
-from ..config import CACHE_DIR, MODEL_S3_STORAGE_KEY
-from ..utils import (load_from_cache, write_binary_data_to_file, deserialize,
+from ..aws import download_fileobj_from_s3, get_s3_object_version
+from ..cache import CACHE
+from ..config import (MODEL_S3_STORAGE_KEY, PREDICT_ENGINE, SERIALIZER,
+                      COMPILED_MODEL_S3_STORAGE_KEY, MODEL_DOWNLOAD_TIMEOUT)
+from ..schema import from_records
+from ..utils import (file_lock, read_object_from_file,
+                     read_binary_data_from_file, remove_file,
                      SklearnEstimator)
 
+logger = getLogger(__name__)
 
-MODEL_CACHE_DIRECTORY = CACHE_DIR / 'models'
-MODEL_CACHE_KEY = MODEL_CACHE_DIRECTORY / 'model.pkl'
+
+if PREDICT_ENGINE == 'compiled':
+    MODEL_STORAGE_KEY = COMPILED_MODEL_S3_STORAGE_KEY
+    MODEL_CACHE_ENTRY = 'compiled_model'
+elif PREDICT_ENGINE == 'sklearn':
+    MODEL_STORAGE_KEY = MODEL_S3_STORAGE_KEY
+    MODEL_CACHE_ENTRY = 'model'
+else:
+    raise ValueError(f"Unknown prediction engine '{PREDICT_ENGINE}'. "
+                     f"Must be one of 'sklearn' or 'compiled'.")
+
+# The model and the version of the S3 object it was downloaded from are files
+# of the same cache entry, so they are evicted together
+MODEL_CACHE_NAME = f'{MODEL_CACHE_ENTRY}/model.pkl'
+MODEL_CACHE_KEY = CACHE.path('models', MODEL_CACHE_NAME)
+MODEL_VERSION_CACHE_NAME = f'{MODEL_CACHE_ENTRY}/model.version'
+MODEL_VERSION_CACHE_KEY = CACHE.path('models', MODEL_VERSION_CACHE_NAME)
+# Held by the process downloading the model (see `download_model_from_s3`)
+MODEL_DOWNLOAD_LOCK = CACHE.path('models', f'.{MODEL_CACHE_ENTRY}.lock')
 
 
 def load_model_from_cache() -> SklearnEstimator:
-    return load_from_cache(MODEL_CACHE_KEY)
+    # The cached model doesn't expire, it is kept in sync with the S3 object
+    # instead (see `sync_model_cache`)
+    return CACHE.load('models', MODEL_CACHE_NAME, max_age=None)
 
 
 def load_model_from_s3() -> SklearnEstimator:
-    model_data = download_data_from_s3(MODEL_S3_STORAGE_KEY)
-    # We don't use the `store_in_cache` util function because we already have
-    # a serialized version of the model, but the outcome is the same.
-    write_binary_data_to_file(model_data, MODEL_CACHE_KEY)
-    return deserialize(model_data)
+    # The model is streamed to the cache file, and loaded from there, so that
+    # its buffers (if any) are memory-mapped rather than copied
+    if download_model_from_s3(get_s3_object_version(MODEL_STORAGE_KEY)):
+        return read_object_from_file(MODEL_CACHE_KEY)
+    # Downloaded by another process meanwhile: served from the cache
+    return load_model_from_cache()
+
+
+def sync_model_cache() -> bool:
+    """Download the model from S3, unless it's already cached in this version.
+
+    Only the S3 object's metadata is requested when the model didn't change.
+    The returned value is True if the model was downloaded.
+    """
+    version = get_s3_object_version(MODEL_STORAGE_KEY)
+    if MODEL_CACHE_KEY.exists() and version == get_cached_model_version():
+        return False
+    download_model_from_s3(version)
+    return True
+
+
+def download_model_from_s3(version: str) -> bool:
+    """Download the model to the cache, and record its S3 object version.
+
+    `version` must be requested *before* the download: if the S3 object
+    changes meanwhile, the recorded version is outdated, and the model is
+    downloaded again on the next sync.
+
+    Processes sharing the cache (eg. the workers of a server) download the
+    model one at a time: while a process downloads it, the others wait, and
+    then find it cached in `version`. When the cache is disabled, the model
+    is downloaded even if it is cached. The returned value is True if this
+    process downloaded the model.
+    """
+    def on_wait():
+        logger.info('Waiting for another process to download the model...')
+
+    with file_lock(MODEL_DOWNLOAD_LOCK, MODEL_DOWNLOAD_TIMEOUT, on_wait):
+        if (CACHE.enabled and MODEL_CACHE_KEY.exists()
+                and version == get_cached_model_version()):
+            logger.debug('Model was downloaded by another process')
+            return False
+
+        # Files left by processes that died while downloading
+        for filepath in MODEL_CACHE_KEY.parent.glob(
+                f'.{MODEL_CACHE_KEY.name}.*.tmp'):
+            remove_file(filepath)
+
+        with CACHE.batch():
+            with CACHE.open_for_writing('models', MODEL_CACHE_NAME) as fp:
+                download_fileobj_from_s3(MODEL_STORAGE_KEY, fp)
+            with CACHE.open_for_writing('models',
+                                        MODEL_VERSION_CACHE_NAME) as fp:
+                fp.write(version.encode())
+    return True
+
+
+def warn_if_model_not_shared(n_processes: int) -> None:
+    """Warn when processes loading the model each hold a copy of it.
+
+    Only the arrays of the compiled model are shared by processes loading the
+    same file (see `src.serialization`): scikit-learn copies the arrays of
+    its trees when they are loaded.
+    """
+    if (n_processes > 1 and SERIALIZER == 'buffers'
+            and PREDICT_ENGINE == 'sklearn'):
+        logger.warning(f"Each of the {n_processes} processes loading the "
+                       f"model holds its own copy of it: set "
+                       f"PREDICT_ENGINE=compiled for them to share its "
+                       f"memory.")
+
+
+def get_cached_model_version() -> Optional[str]:
+    try:
+        return read_binary_data_from_file(MODEL_VERSION_CACHE_KEY).decode()
+    except FileNotFoundError:
+        return None
+
 
+def parse(feed: Union[List[dict], DataFrame]) -> DataFrame:
+    """Convert a list of individual data points to a pandas DataFrame.
 
-def parse(feed: List[dict]) -> DataFrame:
-    """Convert a list of individual data points to a pandas DataFrame."""
-    return DataFrame(feed)
+    Columns are built straight into the dtypes declared by `src.schema`.
+    """
+    if isinstance(feed, DataFrame):  # already parsed, eg. by `src.serve`
+        return feed
+    return from_records(feed)
@@ -0,0 +1,146 @@
+"""
+Schema of the data points, shared by the training and the serving frames
+"""
+from collections import OrderedDict
+from typing import Any, Iterable, List, Mapping, Union
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from pandas.api.types import CategoricalDtype
+
+from .config import TARGET
+
+SERVE_DTYPE = CategoricalDtype([1, 2])
+HITPOINT_DTYPE = CategoricalDtype(['B', 'F', 'U', 'V'])
+OUTCOME_DTYPE = CategoricalDtype(['FE', 'UE', 'W'])
+
+# Columns of a data point along with their dtype. The columns are listed in
+# the same order than what the prediction pipeline expects. Numbers are
+# float32, the dtype trees work on: features computed from several columns
+# (eg. ratios) may differ from their float64 values in the last digits.
+COLUMN_DTYPES = OrderedDict([
+    ('rally', np.float32),
+    ('serve', SERVE_DTYPE),
+    ('hitpoint', HITPOINT_DTYPE),
+    ('speed', np.float32),
+    ('net.clearance', np.float32),
+    ('distance.from.sideline', np.float32),
+    ('depth', np.float32),
+    ('outside.sideline', np.bool_),
+    ('outside.baseline', np.bool_),
+    ('player.distance.travelled', np.float32),
+    ('player.impact.depth', np.float32),
+    ('player.impact.distance.from.center', np.float32),
+    ('player.depth', np.float32),
+    ('player.distance.from.center', np.float32),
+    ('previous.speed', np.float32),
+    ('previous.net.clearance', np.float32),
+    ('previous.distance.from.sideline', np.float32),
+    ('previous.depth', np.float32),
+    ('opponent.depth', np.float32),
+    ('opponent.distance.from.center', np.float32),
+    ('same.side', np.bool_),
+    ('previous.hitpoint', HITPOINT_DTYPE),
+    ('previous.time.to.net', np.float32),
+    ('server.is.impact.player', np.bool_),
+    ('id', object),
+])
+
+# Columns of the raw (training) data: data points along with their label
+RAW_DATA_DTYPES = OrderedDict(COLUMN_DTYPES)
+RAW_DATA_DTYPES[TARGET] = OUTCOME_DTYPE
+
+# Dtypes that file readers (eg. `pandas.read_csv`) can parse into directly.
+# Categorical columns are converted afterwards, see `build_frame`.
+READER_DTYPES = {name: dtype for name, dtype in RAW_DATA_DTYPES.items()
+                 if not isinstance(dtype, CategoricalDtype)}
+
+Columns = Union[DataFrame, Mapping[str, Iterable[Any]]]
+
+# Kinds of arrays (see `numpy.dtype.kind`) that can be cast to the kind of a
+# column's dtype: booleans, integers, floats
+_ACCEPTED_KINDS = {'b': 'biu', 'f': 'biuf', 'i': 'biu', 'u': 'biu'}
+
+
+def build_frame(columns: Columns) -> DataFrame:
+    """Build a DataFrame whose columns have their declared dtype.
+
+    Columns that are not part of the schema keep the dtype pandas infers for
+    them. A `ValueError` is raised if a value doesn't match the dtype of its
+    column: eg. a number sent as a string, or a value that is not one of a
+    categorical column's categories (including a missing value).
+    """
+    frame = OrderedDict()
+    for name, values in columns.items():
+        try:
+            frame[name] = as_column(values, RAW_DATA_DTYPES.get(name))
+        except ValueError as e:
+            raise ValueError(f"Column '{name}': {e}") from None
+    return DataFrame(frame, copy=False)
+
+
+def select_datapoints(frame: DataFrame,
+                      optional: Iterable[str] = ()) -> DataFrame:
+    """Select the columns of the data points, as the prediction pipeline
+    expects them.
+
+    A `ValueError` is raised if one of the columns of the schema is missing
+    (unless it is `optional`) or holds missing values. Columns that are not
+    part of the schema are dropped.
+    """
+    names = [name for name in COLUMN_DTYPES
+             if name in frame.columns or name not in optional]
+    missing = [name for name in names if name not in frame.columns]
+    if missing:
+        raise ValueError(f'Missing columns {missing}')
+    if list(frame.columns) != names:
+        frame = frame[names]
+    has_nulls = frame.isna().to_numpy().any(axis=0)
+    if has_nulls.any():
+        raise ValueError(f'Missing values in columns '
+                         f'{list(frame.columns[has_nulls])}')
+    return frame
+
+
+def from_records(records: List[dict]) -> DataFrame:
+    """Build a DataFrame from a list of individual data points."""
+    names = dict.fromkeys(name for record in records for name in record)
+    return build_frame(OrderedDict(
+        (name, [record.get(name) for record in records]) for name in names
+    ))
+
+
+def as_column(values: Iterable[Any], dtype) -> Any:
+    if dtype is None:
+        return values
+    if isinstance(dtype, CategoricalDtype):
+        if isinstance(values, pd.Series) and values.dtype == dtype:
+            if values.hasnans:
+                raise ValueError('Found missing values')
+            return values
+        # Going through the codes makes unknown and missing values an error,
+        # rather than silently turning them into NaN
+        values = np.asarray(values, dtype=object)
+        codes = dtype.categories.get_indexer(values)
+        invalid = codes == -1
+        if invalid.any():
+            if pd.isna(values[invalid]).any():
+                raise ValueError('Found missing values')
+            raise ValueError(f'Found unknown categories '
+                             f'{list(pd.unique(values[invalid]))}, '
+                             f'expected one of {list(dtype.categories)}')
+        return pd.Categorical.from_codes(codes, dtype=dtype)
+    if dtype is object:
+        return np.asarray(values, dtype=dtype)
+
+    # Values are checked before being cast, as casting would silently parse
+    # strings (eg. '1.5') or turn any number into a boolean
+    values = np.asarray(values)
+    if values.dtype.kind not in _ACCEPTED_KINDS[np.dtype(dtype).kind]:
+        raise ValueError(f'Expected {np.dtype(dtype).name} values, '
+                         f'got {values.dtype.name} values')
+    if (np.dtype(dtype).kind == 'b' and values.dtype.kind != 'b'
+            and not np.isin(values, (0, 1)).all()):
+        raise ValueError('Expected bool values (or 0/1)')
+    return values.astype(dtype, copy=False)
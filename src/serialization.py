@@ -0,0 +1,190 @@
+"""
+Serializers of Python objects
+
+Objects can be written in two formats:
+
+* 'pickle' - The plain Pickle format
+* 'buffers' - A Pickle stream (protocol 5, hence Python 3.8+) whose large
+  contiguous buffers (eg. the arrays of a forest's trees) are stored
+  out-of-band, after the stream, each aligned on `ALIGNMENT` bytes. When such
+  a file is loaded, the file is memory-mapped read-only and the arrays are
+  rebuilt as views on it, so loading doesn't depend much on the size of the
+  arrays, and processes that load the same file share a single physical copy
+  of the arrays. Objects that copy their arrays when unpickled don't benefit
+  from it: eg. scikit-learn's trees, hence models served with
+  `PREDICT_ENGINE=sklearn`.
+
+The format used for writing is selected by `config.SERIALIZER`. Reading
+detects the format of the data, so both can always be read.
+"""
+from abc import ABC, abstractmethod
+import mmap
+import pickle
+import struct
+from typing import Any, BinaryIO, List, Union
+
+from .config import SERIALIZER
+
+MAGIC = b'\x93SRCBUF1'  # not a valid start of a Pickle stream
+ALIGNMENT = 64  # bytes
+# Pickle stream size, number of buffers, then (offset, size) of each buffer
+_HEADER = struct.Struct('<QQ')
+_BUFFER = struct.Struct('<QQ')
+
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+
+class Serializer(ABC):
+    """Convert Python objects to bytes or files, and back.
+
+    Public interface
+    ================
+    Attributes:
+        * `name` (str) - Name of the format, as used by `config.SERIALIZER`
+
+    Methods:
+        * `dump(obj, fp)` - Write an object into a binary file object
+        * `dumps(obj)` - Return an object as bytes
+        * `load(fp)` - Read an object from a binary file object
+        * `loads(data)` - Read an object from bytes
+    """
+    name = None
+
+    def dump(self, obj: Any, fp: BinaryIO) -> int:
+        """Write `obj` into `fp` and return the number of bytes written."""
+        data = self.dumps(obj)
+        fp.write(data)
+        return len(data)
+
+    @abstractmethod
+    def dumps(self, obj: Any) -> bytes:
+        """Return `obj` serialized as bytes."""
+
+    def load(self, fp: BinaryIO) -> Any:
+        return self.loads(fp.read())
+
+    @abstractmethod
+    def loads(self, data: Buffer) -> Any:
+        """Read an object from bytes (or any buffer)."""
+
+
+class PickleSerializer(Serializer):
+
+    name = 'pickle'
+
+    def dumps(self, obj: Any) -> bytes:
+        return pickle.dumps(obj)
+
+    def loads(self, data: Buffer) -> Any:
+        return pickle.loads(data)
+
+
+class BufferSerializer(Serializer):
+
+    name = 'buffers'
+
+    def dump(self, obj: Any, fp: BinaryIO) -> int:
+        buffers = []
+        stream = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+        buffers = [buffer.raw() for buffer in buffers]
+
+        header_size = (len(MAGIC) + _HEADER.size + len(buffers) * _BUFFER.size)
+        offset = _align(header_size + len(stream))
+        table = []
+        for buffer in buffers:
+            table.append(_BUFFER.pack(offset, buffer.nbytes))
+            offset = _align(offset + buffer.nbytes)
+
+        fp.write(MAGIC + _HEADER.pack(len(stream), len(buffers)))
+        fp.write(b''.join(table))
+        fp.write(stream)
+        position = header_size + len(stream)
+        for buffer in buffers:
+            fp.write(bytes(_align(position) - position))  # padding
+            fp.write(buffer)
+            position = _align(position) + buffer.nbytes
+        return position
+
+    def dumps(self, obj: Any) -> bytes:
+        fp = _BytesWriter()
+        self.dump(obj, fp)
+        return b''.join(fp.chunks)
+
+    def load(self, fp: BinaryIO) -> Any:
+        """Load an object from a file, whose buffers are memory-mapped.
+
+        The arrays rebuilt from the buffers are read-only.
+        """
+        return self._read(mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def loads(self, data: Buffer) -> Any:
+        # Arrays are rebuilt as views on `data`: copy it once so that they
+        # are writable, like arrays loaded from a plain Pickle stream
+        return self._read(bytearray(data))
+
+    @staticmethod
+    def _read(data: Buffer) -> Any:
+        view = memoryview(data)
+        if view[:len(MAGIC)] != MAGIC:
+            raise ValueError('Data was not written by the buffers serializer.')
+        position = len(MAGIC)
+        stream_size, n_buffers = _HEADER.unpack_from(view, position)
+        position += _HEADER.size
+
+        buffers = []
+        for _ in range(n_buffers):
+            offset, size = _BUFFER.unpack_from(view, position)
+            buffers.append(view[offset:offset + size])
+            position += _BUFFER.size
+        return pickle.loads(view[position:position + stream_size],
+                            buffers=buffers)
+
+
+SERIALIZERS = {s.name: s for s in [PickleSerializer(), BufferSerializer()]}
+
+
+def get_serializer(name: str = SERIALIZER) -> Serializer:
+    try:
+        return SERIALIZERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown serializer '{name}'. "
+                         f"Must be one of {list(SERIALIZERS)}.") from None
+
+
+def dump(obj: Any, fp: BinaryIO) -> int:
+    return get_serializer().dump(obj, fp)
+
+
+def dumps(obj: Any) -> bytes:
+    return get_serializer().dumps(obj)
+
+
+def load(fp: BinaryIO) -> Any:
+    """Read an object from a file written by any of the serializers."""
+    magic = fp.read(len(MAGIC))
+    fp.seek(0)
+    return _detect(magic).load(fp)
+
+
+def loads(data: Buffer) -> Any:
+    """Read an object from bytes returned by any of the serializers."""
+    return _detect(data[:len(MAGIC)]).loads(data)
+
+
+def _detect(magic: bytes) -> Serializer:
+    name = BufferSerializer.name if magic == MAGIC else PickleSerializer.name
+    return SERIALIZERS[name]
+
+
+def _align(position: int) -> int:
+    return -(-position // ALIGNMENT) * ALIGNMENT
+
+
+class _BytesWriter:
+    """A write-only file object that keeps the written chunks (no copy)."""
+    def __init__(self):
+        self.chunks: List[Buffer] = []
+
+    def write(self, data: Buffer) -> int:
+        self.chunks.append(data)
+        return len(data)
@@ -1,25 +1,42 @@
+import json
 from logging import getLogger
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 
-from ..config import PROJECT_NAME
-from .parser import parse_request_body
-from ..predict.main import predict
+from ..cache import CACHE
+from ..config import PROJECT_NAME, PREDICT_BATCHING, configure_logging
+from .batcher import MicroBatcher
+from .parser import parse_request_body, iter_ndjson_chunks
+from ..predict.main import predict, MODEL_HOLDER, PREDICTION_CACHE
 
 PING_ROUTE = '/ping'
 PREDICT_ROUTE = '/predict'
+PREDICT_STREAM_ROUTE = '/predict/stream'
+STATS_ROUTE = '/stats'
+STREAM_CHUNK_SIZE = 1000  # number of data points predicted at once
+NDJSON_MIMETYPE = 'application/x-ndjson'
 DEBUG_PORT = 5000
 
 logger = getLogger(__name__)
 
 app = Flask(PROJECT_NAME)
 
+batcher = MicroBatcher(predict) if PREDICT_BATCHING else None
+
 
 @app.route(PING_ROUTE, methods=['GET'])
 def ping_view():
     return 'pong!'
 
 
+@app.route(STATS_ROUTE, methods=['GET'])
+def stats_view():
+    stats = {'cache': CACHE.stats}
+    if PREDICTION_CACHE is not None:
+        stats['prediction_cache'] = PREDICTION_CACHE.stats
+    return jsonify(stats)
+
+
 @app.route(PREDICT_ROUTE, methods=['POST'])
 def predict_view():
     feed, error_msg = parse_request_body(request)
@@ -28,7 +45,10 @@ def predict_view():
         return jsonify({'message': error_msg}), 400
 
     try:
-        predictions = predict(feed)
+        if batcher is not None:
+            predictions = batcher.submit(feed)
+        else:
+            predictions = predict(feed)
     except Exception as e:
         msg = f'An error occured during prediction: {e}'
         logger.error(msg)
@@ -37,11 +57,54 @@ def predict_view():
     return jsonify(predictions.tolist())
 
 
-def main():
+@app.route(PREDICT_STREAM_ROUTE, methods=['POST'])
+def predict_stream_view():
+    """Predict newline-delimited JSON data points, streaming the results.
+
+    Each line of the response is the prediction for the data point at the
+    same line of the request. Since the response is already being sent, an
+    error is reported as a last line containing a JSON object with a
+    'message' key.
+    """
+    chunks = iter_ndjson_chunks(request.stream, STREAM_CHUNK_SIZE)
+
+    def generate():
+        for feed, error_msg in chunks:
+            if error_msg:
+                logger.warning(f'Client error: {error_msg}')
+                yield _to_ndjson([{'message': error_msg}])
+                return
+
+            try:
+                predictions = predict(feed)
+            except Exception as e:
+                msg = f'An error occured during prediction: {e}'
+                logger.error(msg)
+                yield _to_ndjson([{'message': msg}])
+                return
+
+            yield _to_ndjson(predictions.tolist())
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+
+
+def _to_ndjson(objects: list) -> str:
+    return ''.join(json.dumps(obj) + '\n' for obj in objects)
+
+
+def main(production: bool = False, **server_options):
+    if production:
+        # Imported here since Gunicorn is only available on UNIX platforms
+        from .server import run
+        run(app, **server_options)
+        return
+
     # The `run()` method is just a convenient webserver to use for debugging.
     # It is absolutely *NOT* suited for production pruposes.
+    MODEL_HOLDER.start_sync()
     app.run(port=DEBUG_PORT, debug=True, host='0.0.0.0')
 
 
 if __name__ == '__main__':
+    configure_logging()
     main()
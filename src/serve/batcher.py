@@ -0,0 +1,120 @@
+from concurrent.futures import Future
+from logging import getLogger
+import os
+import queue
+import threading
+import time
+from typing import Callable, List, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from ..config import PREDICT_BATCH_MAX_SIZE, PREDICT_BATCH_MAX_WAIT
+from ..predict.utils import parse
+
+logger = getLogger(__name__)
+
+PredictFunction = Callable[[DataFrame], np.ndarray]
+_Request = Tuple[DataFrame, Future]
+
+
+class MicroBatcher:
+    """Group concurrent prediction requests into a single model call.
+
+    Requests are queued until `max_batch_size` data points are waiting or
+    `max_wait` seconds have elapsed since the first one arrived. The batch is
+    then predicted at once by a background thread, and each caller gets back
+    its own slice of the predictions.
+
+    Public interface
+    ================
+    Method:
+        * `submit(feed)` - Block until the predictions for `feed` are ready
+    """
+    def __init__(self,
+                 predict: PredictFunction,
+                 max_batch_size: int = PREDICT_BATCH_MAX_SIZE,
+                 max_wait: float = PREDICT_BATCH_MAX_WAIT):
+        self._predict = predict
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker_pid = None
+
+    def submit(self, feed) -> np.ndarray:
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((parse(feed), future))
+        return future.result()
+
+    def _ensure_worker(self) -> None:
+        # The worker thread is started lazily, and re-started in forked
+        # processes since threads don't survive a fork.
+        if self._worker_pid == os.getpid():
+            return
+        with self._lock:
+            if self._worker_pid != os.getpid():
+                self._queue = queue.Queue()
+                worker = threading.Thread(target=self._run, daemon=True,
+                                          args=(self._queue,))
+                worker.start()
+                self._worker_pid = os.getpid()
+
+    def _run(self, requests: queue.Queue) -> None:
+        while True:
+            batch = self._next_batch(requests)
+            try:
+                self._predict_batch(batch)
+            except Exception as e:  # never let the worker thread die
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _next_batch(self, requests: queue.Queue) -> List[_Request]:
+        batch = [requests.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = requests.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request[0])
+        return batch
+
+    def _predict_batch(self, batch: List[_Request]) -> None:
+        if len(batch) == 1:
+            frame, future = batch[0]
+            future.set_result(self._predict(frame))
+            return
+
+        logger.debug(f'Predicting a batch of {len(batch)} requests...')
+        try:
+            predictions = self._predict(
+                pd.concat([frame for frame, _ in batch], ignore_index=True))
+        except Exception:
+            # A single invalid request must not fail the others, so fall back
+            # to predicting requests one by one.
+            logger.warning('Batch prediction failed, predicting requests '
+                           'individually')
+            for request in batch:
+                self._predict_single(*request)
+            return
+
+        start = 0
+        for frame, future in batch:
+            future.set_result(predictions[start:start + len(frame)])
+            start += len(frame)
+
+    def _predict_single(self, frame: DataFrame, future: Future) -> None:
+        try:
+            future.set_result(self._predict(frame))
+        except Exception as e:
+            future.set_exception(e)
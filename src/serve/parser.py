@@ -1,28 +1,32 @@
 from collections import OrderedDict
-from typing import Tuple, List, Optional
+import json
+from operator import itemgetter
+from typing import IO, Iterator, Tuple, Optional
 
+from pandas import DataFrame
 from werkzeug.wrappers import Request
 
+from ..schema import COLUMN_DTYPES, build_frame, select_datapoints
+
 # Error messages
 MISSING_DATA_KEY = "Request's body must be a JSON object with a 'data' key."
 ILL_FORMED_OBJECT = ("'data' must be a single object or an array of objects. "
                      "Each object must represent a valid data point.")
+ILL_FORMED_LINE = ("Each line of the request's body must be a JSON object "
+                   "representing a valid data point. Line {} is not.")
+
+# Expected keys, in the order of the columns of the schema
+EXPECTED_KEYS = list(COLUMN_DTYPES)
+
+_get_values = itemgetter(*EXPECTED_KEYS)
+
+
+def parse_request_body(request: Request) -> Tuple[Optional[DataFrame], str]:
+    """Check request's body and return a sanitized version of payload.
 
-EXPECTED_KEYS = [
-    'rally', 'serve', 'hitpoint', 'speed', 'net.clearance',
-    'distance.from.sideline', 'depth', 'outside.sideline',
-    'outside.baseline', 'player.distance.travelled', 'player.impact.depth',
-    'player.impact.distance.from.center', 'player.depth',
-    'player.distance.from.center', 'previous.speed',
-    'previous.net.clearance', 'previous.distance.from.sideline',
-    'previous.depth', 'opponent.depth', 'opponent.distance.from.center',
-    'same.side', 'previous.hitpoint', 'previous.time.to.net',
-    'server.is.impact.player', 'id'
-]
-
-
-def parse_request_body(request: Request) -> Tuple[Optional[List[dict]], str]:
-    """Check request's body and return a sanitized version of payload."""
+    The payload is returned as a DataFrame whose columns are ordered and typed
+    as described by `src.schema.COLUMN_DTYPES`.
+    """
     try:
         data = request.get_json()['data']
     except (AttributeError, KeyError, TypeError):
@@ -31,20 +35,90 @@ def parse_request_body(request: Request) -> Tuple[Optional[List[dict]], str]:
         if isinstance(data, dict):  # single data point
             data = [data]
 
-    if (not isinstance(data, list)
-        or not all(_is_valid_datapoint(dp) for dp in data)):
+    if not isinstance(data, list):
         return None, ILL_FORMED_OBJECT
 
-    return [_reorder(datapoint) for datapoint in data], ''
+    frame = parse_datapoints(data)
+    if frame is None:
+        return None, ILL_FORMED_OBJECT
+
+    return frame, ''
+
+
+def iter_ndjson_chunks(stream: IO[bytes], chunk_size: int
+                       ) -> Iterator[Tuple[Optional[DataFrame], str]]:
+    """Incrementally parse a stream of newline-delimited JSON data points.
 
+    Data points are yielded by DataFrames of at most `chunk_size` rows, along
+    with an error message. The iteration stops after the first error, whose
+    message gives the number of the offending line: the valid data points
+    before it are all yielded first. Blank lines are errors too: skipping
+    them would shift the predictions of the following lines.
+    """
+    chunk = []
+    first_line = 1  # number of the line of the first data point of `chunk`
+    for number, line in enumerate(stream, start=1):
+        try:
+            chunk.append(json.loads(line))
+        except ValueError:  # including blank lines
+            if (yield from _parse_chunk(chunk, first_line)):
+                yield None, ILL_FORMED_LINE.format(number)
+            return
 
-def _is_valid_datapoint(obj: dict) -> bool:
-    """Check that all required key/value pairs are set."""
-    keys, values = obj.keys(), obj.values()
-    return set(keys) == set(EXPECTED_KEYS) and not any(v is None for v in values)
+        if len(chunk) == chunk_size:
+            if not (yield from _parse_chunk(chunk, first_line)):
+                return
+            chunk = []
+            first_line = number + 1
 
+    yield from _parse_chunk(chunk, first_line)
 
-def _reorder(datapoint: dict) -> dict:
-    # Ensure that the dictionnary has its keys in the same order than what
-    # the prediction pipeline expects.
-    return OrderedDict([(key, datapoint[key]) for key in EXPECTED_KEYS])
+
+def _parse_chunk(chunk: list, first_line: int
+                 ) -> Iterator[Tuple[Optional[DataFrame], str]]:
+    """Yield the data points of `chunk`, or only the valid ones before its
+    first invalid line followed by an error.
+
+    The returned value is True if all the data points are valid.
+    """
+    if not chunk:
+        return True
+    frame = parse_datapoints(chunk)
+    if frame is not None:
+        yield frame, ''
+        return True
+
+    # Only the chunk is known to be invalid: find its first invalid line
+    offset = next((i for i, datapoint in enumerate(chunk)
+                   if parse_datapoints([datapoint]) is None), 0)
+    if offset:
+        yield parse_datapoints(chunk[:offset]), ''
+    yield None, ILL_FORMED_LINE.format(first_line + offset)
+    return False
+
+
+def parse_datapoints(data: list) -> Optional[DataFrame]:
+    """Validate data points and build their columns in a single pass.
+
+    Return None if any of the data points is not valid, ie. if it doesn't have
+    exactly the expected keys, one of its values is null or can't be cast to
+    the column's dtype (including unknown categories). Offline predictions
+    (see `src.predict.batch`) validate data points the same way.
+    """
+    rows = []
+    try:
+        for datapoint in data:
+            values = _get_values(datapoint)
+            if len(datapoint) != len(EXPECTED_KEYS):
+                return None
+            rows.append(values)
+    except (KeyError, TypeError):  # missing key or not a mapping
+        return None
+
+    # Transpose rows into columns
+    columns = zip(*rows) if rows else [()] * len(EXPECTED_KEYS)
+    try:
+        frame = build_frame(OrderedDict(zip(EXPECTED_KEYS, columns)))
+        return select_datapoints(frame)
+    except (TypeError, ValueError):  # a value doesn't match its column dtype
+        return None
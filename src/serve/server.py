@@ -0,0 +1,101 @@
+"""
+Production webserver
+"""
+import gc
+from logging import getLogger
+
+from flask import Flask
+from gunicorn.app.base import BaseApplication
+import numpy as np
+from pandas import CategoricalDtype, DataFrame
+
+from ..config import (SERVER_HOST, SERVER_PORT, SERVER_WORKERS,
+                      SERVER_THREADS, SERVER_MAX_REQUESTS, SERVER_TIMEOUT)
+from ..predict.main import MODEL_HOLDER
+from ..predict.utils import warn_if_model_not_shared
+from ..schema import COLUMN_DTYPES, build_frame
+
+logger = getLogger(__name__)
+
+
+class PreforkServer(BaseApplication):
+    """A Gunicorn server running a Flask app in preforked worker processes.
+
+    The app (and the model) are loaded once in the master process before the
+    workers are forked, so that the workers share the model's memory pages
+    copy-on-write.
+
+    The master process handles the usual Gunicorn signals:
+        * `HUP` - Gracefully replace all workers with new ones
+        * `TTIN` / `TTOU` - Increment / decrement the number of workers
+        * `TERM` - Graceful shutdown, waiting for in-flight requests
+    """
+    def __init__(self, app: Flask, options: dict):
+        self.application = app
+        self.options = options
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self) -> Flask:
+        return self.application
+
+
+def run(app: Flask,
+        host: str = SERVER_HOST,
+        port: int = SERVER_PORT,
+        workers: int = SERVER_WORKERS) -> None:
+    preload_model()
+    options = {
+        'bind': f'{host}:{port}',
+        'workers': workers,
+        'threads': SERVER_THREADS,
+        'preload_app': True,
+        # Recycle workers regularly to contain memory leaks. The jitter
+        # prevents all workers from restarting at the same time.
+        'max_requests': SERVER_MAX_REQUESTS,
+        'max_requests_jitter': SERVER_MAX_REQUESTS // 10,
+        'timeout': SERVER_TIMEOUT,
+        'graceful_timeout': SERVER_TIMEOUT,
+        'post_fork': start_model_sync,
+    }
+    logger.info(f'Starting {workers} workers on {host}:{port}')
+    # Workers share the preloaded model, but each loads the new ones itself
+    warn_if_model_not_shared(workers)
+    PreforkServer(app, options).run()
+
+
+def start_model_sync(server, worker) -> None:
+    """Check for new models in the background, in each worker process.
+
+    The master process only loads the model once: a thread running there
+    could hold locks at the time workers are forked.
+    """
+    MODEL_HOLDER.start_sync()
+
+
+def preload_model() -> None:
+    """Load and warm up the model before the workers are forked."""
+    # A first prediction initializes what the model builds lazily (eg. the
+    # imports and caches of the libraries it uses), once for all workers
+    MODEL_HOLDER.get().predict(warm_up_frame())
+    # Move all objects allocated so far to a permanent generation ignored by
+    # the garbage collector: otherwise the collector would write into them
+    # and trigger copies of the shared pages in each worker.
+    gc.collect()
+    gc.freeze()
+
+
+def warm_up_frame() -> DataFrame:
+    """Return a dummy, valid data point (eg. zeros, first categories)."""
+    values = {}
+    for name, dtype in COLUMN_DTYPES.items():
+        if isinstance(dtype, CategoricalDtype):
+            values[name] = [dtype.categories[0]]
+        elif dtype is object:
+            values[name] = ['warm-up']
+        else:
+            values[name] = np.zeros(1, dtype=dtype)
+    return build_frame(values)
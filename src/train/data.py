@@ -2,21 +2,130 @@
 Module for I/O
 """
 import logging
+from os import stat
 from pathlib import Path
-from typing import Union
+from typing import Iterator, Union
 
+import numpy as np
 import pandas as pd
 
+from ..cache import CACHE
 from ..config import DATA_DIR, ROOT_DIR
+from ..schema import RAW_DATA_DTYPES, READER_DTYPES, build_frame
+from ..utils import hash_file, remove_file
 
 DATA_FILENAME = 'australian_open.csv'
 DATA_FILEPATH = DATA_DIR / DATA_FILENAME
 
+# Raw data files are converted once into a binary format stored in the
+# 'datasets' namespace of the cache: one `.npy` file per column, along with a
+# metadata file, in a directory named after the raw data file.
+METADATA_FILENAME = 'metadata.pkl'
+
 logger = logging.getLogger(__name__)
 
 
-def load_raw_data(filepath: Union[Path, str] = DATA_FILEPATH) -> pd.DataFrame:
+def load_raw_data(filepath: Union[Path, str] = DATA_FILEPATH,
+                  use_cache: bool = True) -> pd.DataFrame:
     filepath = Path(filepath)
+    # The binary copy is neither read nor written with `--disable-cache`
+    use_cache = use_cache and CACHE.enabled
+    if use_cache:
+        try:
+            return _load_from_binary_cache(filepath)
+        except FileNotFoundError:
+            logger.debug('Raw data not found in cache')
+
     logger.debug(f"Loading raw data from '{filepath.relative_to(ROOT_DIR)}'")
-    data = pd.read_csv(filepath)
+    data = build_frame(pd.read_csv(filepath, dtype=READER_DTYPES))
+    if use_cache:
+        _store_in_binary_cache(data, filepath)
     return data
+
+
+def iter_raw_data(filepath: Union[Path, str] = DATA_FILEPATH,
+                  chunk_size: int = 100000) -> Iterator[pd.DataFrame]:
+    """Read a raw data file by chunks of `chunk_size` rows."""
+    filepath = Path(filepath)
+    logger.debug(f"Reading raw data from '{filepath.name}' by chunks of "
+                 f"{chunk_size} rows")
+    reader = pd.read_csv(filepath, dtype=READER_DTYPES, chunksize=chunk_size)
+    with reader:
+        for chunk in reader:
+            yield build_frame(chunk)
+
+
+def _store_in_binary_cache(data: pd.DataFrame, filepath: Path) -> None:
+    entry = filepath.stem
+    metadata_filepath = CACHE.path('datasets', f'{entry}/{METADATA_FILENAME}')
+    if metadata_filepath.exists():  # the entry is invalid until rewritten
+        remove_file(metadata_filepath)
+
+    dtypes = []
+    with CACHE.batch():  # trimmed once the whole entry is written
+        for i, (_, column) in enumerate(data.items()):
+            with CACHE.open_for_writing('datasets', f'{entry}/{i}.npy') as fp:
+                if _is_memory_mappable(column.dtype):
+                    np.save(fp, column.to_numpy())
+                elif isinstance(column.dtype, pd.CategoricalDtype):
+                    np.save(fp, column.cat.codes.to_numpy())
+                else:  # eg. strings, stored as pickled objects
+                    np.save(fp, column.to_numpy(dtype=object),
+                            allow_pickle=True)
+            dtypes.append(column.dtype)
+
+        # The metadata file is written last, as it marks the entry as complete
+        CACHE.store({
+            'source': _get_file_stats(filepath),
+            'hash': hash_file(filepath),
+            'schema': RAW_DATA_DTYPES,
+            'columns': list(data.columns),
+            'dtypes': dtypes,
+        }, 'datasets', f'{entry}/{METADATA_FILENAME}')
+
+
+def _load_from_binary_cache(filepath: Path) -> pd.DataFrame:
+    """Load raw data from the binary cache.
+
+    This function will raise a `FileNotFoundError` if the raw data file is
+    not in cache, or if it changed since it was cached.
+    """
+    entry = filepath.stem
+    # The binary copy doesn't expire: it is invalidated when the raw data file
+    # or the schema changes instead
+    metadata = CACHE.load('datasets', f'{entry}/{METADATA_FILENAME}',
+                          max_age=None)
+    if metadata.get('schema') != RAW_DATA_DTYPES:
+        raise FileNotFoundError(f"'{filepath}' cached with another schema.")
+
+    if metadata['source'] != _get_file_stats(filepath):
+        # The file may have been touched or copied without being modified
+        if hash_file(filepath) != metadata['hash']:
+            raise FileNotFoundError(f"'{filepath}' changed since cached.")
+        metadata['source'] = _get_file_stats(filepath)
+        CACHE.store(metadata, 'datasets', f'{entry}/{METADATA_FILENAME}')
+
+    directory = CACHE.path('datasets', entry)
+    columns = {}
+    for i, (name, dtype) in enumerate(zip(metadata['columns'],
+                                          metadata['dtypes'])):
+        if _is_memory_mappable(dtype):
+            columns[name] = np.load(directory / f'{i}.npy', mmap_mode='r')
+        elif isinstance(dtype, pd.CategoricalDtype):
+            codes = np.load(directory / f'{i}.npy', mmap_mode='r')
+            columns[name] = pd.Categorical.from_codes(codes, dtype=dtype)
+        else:
+            values = np.load(directory / f'{i}.npy', allow_pickle=True)
+            columns[name] = pd.Series(values, dtype=dtype)
+
+    logger.debug(f"Loaded raw data of '{filepath.name}' from cache")
+    return pd.DataFrame(columns, columns=metadata['columns'], copy=False)
+
+
+def _get_file_stats(filepath: Path) -> tuple:
+    stats = stat(filepath)
+    return stats.st_size, stats.st_mtime_ns
+
+
+def _is_memory_mappable(dtype) -> bool:
+    return isinstance(dtype, np.dtype) and dtype != object
@@ -10,7 +10,7 @@ from pandas import DataFrame
 from .. import config
 from ..utils import write_binary_data_to_file, serialize
 
-CACHE_DIRECTORY = config.CACHE_DIR / 'datasets'
+TEST_SIZE = 0.2  # proportion of the data held out for testing
 
 logger = logging.getLogger(__name__)
 
@@ -34,7 +34,18 @@ def train_test_split(X: Sequence, y: Sequence) -> tuple:
     split parameters.
     """
     return _train_test_split(
-        X, y, test_size=0.2, random_state=config.RANDOM_SEED, stratify=y)
+        X, y, test_size=TEST_SIZE, random_state=config.RANDOM_SEED, stratify=y)
+
+
+def subsample(X: Sequence, y: Sequence, n_samples: int) -> tuple:
+    """Return a random subset of `n_samples` data points, with the same
+    proportion of each label as in `y`."""
+    if n_samples >= len(X):
+        return X, y
+    X_subset, _, y_subset, _ = _train_test_split(
+        X, y, train_size=n_samples, random_state=config.RANDOM_SEED,
+        stratify=y)
+    return X_subset, y_subset
 
 
 def split_labels(df: DataFrame,
@@ -0,0 +1,70 @@
+"""
+Evaluation of candidate estimators on CV folds
+"""
+import time
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from sklearn.base import clone
+from sklearn.metrics import get_scorer
+from sklearn.utils.parallel import Parallel, delayed
+
+from ..utils import SklearnEstimator
+
+
+def evaluate_candidates(estimator: SklearnEstimator,
+                        X: DataFrame,
+                        y: DataFrame,
+                        candidates: List[dict],
+                        scoring: str,
+                        cv,
+                        n_jobs: int = 1
+                        ) -> Tuple[np.ndarray, List[DataFrame], np.ndarray]:
+    """Fit and score each candidate (parameters of `estimator`) on CV folds.
+
+    As with `GridSearchCV`, each candidate on each fold is a task, and tasks
+    run in `n_jobs` parallel processes. The models of the folds also predict
+    their test fold, so that the out-of-fold predictions of any candidate
+    (eg. the best one) are known without fitting it again.
+
+    Return the scores of each candidate on each fold (one row per candidate),
+    the out-of-fold predicted probabilities of each candidate (indexed like
+    `X`, one column per class), and the time spent on each candidate's folds.
+    """
+    folds = list(cv.split(X, y))
+    scorer = get_scorer(scoring)
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_and_predict)(clone(estimator).set_params(**params),
+                                  X, y, train, test, scorer)
+        for params in candidates
+        for train, test in folds
+    )
+
+    scores = np.empty((len(candidates), len(folds)))
+    times = np.zeros(len(candidates))
+    predictions = []
+    for i in range(len(candidates)):
+        fold_results = results[i * len(folds):(i + 1) * len(folds)]
+        scores[i] = [score for score, _, _ in fold_results]
+        times[i] = sum(duration for _, _, duration in fold_results)
+        predictions.append(pd.concat(
+            [fold_predictions for _, fold_predictions, _ in fold_results]
+        ).loc[X.index])
+    return scores, predictions, times
+
+
+def _fit_and_predict(estimator: SklearnEstimator,
+                     X: DataFrame,
+                     y: DataFrame,
+                     train: np.ndarray,
+                     test: np.ndarray,
+                     scorer) -> Tuple[float, DataFrame, float]:
+    start = time.time()
+    estimator.fit(X.iloc[train], y.iloc[train])
+    X_test, y_test = X.iloc[test], y.iloc[test]
+    score = scorer(estimator, X_test, y_test)
+    predictions = DataFrame(estimator.predict_proba(X_test),
+                            index=X_test.index, columns=estimator.classes_)
+    return score, predictions, time.time() - start
@@ -1,5 +1,3 @@
-from sklearn.pipeline import FeatureUnion
-
 from .features import (
     Speed,
     NetClearance,
@@ -14,6 +12,7 @@ from .features import (
     WeirdNetClearance,
     DistanceTravelledRatio
 )
+from .union import FusedFeatureUnion
 
 FEATURES_LIST = [
     Speed,
@@ -32,4 +31,6 @@ FEATURES_LIST = [
 
 FEATURES_STORE = [(f.name(), f()) for f in FEATURES_LIST]
 
-features_generator = FeatureUnion(FEATURES_STORE)
+# All features are written into a single float32 matrix. Any FeatureUnion can
+# be used instead, eg. `FeatureUnion(FEATURES_STORE)`.
+features_generator = FusedFeatureUnion(FEATURES_STORE)
@@ -1,9 +1,11 @@
 """
 Base classes for constructing features.
 """
+from abc import ABC, abstractmethod
 import re
 from typing import List
 
+import numpy as np
 from sklearn.base import TransformerMixin, BaseEstimator
 
 
@@ -21,10 +23,42 @@ class BaseFeature(TransformerMixin, BaseEstimator):
         return [self.name()]
 
 
-class ColumnExtractorMixin:
+class KernelMixin(ABC):
+    """Compute a feature with a vectorized kernel over raw column arrays.
+
+    `columns` lists the raw columns the feature is computed from. They are
+    passed as NumPy arrays, in the same order, to the `kernel` method, which
+    returns the feature values: a 1D array if the feature has a single output,
+    or an (n, n_outputs) array.
+    """
+
+    columns: List[str] = []
+    n_outputs = 1
+
+    @abstractmethod
+    def kernel(self, *arrays: np.ndarray) -> np.ndarray:
+        """Compute the feature values from the arrays of `columns`."""
 
     def transform(self, X):
+        values = self.kernel(*self._arrays(X))
+        return values.reshape(len(values), self.n_outputs)
+
+    def transform_into(self, X, out: np.ndarray) -> None:
+        """Write the feature's values into the (n, n_outputs) array `out`."""
+        out[:] = self.transform(X)
+
+    def _arrays(self, X) -> List[np.ndarray]:
+        return [X[cname].to_numpy() for cname in self.columns]
+
+
+class ColumnExtractorMixin(KernelMixin):
+
+    @property
+    def columns(self) -> List[str]:
         assert self._cname is not None, (
             f'_cname is None for {self.__class__.__name__}. '
             f'You need to provide _cname')
-        return X[[self._cname]]
+        return [self._cname]
+
+    def kernel(self, column: np.ndarray) -> np.ndarray:
+        return column
@@ -2,10 +2,10 @@
 Features
 """
 import numpy as np
-from scipy.spatial import distance
+from pandas import CategoricalDtype
 from sklearn.preprocessing import OneHotEncoder
 
-from .base import BaseFeature, ColumnExtractorMixin
+from .base import BaseFeature, ColumnExtractorMixin, KernelMixin
 
 
 class Speed(BaseFeature, ColumnExtractorMixin):
@@ -48,44 +48,93 @@ class PreviousTimeToNet(BaseFeature, ColumnExtractorMixin):
     _cname = 'previous.time.to.net'
 
 
-class Hitpoint(BaseFeature):
+class Hitpoint(BaseFeature, KernelMixin):
+
+    columns = ['hitpoint']
 
     def fit(self, X, y=None):
-        encoder = OneHotEncoder(drop='first', sparse_output=False)
+        # Categories declared by the column's dtype don't depend on the data
+        # it's fitted on, eg. a single chunk of data
+        dtype = X['hitpoint'].dtype
+        categories = ([np.asarray(dtype.categories, dtype=object)]
+                      if isinstance(dtype, CategoricalDtype) else 'auto')
+        encoder = OneHotEncoder(categories=categories, drop='first',
+                                sparse_output=False)
         self.encoder = encoder.fit(X[['hitpoint']])
         return self
 
+    @property
+    def n_outputs(self):
+        return len(self.encoder.categories_[0]) - 1
+
     def transform(self, X):
-        return self.encoder.transform(X[['hitpoint']])
+        return self._encode(X['hitpoint'])
 
+    def transform_into(self, X, out):
+        self._encode(X['hitpoint'], out=out)
 
-class Out(BaseFeature, ColumnExtractorMixin):
+    def kernel(self, hitpoint):
+        """One-hot encode on the fitted categories, the first one dropped."""
+        return self._one_hot(hitpoint, self.encoder.categories_[0])
 
-    def transform(self, X):
-        res = X['outside.sideline'] | X['outside.baseline']
-        return res.values[:, np.newaxis]
+    def _encode(self, column, out=None):
+        if not isinstance(column.dtype, CategoricalDtype):
+            return self._one_hot(column.to_numpy(),
+                                 self.encoder.categories_[0], out=out)
 
+        # Compare the small integer codes of the column rather than its values
+        codes = column.cat.codes.to_numpy()
+        categories = column.cat.categories.get_indexer(
+            self.encoder.categories_[0])
+        known = np.isin(codes, categories[categories != -1])
+        if not known.all():  # let the kernel report the unknown values
+            self.kernel(column.to_numpy()[~known])
+        return self._one_hot(codes, categories, out=out)
 
-class WeirdNetClearance(BaseFeature):
+    def _one_hot(self, hitpoint, categories, out=None):
+        # `categories` are the values to compare `hitpoint` with, in the order
+        # of the fitted categories
+        known = np.isin(hitpoint, categories)
+        if not known.all():
+            raise ValueError(f'Found unknown categories '
+                             f'{list(np.unique(hitpoint[~known]))} '
+                             f'in column hitpoint during transform')
+        if out is None:
+            out = np.empty((len(hitpoint), self.n_outputs))
+        for i, category in enumerate(categories[1:]):
+            out[:, i] = hitpoint == category
+        return out
 
-    def transform(self, X):
-        X_tr = (X['net.clearance'] < -0.946) & (X['net.clearance'] > -0.948)
-        return X_tr.values[:, np.newaxis]
 
+class Out(BaseFeature, KernelMixin):
 
-def distance_travelled_straight_line(row):
-    x1 = row['player.distance.from.center']
-    y1 = row['player.depth']
-    x2 = row['player.impact.distance.from.center']
-    y2 = row['player.impact.depth']
-    return distance.euclidean((x1, y1), (x2, y2))
+    columns = ['outside.sideline', 'outside.baseline']
 
+    def kernel(self, outside_sideline, outside_baseline):
+        return np.logical_or(outside_sideline, outside_baseline)
 
-class DistanceTravelledRatio(BaseFeature):
 
-    def transform(self, X):
-        euclidean_distance = X.apply(distance_travelled_straight_line, axis=1)
-        res = np.where(X['player.distance.travelled'] != 0,
-                       X['player.distance.travelled'] / euclidean_distance,
-                       1)
-        return res[:, np.newaxis]
+class WeirdNetClearance(BaseFeature, KernelMixin):
+
+    columns = ['net.clearance']
+
+    def kernel(self, net_clearance):
+        return (net_clearance < -0.946) & (net_clearance > -0.948)
+
+
+def distance_travelled_straight_line(x1, y1, x2, y2):
+    return np.hypot(x1 - x2, y1 - y2)
+
+
+class DistanceTravelledRatio(BaseFeature, KernelMixin):
+
+    columns = ['player.distance.travelled', 'player.distance.from.center',
+               'player.depth', 'player.impact.distance.from.center',
+               'player.impact.depth']
+
+    def kernel(self, distance_travelled, x1, y1, x2, y2):
+        euclidean_distance = distance_travelled_straight_line(x1, y1, x2, y2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(distance_travelled != 0,
+                            distance_travelled / euclidean_distance,
+                            1)
@@ -1,7 +1,9 @@
 import logging
 
 from . import features_generator
-from ..data import load_raw_data
+from .store import features_key, save_features
+from ..data import load_raw_data, DATA_FILEPATH
+from ...config import configure_logging
 
 
 logger = logging.getLogger(__name__)
@@ -9,9 +11,13 @@ logger = logging.getLogger(__name__)
 
 def main():
     data = load_raw_data()
-    features_generator.fit_transform(data)
+    features = features_generator.fit_transform(data)
     logger.debug("All features were successfully generated.")
+    # Store them so that the training system doesn't compute them again
+    save_features(features_key(DATA_FILEPATH), features, features_generator,
+                  data.index)
 
 
 if __name__ == '__main__':
+    configure_logging()
     main()
@@ -0,0 +1,70 @@
+"""
+Reference implementations of the features
+
+These are the original, DataFrame-based implementations that the vectorized
+kernels replaced. They are not used by any system: the tests check the
+kernels against them (`tests/test_features.py`), and the features benchmark
+times the kernels against them (`benchmarks/features.py`).
+"""
+import numpy as np
+from scipy.spatial import distance
+from sklearn.pipeline import FeatureUnion, make_pipeline
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder
+
+from .base import ColumnExtractorMixin
+from .features import DistanceTravelledRatio, Hitpoint, Out, WeirdNetClearance
+from ...utils import SklearnEstimator
+
+
+def out(X):
+    res = X['outside.sideline'] | X['outside.baseline']
+    return res.values[:, np.newaxis]
+
+
+def weird_net_clearance(X):
+    X_tr = (X['net.clearance'] < -0.946) & (X['net.clearance'] > -0.948)
+    return X_tr.values[:, np.newaxis]
+
+
+def distance_travelled_ratio(X):
+    def distance_travelled_straight_line(row):
+        x1 = row['player.distance.from.center']
+        y1 = row['player.depth']
+        x2 = row['player.impact.distance.from.center']
+        y2 = row['player.impact.depth']
+        return distance.euclidean((x1, y1), (x2, y2))
+
+    euclidean_distance = X.apply(distance_travelled_straight_line, axis=1)
+    res = np.where(X['player.distance.travelled'] != 0,
+                   X['player.distance.travelled'] / euclidean_distance,
+                   1)
+    return res[:, np.newaxis]
+
+
+REFERENCES = {
+    Out: out,
+    WeirdNetClearance: weird_net_clearance,
+    DistanceTravelledRatio: distance_travelled_ratio,
+}
+
+
+def reference_transformer(feature: SklearnEstimator) -> SklearnEstimator:
+    """Return a transformer computing `feature` as it previously was.
+
+    The transformer is not fitted.
+    """
+    if isinstance(feature, ColumnExtractorMixin):
+        cname = feature.columns[0]
+        return FunctionTransformer(lambda X: X[[cname]].to_numpy())
+    if isinstance(feature, Hitpoint):
+        return make_pipeline(
+            FunctionTransformer(lambda X: X[['hitpoint']]),
+            OneHotEncoder(drop='first', sparse_output=False))
+    return FunctionTransformer(REFERENCES[type(feature)])
+
+
+def reference_generator(generator: FeatureUnion) -> FeatureUnion:
+    """Return a features generator computing the features of `generator` as
+    they previously were, one after the other."""
+    return FeatureUnion([(name, reference_transformer(feature))
+                         for name, feature in generator.transformer_list])
@@ -0,0 +1,154 @@
+"""
+Feature store
+
+Feature matrices generated by the `--features` command are stored in the
+'features' namespace of the cache, so that training can reuse them instead of
+recomputing the features. Entries are keyed by a hash of the raw data file and
+of the code that loads it and computes the features, so any change of either
+makes the stored matrix stale.
+"""
+from hashlib import sha1
+from logging import getLogger
+from pathlib import Path
+from typing import Tuple, Union
+
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.pipeline import Pipeline
+
+from ... import schema
+from .. import data
+from ...cache import CACHE
+from ...utils import hasher, hash_file, SklearnEstimator
+
+logger = getLogger(__name__)
+
+
+def features_key(data_filepath: Union[Path, str]) -> str:
+    """Return the key of the features generated from a raw data file."""
+    digest = sha1(hash_file(data_filepath).encode())
+    _hash_code(digest)
+    return digest.hexdigest()
+
+
+def features_code_version() -> str:
+    """Return a hash of the code computing the features from raw data.
+
+    It changes along with the code, unlike pickled transformers, which only
+    reference their classes.
+    """
+    digest = sha1()
+    _hash_code(digest)
+    return digest.hexdigest()
+
+
+def _hash_code(digest) -> None:
+    # Features' code, the code loading their inputs and the dtypes of these,
+    # along with the libraries they rely on
+    for module in sorted(Path(__file__).parent.glob('*.py')):
+        digest.update(module.read_bytes())
+    for module in [data, schema]:
+        digest.update(Path(module.__file__).read_bytes())
+    digest.update(f'{np.__version__}/{sklearn.__version__}'.encode())
+
+
+def save_features(key: str,
+                  features: np.ndarray,
+                  generator: SklearnEstimator,
+                  index: pd.Index) -> None:
+    """Store a feature matrix along with the ID of the fitted generator.
+
+    `index` identifies the rows of the matrix, ie. it is the index of the raw
+    data the features were computed from.
+    """
+    if len(index) != len(features) or not index.is_unique:
+        raise ValueError('Stored features need a unique index with one entry '
+                         'per row.')
+    with CACHE.batch():
+        with CACHE.open_for_writing('features', f'{key}/features.npy') as fp:
+            np.save(fp, features)
+        # The metadata file is written last, as it marks the entry as complete
+        CACHE.store({'generator_id': hasher(generator), 'index': index},
+                    'features', f'{key}/metadata.pkl')
+    logger.info(f'Features stored under key {key}')
+
+
+def load_features(key: str) -> Tuple[np.ndarray, str, pd.Index]:
+    """Return a stored (memory-mapped) feature matrix, its generator ID and
+    the index of its rows.
+
+    This function will raise a `FileNotFoundError` if there are no features
+    stored under `key`. Stored features don't expire, as their key already
+    changes with the raw data and the code.
+    """
+    metadata = CACHE.load('features', f'{key}/metadata.pkl', max_age=None)
+    features = np.load(CACHE.lookup('features', f'{key}/features.npy',
+                                    max_age=None),
+                       mmap_mode='r')
+    return features, metadata['generator_id'], metadata['index']
+
+
+class StoredFeatures(TransformerMixin, BaseEstimator):
+    """Wrap a features generator to read its output from the feature store.
+
+    The wrapped generator is fitted as usual. When its fitted state is the
+    same as the one of the stored features, the rows of `X` are read from the
+    store instead of being computed: they are looked up by their index, among
+    the index of the raw data the stored features were computed from.
+    Otherwise, or if some rows are not found, the generator computes them.
+
+    This is only meant to be used during training: see `unwrap`.
+    """
+    def __init__(self, generator: SklearnEstimator, key: str):
+        self.generator = generator
+        self.key = key
+
+    def fit(self, X, y=None):
+        self.generator.fit(X, y)
+        return self
+
+    def transform(self, X):
+        features, generator_id, index = load_features(self.key)
+        if hasher(self.generator) != generator_id:
+            logger.debug('Fitted features differ from the stored ones')
+            return self.generator.transform(X)
+        positions = index.get_indexer(X.index)
+        if (positions == -1).any():
+            logger.debug('Rows not found among the stored features')
+            return self.generator.transform(X)
+        return np.asarray(features[positions])
+
+
+def use_feature_store(pipeline: Pipeline,
+                      data_filepath: Union[Path, str]) -> Pipeline:
+    """Plug the stored features of a raw data file into a pipeline, if any.
+
+    The pipeline is returned unchanged if no features were stored for this
+    data file and features' code.
+    """
+    key = features_key(data_filepath)
+    try:
+        load_features(key)
+    except FileNotFoundError:
+        logger.info('No stored features found, they will be computed')
+        return pipeline
+
+    logger.info(f'Using stored features (key {key})')
+    generator = pipeline.named_steps['features']
+    return pipeline.set_params(features=StoredFeatures(generator, key))
+
+
+def unwrap(estimator: SklearnEstimator) -> SklearnEstimator:
+    """Replace `StoredFeatures` in a fitted pipeline by the actual generator.
+
+    The returned pipeline doesn't depend on the feature store anymore, so it
+    can be serialized and used for predictions.
+    """
+    if not isinstance(estimator, Pipeline):
+        return estimator
+    features = estimator.named_steps['features']
+    if isinstance(features, StoredFeatures):
+        estimator.set_params(features=features.generator)
+    return estimator
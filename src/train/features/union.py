@@ -0,0 +1,63 @@
+"""
+Fused feature union
+"""
+from typing import List
+
+import numpy as np
+from sklearn.pipeline import FeatureUnion
+
+
+class FusedFeatureUnion(FeatureUnion):
+    """A drop-in replacement for `FeatureUnion` building a single matrix.
+
+    The output matrix is allocated once, as a contiguous float32 array (the
+    dtype trees work on), and each feature writes its columns into it in
+    place. Features declare their output width with `n_outputs` and write
+    their values with `transform_into(X, out)`. Other transformers are
+    transformed the usual way, then copied into the matrix.
+
+    Transformers are always fitted and run sequentially: `n_jobs` is ignored.
+    """
+
+    def fit(self, X, y=None, **fit_params):
+        for _, transformer in self._iter_transformers():
+            transformer.fit(X, y)
+        return self
+
+    def fit_transform(self, X, y=None, **fit_params):
+        return self.fit(X, y).transform(X)
+
+    def transform(self, X):
+        transformers = [t for _, t in self._iter_transformers()]
+        # Transformers that can't tell their output width are run first
+        outputs = [None if hasattr(t, 'transform_into') else t.transform(X)
+                   for t in transformers]
+        widths = [t.n_outputs if output is None else output.shape[1]
+                  for t, output in zip(transformers, outputs)]
+
+        res = np.empty((len(X), sum(widths)), dtype=np.float32)
+        start = 0
+        for transformer, output, width, weight in zip(
+                transformers, outputs, widths, self._weights()):
+            out = res[:, start:start + width]
+            if output is None:
+                transformer.transform_into(X, out)
+            else:
+                out[:] = output
+            if weight is not None:
+                out *= weight
+            start += width
+        return res
+
+    def _iter_transformers(self):
+        for name, transformer in self.transformer_list:
+            if transformer == 'drop':
+                continue
+            if transformer == 'passthrough':
+                raise TypeError(f"{self.__class__.__name__} doesn't support "
+                                f"'passthrough' transformers.")
+            yield name, transformer
+
+    def _weights(self) -> List:
+        weights = self.transformer_weights or {}
+        return [weights.get(name) for name, _ in self._iter_transformers()]
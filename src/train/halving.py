@@ -0,0 +1,107 @@
+"""
+Successive halving search, within a wall-clock budget
+"""
+from logging import getLogger
+from math import ceil, floor, log
+import time
+from typing import Optional, Tuple, Union
+
+import numpy as np
+from pandas import DataFrame
+from sklearn.model_selection import ParameterGrid
+
+from .dataset import subsample
+from .evaluation import evaluate_candidates
+from ..utils import SklearnEstimator
+
+logger = getLogger(__name__)
+
+
+def successive_halving(estimator: SklearnEstimator,
+                       X: DataFrame,
+                       y: DataFrame,
+                       param_grid: dict,
+                       scoring: str,
+                       cv,
+                       n_jobs: int = 1,
+                       resource: str = 'n_samples',
+                       factor: int = 3,
+                       min_resources: Union[int, str] = 'exhaust',
+                       max_resources: Union[int, str] = 'auto',
+                       time_budget: Optional[float] = None
+                       ) -> Tuple[dict, np.ndarray, DataFrame, list]:
+    """Search the best candidate of `param_grid` by successive halving.
+
+    All candidates are first evaluated on `min_resources` (training samples,
+    or the value of the `resource` parameter, eg. a number of trees). Only
+    the best `1 / factor` of them are evaluated again in the next round, with
+    `factor` times more resources, until less than `factor` candidates are
+    left. `min_resources='exhaust'` picks it so that the last round uses
+    `max_resources` (`'auto'` being all the training samples).
+
+    Rounds stop early if the next one would exceed `time_budget` seconds,
+    estimated from the duration of the previous one. The first round always
+    runs.
+
+    Return the best candidate (including the value of the `resource`
+    parameter it was evaluated with), its losses on CV folds, its out-of-fold
+    predicted probabilities (indexed like the samples of the last round), and
+    a summary of each round. Candidates are not refitted.
+    """
+    candidates = list(ParameterGrid(param_grid))
+    n_rounds = 1 + floor(log(len(candidates), factor))
+    if max_resources == 'auto':
+        if resource != 'n_samples':
+            raise ValueError("max_resources='auto' is only valid with "
+                             "resource='n_samples'.")
+        max_resources = len(X)
+    if min_resources == 'exhaust':
+        min_resources = max(1, max_resources // factor ** (n_rounds - 1))
+
+    start = time.time()
+    rounds = []
+    for i in range(n_rounds):
+        n_resources = min(min_resources * factor ** i, max_resources)
+        if resource == 'n_samples':
+            X_round, y_round = subsample(X, y, n_resources)
+            round_candidates = candidates
+        else:
+            X_round, y_round = X, y
+            round_candidates = [{**c, resource: n_resources}
+                                for c in candidates]
+
+        round_start = time.time()
+        scores, predictions, tasks_times = evaluate_candidates(
+            estimator, X_round, y_round, round_candidates, scoring=scoring,
+            cv=cv, n_jobs=n_jobs)
+        ranking = np.argsort(-scores.mean(axis=1), kind='stable')
+        best_cv_losses = -scores[ranking[0]]
+        cv_predictions = predictions[ranking[0]]
+        rounds.append({
+            'iter': i,
+            'n_candidates': len(candidates),
+            'n_resources': n_resources,
+            'best_loss': best_cv_losses.mean(),
+            # Along with the resource it was evaluated with, if a parameter
+            'best_params': round_candidates[ranking[0]],
+            'n_fits': scores.size,
+            'time': time.time() - round_start,
+            'tasks_time': float(tasks_times.sum()),
+        })
+        logger.info(f"Round {i}: {len(candidates)} candidates with "
+                    f"{resource}={n_resources}, best loss "
+                    f"{rounds[-1]['best_loss']:.4f}")
+
+        candidates = [candidates[j]
+                      for j in ranking[:ceil(len(candidates) / factor)]]
+        # The next round has `factor` times less candidates, each given
+        # `factor` times more resources: it should take about as long
+        elapsed = time.time() - start
+        if (time_budget is not None and i + 1 < n_rounds
+                and elapsed + rounds[-1]['time'] > time_budget):
+            logger.warning(f'Stopping the search after {i + 1}/{n_rounds} '
+                           f'rounds, as the next one would exceed the time '
+                           f'budget ({time_budget:.0f}s)')
+            break
+
+    return rounds[-1]['best_params'], best_cv_losses, cv_predictions, rounds
@@ -2,6 +2,7 @@ from datetime import datetime
 import json
 from logging import getLogger
 from pathlib import Path
+from typing import Optional
 
 import numpy as np
 from pandas import DataFrame
@@ -10,18 +11,26 @@ from .dataset import save_dataset
 from .encoder import JSONEncoder as CustomJSONEncoder
 from .model import save_model
 from ..config import OUTPUT_DIR, ROOT_DIR
-from ..utils import SklearnEstimator, hasher
+from ..utils import SklearnEstimator, hasher, open_for_writing
 
 logger = getLogger(__name__)
 
 MODEL_FILENAME = 'model.pkl'
 DATASET_FILENAME = 'dataset.pkl'
 REPORT_FILENAME = 'report.json'
+CV_PREDICTIONS_FILENAME = 'cv_predictions.pkl'
+TEST_IDS_FILENAME = 'test_ids.npy'
 
 
 class TrainingLogger:
     """An simple object to keep track of trainings.
 
+    Any extra information about the training (eg. how it was run) can be
+    added to the report with `details`. The dataset is not stored if it is
+    None (eg. for out-of-core trainings). Out-of-fold predictions made during
+    cross-validation, if given, are stored along with the other artifacts, as
+    are the ids of the data points a retrained model is evaluated on.
+
     Public interface
     ================
     Attributes:
@@ -35,13 +44,19 @@ class TrainingLogger:
     """
     def __init__(self,
                  estimator: SklearnEstimator,
-                 dataset: DataFrame,
+                 dataset: Optional[DataFrame],
                  test_log_loss: float,
-                 cv_losses: np.ndarray):
+                 cv_losses: np.ndarray,
+                 details: Optional[dict] = None,
+                 cv_predictions: Optional[DataFrame] = None,
+                 test_ids: Optional[np.ndarray] = None):
         self._estimator = estimator
         self._dataset = dataset
         self._test_log_loss = test_log_loss
         self._cv_log_losses = cv_losses
+        self._details = details or {}
+        self._cv_predictions = cv_predictions
+        self._test_ids = test_ids
 
         self.timestamp = datetime.now().strftime('%Y%m%d-%Hh%Mm%Ss')
         self._report = None
@@ -51,14 +66,18 @@ class TrainingLogger:
         if self._report is None:
             self._report = {
                 'test_log_loss': self._test_log_loss,
-                'mean_cv_log_loss': np.mean(self._cv_log_losses),
-                'std_cv_log_loss': np.std(self._cv_log_losses),
+                # There are no CV losses for incremental trainings
+                'mean_cv_log_loss': (np.mean(self._cv_log_losses)
+                                     if len(self._cv_log_losses) else None),
+                'std_cv_log_loss': (np.std(self._cv_log_losses)
+                                    if len(self._cv_log_losses) else None),
                 'cv_log_losses': list(self._cv_log_losses),
                 'estimator': {
                     'id': hasher(self._estimator),
                     'type': self._estimator.__class__.__name__,
                     'params': self._estimator.get_params()
-                }
+                },
+                **self._details
             }
         return self._report
 
@@ -76,8 +95,18 @@ class TrainingLogger:
         logger.info(
             f"Storing experiment artifacts under '{relative_storage_dir}'"
         )
-        save_model(self._estimator, f'{self.storage_directory}/{MODEL_FILENAME}')
-        save_dataset(self._dataset, f'{self.storage_directory}/{DATASET_FILENAME}')
+        save_model(self._estimator,
+                   f'{self.storage_directory}/{MODEL_FILENAME}')
+        if self._dataset is not None:
+            save_dataset(self._dataset,
+                         f'{self.storage_directory}/{DATASET_FILENAME}')
+        if self._cv_predictions is not None:
+            save_dataset(self._cv_predictions,
+                         f'{self.storage_directory}/{CV_PREDICTIONS_FILENAME}')
+        if self._test_ids is not None:
+            with open_for_writing(
+                    f'{self.storage_directory}/{TEST_IDS_FILENAME}') as fp:
+                np.save(fp, self._test_ids)
         self._save_report()
         self._create_index_file()
 
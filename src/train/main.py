@@ -1,13 +1,35 @@
-from .data import load_raw_data
-from .model import get_model
+from typing import Optional
+
+from .data import load_raw_data, DATA_FILEPATH
+from .features.store import use_feature_store
+from .model import get_model, get_incremental_model
+from .retrain import retrain
+from .stream import train_stream, CHUNK_SIZE
 from .train import train
+from ..config import configure_logging
+
 
+def main(optimize: bool = False,
+         n_jobs: int = 1,
+         search: str = 'grid',
+         time_budget: Optional[float] = None,
+         parent_id: Optional[str] = None,
+         stream: bool = False,
+         chunk_size: int = CHUNK_SIZE):
+    if stream:  # the data is never fully loaded in memory
+        train_stream(get_incremental_model(), DATA_FILEPATH, chunk_size)
+        return
 
-def main(optimize: bool = False):
     data = load_raw_data()
-    model = get_model()
-    train(model, data, optimize=optimize)
+    if parent_id is not None:
+        retrain(parent_id, data, n_jobs=n_jobs)
+        return
+
+    model = use_feature_store(get_model(), DATA_FILEPATH)
+    train(model, data, optimize=optimize, n_jobs=n_jobs, search=search,
+          time_budget=time_budget)
 
 
 if __name__ == '__main__':
+    configure_logging()
     main()
@@ -2,8 +2,9 @@ from logging import getLogger
 from pathlib import Path
 from typing import Union
 
-from .pipeline import pipeline, PARAM_GRID
-from ..utils import write_binary_data_to_file, serialize, SklearnEstimator
+from .pipeline import (pipeline, incremental_pipeline, PARAM_GRID,
+                       HALVING_PARAM_GRID, HALVING_PARAMS)
+from ..utils import write_object_to_file, SklearnEstimator
 
 logger = getLogger(__name__)
 
@@ -12,10 +13,17 @@ def get_model() -> SklearnEstimator:
     return pipeline
 
 
-def get_param_grid() -> dict:
-    return PARAM_GRID
+def get_incremental_model() -> SklearnEstimator:
+    return incremental_pipeline
+
+
+def get_param_grid(search: str = 'grid') -> dict:
+    return dict(HALVING_PARAM_GRID if search == 'halving' else PARAM_GRID)
+
+
+def get_halving_params() -> dict:
+    return dict(HALVING_PARAMS)
 
 
 def save_model(model: SklearnEstimator, filepath: Union[Path, str]) -> None:
-    data = serialize(model)
-    write_binary_data_to_file(data, filepath)
+    write_object_to_file(model, filepath)
@@ -0,0 +1,43 @@
+"""
+Allocation of CPU cores for training
+"""
+import os
+from typing import Optional, Tuple
+
+from sklearn.pipeline import Pipeline
+
+from ..utils import SklearnEstimator
+
+
+def allocate_jobs(n_jobs: int, n_tasks: int) -> Tuple[int, int]:
+    """Split `n_jobs` cores between independent tasks and each task's fit.
+
+    Tasks (eg. CV folds times grid search candidates) run in parallel
+    processes first, since they don't need any synchronization. Cores left
+    over are given to each task's estimator (eg. to build trees in parallel),
+    so that the total number of busy cores never exceeds `n_jobs`.
+
+    Return the number of parallel tasks and the number of jobs per task.
+    Negative values of `n_jobs` count from the number of CPUs, as in joblib
+    (eg. -1 for all of them).
+    """
+    if n_jobs < 0:
+        n_jobs = max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    outer_jobs = max(1, min(n_jobs, n_tasks))
+    inner_jobs = max(1, n_jobs // outer_jobs)
+    return outer_jobs, inner_jobs
+
+
+def set_estimator_jobs(estimator: SklearnEstimator,
+                       n_jobs: Optional[int]) -> Optional[int]:
+    """Set `n_jobs` of a (pipeline's final) estimator, return its old value.
+
+    Nothing is done if the estimator doesn't support parallelism.
+    """
+    if isinstance(estimator, Pipeline):
+        estimator = estimator.steps[-1][1]
+    if 'n_jobs' not in estimator.get_params(deep=False):
+        return None
+    previous = estimator.n_jobs
+    estimator.set_params(n_jobs=n_jobs)
+    return previous
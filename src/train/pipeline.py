@@ -1,7 +1,10 @@
 """Pipeline
 """
+from sklearn.base import clone
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.pipeline import Pipeline, FeatureUnion
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
 
 from .features import features_generator
 
@@ -16,9 +19,47 @@ PARAM_GRID = {
     'estimator__max_depth': [10, 20],
 }
 
+# Successive halving (see `src.train.halving`) evaluates more candidates for
+# about the cost of a grid search: it needs at least `factor` of them to drop
+# any.
+HALVING_PARAM_GRID = {
+    'estimator__max_depth': [5, 10, 20, None],
+    'estimator__min_samples_leaf': [1, 5, 10],
+}
+
+# Budget of the successive halving search: candidates first get
+# `min_resources` training samples, and only the best `1 / factor` of them go
+# to the next round, with `factor` times more samples, up to `max_resources`.
+# Use `'resource': 'estimator__n_estimators'` to budget the number of trees
+# instead. Rounds stop early rather than exceed `time_budget` seconds (no
+# limit if None, see `--time-budget`).
+HALVING_PARAMS = {
+    'resource': 'n_samples',
+    'factor': 3,
+    'min_resources': 'exhaust',
+    'max_resources': 'auto',
+    'time_budget': None,
+}
+
 estimator = RandomForestClassifier(**RF_PARAMS)
 
 pipeline = Pipeline([
     ('features', features_generator),
     ('estimator', estimator)
 ])
+
+# Out-of-core training (see `src.train.stream`) fits the scaler and the
+# estimator chunk by chunk, so they must support incremental fitting (ie.
+# `partial_fit`). SGD is sensitive to the scale of the features.
+SGD_PARAMS = {
+    'loss': 'log_loss',
+    'alpha': 1e-1,
+    'average': True,
+    'random_state': SEED
+}
+
+incremental_pipeline = Pipeline([
+    ('features', clone(features_generator)),
+    ('scaler', StandardScaler()),
+    ('estimator', SGDClassifier(**SGD_PARAMS))
+])
@@ -0,0 +1,64 @@
+"""
+Bookkeeping of model fits during a training
+"""
+from logging import getLogger
+from typing import Hashable
+from weakref import WeakKeyDictionary
+
+from ..utils import SklearnEstimator
+
+logger = getLogger(__name__)
+
+
+class FitPlanner:
+    """Keep track of the fits done during a training, to skip redundant ones.
+
+    Fits are identified by the estimator object and a key naming the data it
+    was fitted on (eg. 'train'). Fits done elsewhere, eg. by a CV search that
+    refits its best estimator, are recorded with `record`. Estimators are
+    only weakly referenced, so a fit is forgotten along with its estimator.
+
+    Public interface
+    ================
+    Attributes:
+        * `fits_done` (int) - Number of fits actually done
+        * `fits_avoided` (int) - Number of fits skipped, as already done
+        * `report` (dict) - Summary of the above
+
+    Methods:
+        * `fit(estimator, X, y, data)` - Fit, unless already fitted on `data`
+        * `record(n_fits, estimator, data)` - Record fits done elsewhere
+    """
+    def __init__(self):
+        self.fits_done = 0
+        self.fits_avoided = 0
+        self._fitted = WeakKeyDictionary()  # estimator -> data keys
+
+    @property
+    def report(self) -> dict:
+        return {
+            'fits_done': self.fits_done,
+            'fits_avoided': self.fits_avoided
+        }
+
+    def fit(self,
+            estimator: SklearnEstimator,
+            X, y,
+            data: Hashable) -> SklearnEstimator:
+        if data in self._fitted.get(estimator, ()):
+            logger.debug(f"Estimator already fitted on '{data}' data")
+            self.fits_avoided += 1
+            return estimator
+
+        estimator.fit(X, y)
+        self.record(1, estimator, data)
+        return estimator
+
+    def record(self,
+               n_fits: int,
+               estimator: SklearnEstimator = None,
+               data: Hashable = None) -> None:
+        """Record `n_fits` fits, the last one being `estimator` on `data`."""
+        self.fits_done += n_fits
+        if estimator is not None:
+            self._fitted.setdefault(estimator, set()).add(data)
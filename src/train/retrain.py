@@ -0,0 +1,160 @@
+"""
+Incremental retraining of a previous experiment's model
+"""
+from hashlib import sha1
+import json
+from logging import getLogger
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+from pandas import DataFrame
+from pandas.util import hash_pandas_object
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+
+from .dataset import train_test_split, split_labels
+from .log import (MODEL_FILENAME, DATASET_FILENAME, REPORT_FILENAME,
+                  TEST_IDS_FILENAME)
+from .train import evaluate, log_experiment
+from ..schema import build_frame
+from ..utils import (find_experiment_directory, read_binary_data_from_file,
+                     deserialize, SklearnEstimator)
+
+logger = getLogger(__name__)
+
+ID_COLUMN = 'id'
+MIN_NEW_TREES = 1
+
+# Forests that can grow new trees with `warm_start`
+FOREST_CLASSIFIERS = (RandomForestClassifier, ExtraTreesClassifier)
+
+
+def retrain(parent_id: str,
+            data: DataFrame,
+            log: bool = True,
+            n_jobs: int = 1) -> float:
+    """Add trees fitted on new data to the model of a previous experiment.
+
+    Rows of `data` that are not in the parent experiment's dataset (new or
+    updated data points) are used to fit new trees, in proportion to the
+    share of new data. The features are not refitted, so that the existing
+    trees stay valid. The model is then evaluated on the parent's test set,
+    so that both models can be compared. The ids of the test data points are
+    stored with the new experiment, and referenced by its lineage, so that
+    retraining it again keeps evaluating on the same, unseen, data points.
+
+    The returned value is the log loss on the test set.
+    """
+    directory = find_experiment_directory(parent_id)
+    model, parent_dataset, parent_report = _load_experiment(directory)
+    features, forest = model.named_steps['features'], model.steps[-1][1]
+    if not isinstance(forest, FOREST_CLASSIFIERS):
+        raise TypeError('Only forests can be incrementally retrained.')
+
+    test_ids = _test_ids(parent_dataset, parent_report, directory)
+    is_test = parent_dataset[ID_COLUMN].isin(test_ids)
+    X_test, y_test = split_labels(parent_dataset[is_test])
+    n_parent_train = len(parent_dataset) - len(X_test)
+
+    X_new, y_new = split_labels(_new_rows(data, parent_dataset, test_ids))
+    if X_new.empty:
+        raise ValueError('No new data since the parent experiment.')
+    # New trees are fitted on the classes of the new data only: they must be
+    # the same as the classes of the existing trees
+    new_classes, classes = set(y_new), set(forest.classes_)
+    if new_classes != classes:
+        raise ValueError(f'New data must contain exactly the classes of the '
+                         f'model {sorted(classes)}, got '
+                         f'{sorted(new_classes)}: the model must be retrained '
+                         f'from scratch.')
+
+    n_trees = len(forest.estimators_)
+    n_new_trees = max(MIN_NEW_TREES,
+                      round(n_trees * len(X_new) / n_parent_train))
+    logger.info(f'Fitting {n_new_trees} new trees on {len(X_new)} new data '
+                f'points (parent experiment: {directory.name})')
+
+    forest.set_params(warm_start=True, n_estimators=n_trees + n_new_trees,
+                      n_jobs=n_jobs)
+    forest.fit(features.transform(X_new), y_new)
+    forest.set_params(warm_start=False, n_jobs=None)
+
+    test_log_loss = evaluate(model, X_test, y_test)
+    logger.info(f"Log loss on parent's test set: {test_log_loss:.4f} "
+                f"(parent: {parent_report['test_log_loss']:.4f})")
+
+    if log:
+        # Ids are stored in their own file, so the report doesn't grow with
+        # the dataset
+        test_ids = np.asarray(test_ids, dtype=str)
+        lineage = {
+            'parent_id': parent_id,
+            'parent_directory': directory.name,
+            'parent_test_log_loss': parent_report['test_log_loss'],
+            'n_new_data_points': len(X_new),
+            'n_new_trees': n_new_trees,
+            'test_ids_file': TEST_IDS_FILENAME,
+            'test_ids_hash': _hash_ids(test_ids)
+        }
+        log_experiment(model, data, test_log_loss, np.array([]),
+                       details={'lineage': lineage}, test_ids=test_ids)
+
+    return test_log_loss
+
+
+def _load_experiment(directory: Path) -> Tuple[SklearnEstimator, DataFrame,
+                                               dict]:
+    model = deserialize(
+        read_binary_data_from_file(f'{directory}/{MODEL_FILENAME}'))
+    dataset = deserialize(
+        read_binary_data_from_file(f'{directory}/{DATASET_FILENAME}'))
+    with open(f'{directory}/{REPORT_FILENAME}') as fp:
+        report = json.load(fp)
+    return model, dataset, report
+
+
+def _test_ids(parent_dataset: DataFrame,
+              parent_report: dict,
+              directory: Path) -> np.ndarray:
+    """Return the ids of the data points the parent was evaluated on.
+
+    A retrained parent stores them in the file referenced by its lineage (or,
+    for older experiments, in the lineage itself), as its dataset holds the
+    data it was retrained on. Other parents were evaluated on the test split
+    of their dataset.
+    """
+    lineage = parent_report.get('lineage')
+    if lineage is None:
+        X, y = split_labels(parent_dataset)
+        _, X_test, _, _ = train_test_split(X, y)
+        return X_test[ID_COLUMN].to_numpy()
+    if 'test_ids_file' in lineage:
+        test_ids = np.load(directory / lineage['test_ids_file'])
+        if _hash_ids(test_ids) != lineage['test_ids_hash']:
+            raise ValueError(f"The test ids stored in '{directory.name}' "
+                             f"don't match the ones it was evaluated on.")
+        return test_ids.astype(object)
+    if 'test_ids' not in lineage:
+        raise ValueError("The parent experiment doesn't record its test set: "
+                         "retrain its own parent instead.")
+    return np.asarray(lineage['test_ids'], dtype=object)
+
+
+def _hash_ids(ids: np.ndarray) -> str:
+    return sha1(ids.tobytes()).hexdigest()
+
+
+def _new_rows(data: DataFrame,
+              parent_dataset: DataFrame,
+              test_ids: np.ndarray) -> DataFrame:
+    """Return rows of `data` that are not in the parent dataset.
+
+    Updated versions of the parent's test data points are left out, so the
+    test set stays unseen. Rows are compared with the dtypes of the schema,
+    so that a parent logged with other dtypes (eg. float64 numbers) doesn't
+    make every row new.
+    """
+    known = set(hash_pandas_object(build_frame(parent_dataset), index=False))
+    is_new = ~hash_pandas_object(build_frame(data), index=False).isin(known)
+    is_test = data[ID_COLUMN].isin(test_ids)
+    return data[is_new & ~is_test]
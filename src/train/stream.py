@@ -0,0 +1,158 @@
+"""
+Out-of-core training
+
+The raw data file is read by chunks, which are split into training and test
+data points, turned into features, scaled and fed to an estimator that learns
+incrementally (ie. with `partial_fit`). Memory usage depends on the size of
+the chunks, not on the size of the data.
+"""
+from collections import defaultdict
+from logging import getLogger
+from pathlib import Path
+import time
+from typing import Optional, Union
+
+import numpy as np
+from pandas import Series
+from sklearn.metrics import log_loss
+from sklearn.pipeline import Pipeline
+
+from .data import iter_raw_data, DATA_FILEPATH
+from .dataset import split_labels, TEST_SIZE
+from .train import log_experiment
+from ..config import TARGET, ROOT_DIR
+from ..schema import RAW_DATA_DTYPES
+
+logger = getLogger(__name__)
+
+CHUNK_SIZE = 100000  # number of rows read and fitted at once
+
+
+def train_stream(estimator: Pipeline,
+                 filepath: Union[Path, str] = DATA_FILEPATH,
+                 chunk_size: int = CHUNK_SIZE,
+                 log: bool = True) -> float:
+    """Fit a features + scaler + estimator pipeline on a raw data file, one
+    chunk at a time.
+
+    The file is read twice: once to fit the pipeline on the training data
+    points, and once to evaluate it on the test data points. The features are
+    fitted on the first chunk, the scaler and the estimator on every chunk.
+    The estimator is evaluated on each chunk before learning from it
+    ("progressive validation"), in place of the cross-validation of in-memory
+    trainings.
+
+    The returned value is the log loss on the test set.
+    """
+    features, scaler, model = [step for _, step in estimator.steps]
+    classes = np.asarray(RAW_DATA_DTYPES[TARGET].categories, dtype=object)
+    logger.debug(f'Training {model.__class__.__name__} on dataset by chunks '
+                 f'of {chunk_size} rows...')
+
+    start = time.time()
+    split = StratifiedStreamSplit(TEST_SIZE)
+    progressive_loss = LogLoss(classes)
+    n_chunks, n_train = 0, 0
+    for chunk in iter_raw_data(filepath, chunk_size):
+        n_chunks += 1
+        X, y = split_labels(chunk)
+        is_train = ~split.is_test(y)
+        X, y = X[is_train], y[is_train]
+        if X.empty:
+            continue
+
+        if n_train == 0:
+            features.fit(X, y)
+        X = features.transform(X)  # once, for both evaluating and learning
+        if n_train > 0:  # evaluate on the chunk before learning from it
+            progressive_loss.update(
+                y, model.predict_proba(scaler.transform(X)))
+        scaler.partial_fit(X)
+        model.partial_fit(scaler.transform(X), y, classes=classes)
+        n_train += len(y)
+
+    if n_train == 0:
+        raise ValueError(f"No training data found in '{filepath}'.")
+    training_time = time.time() - start
+
+    split = StratifiedStreamSplit(TEST_SIZE)  # same split as above
+    test_loss = LogLoss(classes)
+    for chunk in iter_raw_data(filepath, chunk_size):
+        X, y = split_labels(chunk)
+        is_test = split.is_test(y)
+        if is_test.any():
+            test_loss.update(y[is_test], estimator.predict_proba(X[is_test]))
+
+    if progressive_loss.n_samples:  # there was more than a single chunk
+        logger.info(f'Progressive log loss: {progressive_loss.value:.4f}')
+    logger.info(f'Log loss on test set: {test_loss.value:.4f}')
+    logger.info(f'Training on {n_chunks} chunks completed in '
+                f'{training_time:.2f}s')
+
+    if log:
+        details = {'stream': {
+            'data_filepath': str(Path(filepath).resolve()
+                                 .relative_to(ROOT_DIR)),
+            'chunk_size': chunk_size,
+            'n_chunks': n_chunks,
+            'n_train_samples': n_train,
+            'n_test_samples': test_loss.n_samples,
+            'progressive_log_loss': progressive_loss.value,
+            'training_time': training_time
+        }}
+        # The dataset isn't stored along with the model, as it may not fit
+        # in memory
+        log_experiment(estimator, None, test_loss.value, np.array([]),
+                       details=details)
+
+    return test_loss.value
+
+
+class StratifiedStreamSplit:
+    """Split data points into training and test sets, chunk after chunk.
+
+    Within each class, the k-th data point goes to the test set whenever
+    `k * test_size` reaches a new integer (eg. every 5th data point for a
+    `test_size` of 0.2). Every class is therefore split in the same
+    proportions, whatever the chunks, and the split is the same every time the
+    data is read.
+
+    Public interface
+    ================
+    Attributes:
+        * `test_size` (float) - Proportion of each class in the test set
+        * `counts` (dict) - Number of data points seen so far, by class
+
+    Methods:
+        * `is_test(y)` - Return the boolean mask of the next test data points
+    """
+    def __init__(self, test_size: float):
+        self.test_size = test_size
+        self.counts = defaultdict(int)
+
+    def is_test(self, y: Series) -> np.ndarray:
+        labels = np.asarray(y, dtype=object)
+        mask = np.zeros(len(labels), dtype=bool)
+        for label in np.unique(labels):
+            positions = np.flatnonzero(labels == label)
+            k = self.counts[label] + np.arange(1, len(positions) + 1)
+            mask[positions] = (np.floor(k * self.test_size)
+                               > np.floor((k - 1) * self.test_size))
+            self.counts[label] += len(positions)
+        return mask
+
+
+class LogLoss:
+    """Log loss computed incrementally over batches of predictions."""
+    def __init__(self, classes: np.ndarray):
+        self.classes = classes
+        self.n_samples = 0
+        self._total = 0.
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._total / self.n_samples if self.n_samples else None
+
+    def update(self, y: Series, proba: np.ndarray) -> None:
+        self._total += log_loss(y, proba, labels=self.classes, normalize=False)
+        self.n_samples += len(y)
@@ -1,81 +1,258 @@
+from contextlib import contextmanager
 from logging import getLogger
-from typing import Tuple
+import time
+from typing import Optional, Tuple
 
+from joblib import Memory
 import numpy as np
-import pandas as pd
 from pandas import DataFrame
-from sklearn.model_selection import cross_val_score, GridSearchCV
+from sklearn.base import clone
+from sklearn.model_selection import ParameterGrid
 from sklearn.metrics import log_loss
+from sklearn.pipeline import Pipeline
 
 from .dataset import train_test_split, split_labels
+from .evaluation import evaluate_candidates
+from .features.store import features_code_version, unwrap
 from .fold import gen_kfold
+from .halving import successive_halving
 from .log import TrainingLogger
-from .model import get_param_grid
+from .model import get_param_grid, get_halving_params
+from .parallel import allocate_jobs, set_estimator_jobs
+from .planner import FitPlanner
+from ..cache import CACHE
+from ..config import TRANSFORMERS_CACHE_BYTES_LIMIT
 from ..utils import SklearnEstimator
 
 logger = getLogger(__name__)
 
+# joblib's stores, one entry of the 'transformers' namespace per version of
+# the features' code (see `transformers_cache_name`)
+TRANSFORMERS_CACHE_NAME = 'joblib'
+
 
 SCORING = 'neg_log_loss'
+SEARCH_STRATEGIES = ['grid', 'halving']
 
 
 def train(estimator: SklearnEstimator,
           data: DataFrame,
           optimize: bool = False,
-          log: bool = True) -> Tuple[float, np.ndarray]:
+          log: bool = True,
+          n_jobs: int = 1,
+          search: str = 'grid',
+          time_budget: Optional[float] = None) -> Tuple[float, np.ndarray]:
     logger.debug(f'Training {estimator.__class__.__name__} on dataset...')
 
     X, y = split_labels(data)
     X_train, X_test, y_train, y_test = train_test_split(X, y)
 
-    if optimize:
-        best_estimator, cv_log_losses = hyperopt(
-            estimator, X_train, y_train, param_grid=get_param_grid()
-        )
-    else:
-        cv_log_losses = cross_validate(estimator, X_train, y_train)
-        best_estimator = estimator
+    param_grid = get_param_grid(search) if optimize else {}
+    n_tasks = gen_kfold().get_n_splits() * len(ParameterGrid(param_grid))
+    outer_jobs, inner_jobs = allocate_jobs(n_jobs, n_tasks)
+    logger.info(f'Running {outer_jobs} CV tasks in parallel, '
+                f'with {inner_jobs} jobs each')
+
+    planner = FitPlanner()
+    details = {}
+    cv_predictions = None
+    default_jobs = set_estimator_jobs(estimator, inner_jobs)
+    try:
+        start = time.time()
+        if optimize:
+            best_estimator, cv_log_losses, cv_predictions, search_summary = \
+                hyperopt(estimator, X_train, y_train, param_grid=param_grid,
+                         n_jobs=outer_jobs, search=search,
+                         time_budget=time_budget)
+            tasks_time = search_summary.pop('tasks_time')
+            wall_time = search_summary.pop('wall_time')
+            # The search already refitted the best one on the training set
+            planner.record(search_summary.pop('n_fits'), best_estimator,
+                           'train')
+            details['hyperopt'] = search_summary
+        else:
+            cv_log_losses, cv_predictions, tasks_time = cross_validate(
+                estimator, X_train, y_train, n_jobs=outer_jobs)
+            planner.record(len(cv_log_losses))
+            best_estimator = estimator
+            wall_time = time.time() - start
+        efficiency = tasks_time / (wall_time * outer_jobs)
 
-    best_estimator.fit(X_train, y_train)
-    test_log_loss = evaluate(best_estimator, X_test, y_test)
+        # There's a single fit left (if any), which can use all the cores
+        set_estimator_jobs(best_estimator, n_jobs)
+        planner.fit(best_estimator, X_train, y_train, data='train')
+        test_log_loss = evaluate(best_estimator, X_test, y_test)
+        # Training may use the feature store, but not the final model
+        best_estimator = unwrap(best_estimator)
+        set_estimator_jobs(best_estimator, default_jobs)
+    finally:
+        # `estimator` is the caller's, whichever estimator was the best
+        set_estimator_jobs(estimator, default_jobs)
 
     logger.info(f'Mean log loss on CV: {cv_log_losses.mean():.4f}')
     logger.info(f'Std log loss on CV: {np.std(cv_log_losses):.4f}')
     logger.info(f'Log loss on test set: {test_log_loss:.4f}')
+    logger.info(f'CV completed in {wall_time:.2f}s '
+                f'({efficiency:.0%} parallel efficiency)')
+    logger.info(f'{planner.fits_done} fits done, '
+                f'{planner.fits_avoided} avoided')
 
     if log:
-        log_experiment(best_estimator, data, test_log_loss, cv_log_losses)
+        details['parallelism'] = {
+            'n_jobs': n_jobs,
+            'outer_jobs': outer_jobs,
+            'inner_jobs': inner_jobs,
+            # Time spent on CV folds, without the refit of a search
+            'cv_wall_time': wall_time,
+            # Sum of the durations of the CV tasks
+            'cv_tasks_time': tasks_time,
+            # Share of `cv_wall_time` the parallel tasks were busy: 1 means
+            # `outer_jobs` tasks ran at all times
+            'cv_parallel_efficiency': efficiency
+        }
+        details['fits'] = planner.report
+        log_experiment(best_estimator, data, test_log_loss, cv_log_losses,
+                       details=details, cv_predictions=cv_predictions)
 
     return test_log_loss, cv_log_losses
 
 
 def cross_validate(estimator: SklearnEstimator,
                    X: DataFrame,
-                   y: DataFrame) -> np.ndarray:
-    return -cross_val_score(estimator, X, y,
-                            scoring=SCORING, cv=gen_kfold())
+                   y: DataFrame,
+                   n_jobs: int = 1) -> Tuple[np.ndarray, DataFrame, float]:
+    """Evaluate an estimator on CV folds.
+
+    Return the losses on each fold, the out-of-fold predicted probabilities
+    (indexed like `X`, one column per class), and the total time spent on
+    folds.
+    """
+    with memoize_transformers(estimator):
+        scores, predictions, tasks_times = evaluate_candidates(
+            estimator, X, y, [{}], scoring=SCORING, cv=gen_kfold(),
+            n_jobs=n_jobs)
+    return -scores[0], predictions[0], tasks_times[0]
 
 
 def hyperopt(estimator: SklearnEstimator,
              X: DataFrame,
              y: DataFrame,
-             param_grid: dict) -> Tuple[SklearnEstimator, np.ndarray]:
-    logger.info(
-        'Performing hyperparameter optimization with GridSearchCV...')
+             param_grid: dict,
+             n_jobs: int = 1,
+             search: str = 'grid',
+             time_budget: Optional[float] = None
+             ) -> Tuple[SklearnEstimator, np.ndarray, DataFrame, dict]:
+    """Search the best hyperparameters in `param_grid`.
+
+    With the 'grid' search, every candidate is evaluated on all the training
+    data. With the 'halving' search, candidates are evaluated on a small
+    budget first (see `HALVING_PARAMS`) and only the best ones get more,
+    within `time_budget` seconds if any (see `successive_halving`).
+
+    Return the best estimator, its losses on CV folds, its out-of-fold
+    predicted probabilities, and a summary of the search, including the total
+    time spent on folds (`tasks_time`), the time the search took without the
+    refit (`wall_time`) and the number of fits (`n_fits`). The best estimator
+    is refitted on all data, in `refit_time` seconds.
+    """
+    if search == 'grid':
+        logger.info('Performing hyperparameter optimization by grid search...')
+        candidates = list(ParameterGrid(param_grid))
+        start = time.time()
+        with memoize_transformers(estimator):
+            scores, predictions, tasks_times = evaluate_candidates(
+                estimator, X, y, candidates, scoring=SCORING, cv=gen_kfold(),
+                n_jobs=n_jobs)
+            wall_time = time.time() - start
+            # The first of the best candidates, as `GridSearchCV` picks it
+            best = int(np.argmax(scores.mean(axis=1)))
+            best_params = candidates[best]
+            best_estimator = clone(estimator).set_params(**best_params)
+            start = time.time()
+            best_estimator.fit(X, y)
+            refit_time = time.time() - start
+        if isinstance(best_estimator, Pipeline):
+            best_estimator.set_params(memory=None)
+
+        best_cv_losses, cv_predictions = -scores[best], predictions[best]
+        summary = {
+            'n_fits': scores.size + 1,  # +1 for the refit
+            'tasks_time': float(tasks_times.sum()),
+            'wall_time': wall_time,
+        }
+    elif search == 'halving':
+        logger.info('Performing hyperparameter optimization by successive '
+                    'halving...')
+        halving_params = get_halving_params()
+        if time_budget is not None:
+            halving_params['time_budget'] = time_budget
+        start = time.time()
+        with memoize_transformers(estimator):
+            best_params, best_cv_losses, cv_predictions, rounds = \
+                successive_halving(estimator, X, y, param_grid,
+                                   scoring=SCORING, cv=gen_kfold(),
+                                   n_jobs=n_jobs, **halving_params)
+            wall_time = time.time() - start
+            best_estimator = clone(estimator).set_params(**best_params)
+            start = time.time()
+            best_estimator.fit(X, y)
+            refit_time = time.time() - start
+        if isinstance(best_estimator, Pipeline):
+            best_estimator.set_params(memory=None)
+
+        summary = {
+            'n_fits': sum(r['n_fits'] for r in rounds) + 1,
+            'tasks_time': sum(r.pop('tasks_time') for r in rounds),
+            'wall_time': wall_time,
+            'time_budget': halving_params.get('time_budget'),
+            'rounds': rounds,
+        }
+    else:
+        raise ValueError(f"Unknown search strategy '{search}'. "
+                         f"Must be one of {SEARCH_STRATEGIES}.")
+
+    logger.info(f'Best loss: {best_cv_losses.mean():.4f}')
+    return best_estimator, best_cv_losses, cv_predictions, {
+        'search': search, 'best_params': best_params,
+        'refit_time': refit_time, **summary}
+
+
+@contextmanager
+def memoize_transformers(estimator: SklearnEstimator):
+    """Cache the fitted transformers of a pipeline on disk.
 
-    gs = GridSearchCV(estimator, param_grid, scoring=SCORING, cv=gen_kfold())
-    gs.fit(X, y)
+    Within this context, fitting the pipeline's transformers again with the
+    same parameters on the same data (eg. the same fold for several grid
+    search candidates) loads them from the cache instead. They are kept across
+    trainings in the 'transformers' namespace of the cache, whose least
+    recently used transformers are evicted beyond
+    `TRANSFORMERS_CACHE_BYTES_LIMIT`. Nothing is memoized when the cache is
+    disabled.
 
-    best_loss = -gs.best_score_
-    logger.info(f'Best loss: {best_loss:.4f}')
+    joblib keys fitted transformers on their pickled parameters and data,
+    which don't change with the code of their classes: transformers fitted by
+    another version of the features' code are kept in another store, that
+    is never read again and thus evicted first.
+    """
+    if not isinstance(estimator, Pipeline) or not CACHE.enabled:
+        yield
+        return
 
-    cv_results = pd.DataFrame(gs.cv_results_).sort_values(by='rank_test_score')
+    name = transformers_cache_name()
+    memory = Memory(CACHE.path('transformers', name), verbose=0)
+    estimator.set_params(memory=memory)
+    try:
+        yield
+    finally:
+        estimator.set_params(memory=None)
+        memory.reduce_size(bytes_limit=TRANSFORMERS_CACHE_BYTES_LIMIT)
+        CACHE.mark_as_used('transformers', name)
+        CACHE.refresh('transformers', name)
+        CACHE.trim()
 
-    regex_log_loss_cv_cols = '^split[0-9]+_test_score'
-    best_cv_losses = -cv_results.loc[gs.best_index_] \
-        .filter(regex=regex_log_loss_cv_cols)
 
-    return gs.best_estimator_, best_cv_losses
+def transformers_cache_name() -> str:
+    return f'{TRANSFORMERS_CACHE_NAME}-{features_code_version()[:16]}'
 
 
 def evaluate(estimator: SklearnEstimator, X: DataFrame, y: DataFrame) -> float:
@@ -85,9 +262,14 @@ def evaluate(estimator: SklearnEstimator, X: DataFrame, y: DataFrame) -> float:
 
 
 def log_experiment(estimator: SklearnEstimator,
-                   dataset: DataFrame,
+                   dataset: Optional[DataFrame],
                    test_log_loss: float,
-                   cv_log_losses: np.ndarray) -> None:
+                   cv_log_losses: np.ndarray,
+                   details: Optional[dict] = None,
+                   cv_predictions: Optional[DataFrame] = None,
+                   test_ids: Optional[np.ndarray] = None) -> None:
     """Record experiment data into a dedicated directory."""
-    log = TrainingLogger(estimator, dataset, test_log_loss, cv_log_losses)
+    log = TrainingLogger(estimator, dataset, test_log_loss, cv_log_losses,
+                         details=details, cv_predictions=cv_predictions,
+                         test_ids=test_ids)
     log.save()
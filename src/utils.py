@@ -1,41 +1,100 @@
+from contextlib import contextmanager
 from hashlib import sha1
-from os.path import getmtime as get_modification_timestamp
+import os
 from pathlib import Path
 import pickle
 import time
-from typing import Union, Any
+from typing import (Any, BinaryIO, Callable, Iterator, Optional, Union,
+                    TYPE_CHECKING)
 
-from sklearn.base import BaseEstimator
-from sklearn.pipeline import Pipeline
+from . import serialization
+from .config import OUTPUT_DIR
 
-from .config import CACHE_MAX_AGE, OUTPUT_DIR
+if TYPE_CHECKING:  # sklearn is only imported by the systems that use it
+    from sklearn.base import BaseEstimator
+    from sklearn.pipeline import Pipeline
 
-SklearnEstimator = Union[Pipeline, BaseEstimator]  # used in type annotations
+SklearnEstimator = Union['Pipeline', 'BaseEstimator']  # used in annotations
 
 
 # NOTE
 # ====
-# This module uses Pickle to dump/load Python objects to/from files or memory.
+# This module dumps/loads Python objects to/from files or memory with the
+# serializer selected by `config.SERIALIZER` (see `src.serialization`).
 #
-# On very large Numpy arrays, using Joblib can be more efficient than Pickle,
-# (especially for Python < 3.8) but, this is *not* a general rule. On simple
-# data structures, Joblib can be much slower than Pickle.
+# By default, large arrays (eg. the trees of a forest) are stored as raw
+# buffers besides the Pickle stream. Objects loaded from a file get arrays
+# that are memory-mapped on it, rather than copies: loading is almost
+# instantaneous, and processes loading the same file share its pages.
 #
-# Ref: Olivier Grisel @ https://stackoverflow.com/a/12617603
-#
-# We use Pickle by default, as it enables extra features such as in-memory I/O
-# (as opposed to file-only). An actual performance test could be  done to
-# check if Joblib brings a signficant performance jump.
+# Files are therefore never rewritten in place (which would corrupt them for
+# the processes that mapped them), but replaced with a new file.
 # ====
 
 
 def write_binary_data_to_file(data: bytes, filepath: Union[Path, str]) -> None:
-    directory = Path(filepath).parent
+    with open_for_writing(filepath) as fp:
+        fp.write(data)
+
+
+@contextmanager
+def open_for_writing(filepath: Union[Path, str]) -> Iterator[BinaryIO]:
+    """Open a binary file that replaces `filepath` once completely written.
+
+    Until then, readers of `filepath` (if any) keep reading the previous file.
+    """
+    filepath = Path(filepath)
+    directory = filepath.parent
     if not directory.exists():
         directory.mkdir(parents=True)  # silently create all required folders
 
-    with open(filepath, 'wb') as fp:
-        fp.write(data)
+    temporary_filepath = directory / f'.{filepath.name}.{os.getpid()}.tmp'
+    try:
+        with open(temporary_filepath, 'wb') as fp:
+            yield fp
+        os.replace(temporary_filepath, filepath)
+    finally:
+        if temporary_filepath.exists():  # the file could not be written
+            temporary_filepath.unlink()
+
+
+@contextmanager
+def file_lock(filepath: Union[Path, str],
+              timeout: Optional[float] = None,
+              on_wait: Optional[Callable[[], None]] = None) -> Iterator[None]:
+    """Hold an exclusive lock on `filepath`, shared by all processes.
+
+    A `TimeoutError` is raised if the lock can't be acquired within `timeout`
+    seconds (None means waiting forever). `on_wait` is called once, if the
+    lock is held by another process.
+
+    The lock is released by the OS when its holder exits, even if the process
+    is killed, so a dead process never keeps the others waiting.
+    """
+    # Imported here since `fcntl` is only available on UNIX platforms
+    import fcntl
+
+    filepath = Path(filepath)
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    with open(filepath, 'a') as fp:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waiting = False
+        while True:
+            try:
+                fcntl.flock(fp, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError(f"Could not lock '{filepath}' within "
+                                       f"{timeout}s.") from None
+                if not waiting and on_wait is not None:
+                    on_wait()
+                waiting = True
+                time.sleep(0.1)
+        try:
+            yield
+        finally:
+            fcntl.flock(fp, fcntl.LOCK_UN)
 
 
 def read_binary_data_from_file(filepath: Union[Path, str]) -> bytes:
@@ -43,42 +102,42 @@ def read_binary_data_from_file(filepath: Union[Path, str]) -> bytes:
         return fp.read()
 
 
-def hasher(obj: Any) -> str:
-    """Given any object, return an hexa string that uniquely identifies it."""
-    # sha1 has a lower probability of collision and take approximately the
-    # same amount of time to compute than md5
-    return sha1(serialize(obj)).hexdigest()
+def write_object_to_file(obj: Any, filepath: Union[Path, str]) -> int:
+    """Serialize an object into a file, and return the number of bytes."""
+    with open_for_writing(filepath) as fp:
+        return serialization.dump(obj, fp)
 
 
-def serialize(obj: Any) -> bytes:
-    return pickle.dumps(obj)
-
+def read_object_from_file(filepath: Union[Path, str]) -> Any:
+    """Load an object from a file, memory-mapping its buffers (if any)."""
+    with open(filepath, 'rb') as fp:
+        return serialization.load(fp)
 
-def deserialize(data: bytes) -> Any:
-    return pickle.loads(data)
 
+def hasher(obj: Any) -> str:
+    """Given any object, return an hexa string that uniquely identifies it."""
+    # sha1 has a lower probability of collision and take approximately the
+    # same amount of time to compute than md5. Plain Pickle is used, so that
+    # IDs don't depend on the serializer in use.
+    return sha1(pickle.dumps(obj)).hexdigest()
 
-def store_in_cache(obj: Any, filepath: Union[Path, str]) -> int:
-    """Pickle any kind of Python object, and store in a file.
 
-    The returned value is the number of bytes that were stored.
-    """
-    data = serialize(obj)
-    write_binary_data_to_file(data, filepath)
-    return len(data)
+def hash_file(filepath: Union[Path, str]) -> str:
+    """Return an hexa string that uniquely identifies a file's content."""
+    digest = sha1()
+    with open(filepath, 'rb') as fp:
+        # Read by blocks, so that large files don't have to fit in memory
+        for block in iter(lambda: fp.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
 
 
-def load_from_cache(filepath: Union[Path, str]) -> Any:
-    """Load a Python object pickled in a file located at `filepath`.
+def serialize(obj: Any) -> bytes:
+    return serialization.dumps(obj)
 
-    This function will raise a `FileNotFoundError` if the cache file doesn't
-    exist. It is the responsibility of the caller to deal with the error.
-    """
-    if cache_has_expired(filepath):
-        remove_file(filepath)
 
-    data = read_binary_data_from_file(filepath)
-    return deserialize(data)
+def deserialize(data: bytes) -> Any:
+    return serialization.loads(data)
 
 
 def remove_file(filepath: Union[Path, str]) -> None:
@@ -87,17 +146,6 @@ def remove_file(filepath: Union[Path, str]) -> None:
         filepath.unlink()
 
 
-def cache_has_expired(filepath: Union[Path, str]) -> bool:
-    """Return True if a cache file has expired, False if still valid."""
-    try:
-        last_modified = get_modification_timestamp(filepath)
-    except FileNotFoundError:
-        return False
-
-    cache_age = time.time() - last_modified
-    return cache_age > CACHE_MAX_AGE
-
-
 def find_experiment_directory(model_id: str) -> Path:
     """Return the path of an experiment directory given a model's unique ID."""
     for file in OUTPUT_DIR.rglob('*'):
@@ -0,0 +1,30 @@
+import os
+
+import pytest
+
+# Settings read by `src.config` on import: S3 is replaced by a local stand-in
+# in tests (see the `s3` fixture), whatever the environment or `.env` file
+os.environ.update({
+    'AWS_ACCESS_KEY_ID': 'testing',
+    'AWS_SECRET_ACCESS_KEY': 'testing',
+    'AWS_DEFAULT_REGION': 'us-east-1',
+    'AWS_S3_BUCKET_NAME': 'test-bucket',
+    'USERNAME': 'tester',
+})
+os.environ.pop('AWS_S3_ENDPOINT_URL', None)
+
+
+@pytest.fixture
+def s3():
+    """A local S3 stand-in, with an empty default bucket."""
+    # Imported here rather than skipped if missing: it is in requirements.txt
+    import moto
+
+    from src import aws
+
+    aws._CLIENTS.clear()
+    with moto.mock_aws():
+        client = aws.get_s3_client()
+        client.create_bucket(Bucket=aws.AWS_S3_BUCKET_NAME)
+        yield client
+    aws._CLIENTS.clear()
@@ -0,0 +1,50 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.serve import app as app_module
+from src.serve.app import NDJSON_MIMETYPE, PREDICT_STREAM_ROUTE, app
+from src.serve.parser import EXPECTED_KEYS, ILL_FORMED_LINE
+from src.train.data import DATA_FILEPATH
+
+pytestmark = pytest.mark.skipif(not DATA_FILEPATH.exists(),
+                                reason='raw data file not available')
+
+
+@pytest.fixture
+def lines():
+    data = pd.read_csv(DATA_FILEPATH, nrows=10)[EXPECTED_KEYS]
+    return [json.dumps(d) for d in json.loads(data.to_json(orient='records'))]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Test client of the app, predicting the rally of each data point."""
+    monkeypatch.setattr(app_module, 'STREAM_CHUNK_SIZE', 4)
+    monkeypatch.setattr(app_module, 'predict',
+                        lambda feed: feed['rally'].to_numpy(dtype=np.int64))
+    return app.test_client()
+
+
+def post_stream(client, lines):
+    response = client.post(PREDICT_STREAM_ROUTE, data='\n'.join(lines) + '\n',
+                           content_type=NDJSON_MIMETYPE)
+    assert response.status_code == 200
+    assert response.mimetype == NDJSON_MIMETYPE
+    body = response.get_data(as_text=True)
+    return [json.loads(line) for line in body.splitlines()]
+
+
+def test_predict_stream(client, lines):
+    expected = [int(json.loads(line)['rally']) for line in lines]
+    assert post_stream(client, lines) == expected
+
+
+def test_predict_stream_reports_the_invalid_line_last(client, lines):
+    expected = [int(json.loads(line)['rally']) for line in lines[:6]]
+    lines[6] = 'not json'
+    results = post_stream(client, lines)
+    assert results[:-1] == expected
+    assert results[-1] == {'message': ILL_FORMED_LINE.format(7)}
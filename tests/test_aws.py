@@ -0,0 +1,37 @@
+import os
+
+import pytest
+
+from src import aws
+
+SIZE = 20 * 1024 ** 2  # sent as a multipart upload, by parts of 8 MB
+
+
+def test_upload_and_download_file(s3, tmp_path):
+    data = os.urandom(SIZE)
+    (tmp_path / 'model.pkl').write_bytes(data)
+
+    stats = aws.upload_file_to_s3(tmp_path / 'model.pkl', 'model.pkl')
+    assert stats['bytes'] == SIZE
+    # Multipart uploads have an ETag of the form '"<hash>-<number of parts>"'
+    etag = aws.get_s3_object_version('model.pkl')
+    assert etag.strip('"').endswith('-3')
+
+    stats = aws.download_file_from_s3('model.pkl', tmp_path / 'copy.pkl')
+    assert stats['bytes'] == SIZE
+    assert (tmp_path / 'copy.pkl').read_bytes() == data
+
+
+def test_object_version_changes_with_content(s3):
+    s3.put_object(Bucket=aws.AWS_S3_BUCKET_NAME, Key='model.pkl',
+                  Body=b'model 1')
+    version = aws.get_s3_object_version('model.pkl')
+    s3.put_object(Bucket=aws.AWS_S3_BUCKET_NAME, Key='model.pkl',
+                  Body=b'model 2')
+    assert aws.get_s3_object_version('model.pkl') != version
+
+
+def test_download_failure_leaves_no_file(s3, tmp_path):
+    with pytest.raises(Exception):
+        aws.download_file_from_s3('missing.pkl', tmp_path / 'model.pkl')
+    assert list(tmp_path.iterdir()) == []
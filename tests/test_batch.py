@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+
+import pandas as pd
+from pandas.testing import assert_frame_equal
+import pytest
+
+from src.predict import batch
+from src.predict.batch import (ID_COLUMN, PREDICTION_COLUMN, predict_file,
+                               read_chunks)
+from src.schema import COLUMN_DTYPES
+from src.train.data import DATA_FILEPATH
+
+pytestmark = pytest.mark.skipif(not DATA_FILEPATH.exists(),
+                                reason='raw data file not available')
+
+
+@pytest.fixture
+def data():
+    return pd.read_csv(DATA_FILEPATH, nrows=10)
+
+
+def test_read_chunks(data, tmp_path):
+    data.to_csv(tmp_path / 'data.csv', index=False)
+    chunks = list(read_chunks(tmp_path / 'data.csv', chunk_size=4))
+    assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+    # Columns that are not part of the data points (eg. the label) are dropped
+    assert all(list(chunk.columns) == list(COLUMN_DTYPES) for chunk in chunks)
+
+
+def test_read_chunks_without_id(data, tmp_path):
+    data.drop(columns=ID_COLUMN).to_csv(tmp_path / 'data.csv', index=False)
+    chunk, = read_chunks(tmp_path / 'data.csv')
+    assert ID_COLUMN not in chunk.columns
+
+
+@pytest.mark.parametrize('column, value, message', [
+    ('speed', None, 'Missing values'),
+    ('hitpoint', None, 'Found missing values'),
+    ('speed', 'fast', 'could not convert'),
+    ('hitpoint', 'X', 'unknown categories'),
+])
+def test_read_chunks_rejects_invalid_rows(data, tmp_path, column, value,
+                                          message):
+    data[column] = data[column].astype(object)
+    data.loc[5, column] = value
+    data.to_csv(tmp_path / 'data.csv', index=False)
+    with pytest.raises(ValueError, match=f'from row 4: .*{message}'):
+        list(read_chunks(tmp_path / 'data.csv', chunk_size=4))
+
+
+def test_read_chunks_rejects_missing_columns(data, tmp_path):
+    data.drop(columns='speed').to_csv(tmp_path / 'data.csv', index=False)
+    with pytest.raises(ValueError, match='Missing columns'):
+        list(read_chunks(tmp_path / 'data.csv'))
+
+
+class RallyModel:
+    """Predict the rally of each data point."""
+    def predict(self, X):
+        return X['rally'].to_numpy(dtype=int)
+
+
+@pytest.fixture
+def stub_model(monkeypatch):
+    # Worker processes are forked, so they get the stub too
+    monkeypatch.setattr(batch, 'MODEL_HOLDER',
+                        SimpleNamespace(get=lambda: RallyModel()))
+
+
+def expected_predictions(data):
+    return pd.DataFrame({ID_COLUMN: data[ID_COLUMN],
+                         PREDICTION_COLUMN: data['rally']})
+
+
+@pytest.mark.parametrize('n_jobs', [1, 3])
+def test_predict_file_keeps_the_order_and_ids(data, tmp_path, stub_model,
+                                              n_jobs):
+    data.to_csv(tmp_path / 'data.csv', index=False)
+    n_rows = predict_file(tmp_path / 'data.csv', tmp_path / 'predictions.csv',
+                          n_jobs=n_jobs, chunk_size=3)
+
+    assert n_rows == len(data)
+    predictions = pd.read_csv(tmp_path / 'predictions.csv')
+    assert_frame_equal(predictions, expected_predictions(data))
+
+
+def test_predict_file_without_id(data, tmp_path, stub_model):
+    data.drop(columns=ID_COLUMN).to_csv(tmp_path / 'data.csv', index=False)
+    predict_file(tmp_path / 'data.csv', tmp_path / 'predictions.csv',
+                 n_jobs=1, chunk_size=3)
+    predictions = pd.read_csv(tmp_path / 'predictions.csv')
+    assert list(predictions.columns) == [PREDICTION_COLUMN]
+
+
+def test_predict_parquet_file(data, tmp_path, stub_model):
+    pytest.importorskip('pyarrow')  # optional, only needed for Parquet
+    data.to_parquet(tmp_path / 'data.parquet', index=False)
+    predict_file(tmp_path / 'data.parquet', tmp_path / 'predictions.parquet',
+                 n_jobs=2, chunk_size=3)
+    predictions = pd.read_parquet(tmp_path / 'predictions.parquet')
+    assert_frame_equal(predictions, expected_predictions(data))
@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+
+import pandas as pd
+import pytest
+
+from src.serve.batcher import MicroBatcher
+
+
+class StubModel:
+    """Predict the 'x' column, recording the size of each call."""
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, X):
+        self.calls.append(len(X))
+        if (X['x'] < 0).any():
+            raise ValueError('Invalid data point')
+        return X['x'].to_numpy() * 10
+
+
+def feed(i, size=2):
+    return pd.DataFrame({'x': [i * 100 + j for j in range(size)]})
+
+
+def submit_all(batcher, feeds):
+    with ThreadPoolExecutor(len(feeds)) as executor:
+        futures = [executor.submit(batcher.submit, f) for f in feeds]
+    return futures
+
+
+def test_requests_are_grouped_and_split_back_in_order():
+    model = StubModel()
+    # The batch is full once all the requests arrived, long before max_wait
+    batcher = MicroBatcher(model.predict, max_batch_size=16, max_wait=10)
+    feeds = [feed(i) for i in range(8)]
+    futures = submit_all(batcher, feeds)
+
+    assert model.calls == [16]
+    for f, future in zip(feeds, futures):
+        assert future.result().tolist() == (f['x'] * 10).tolist()
+
+
+def test_batch_is_predicted_after_max_wait():
+    model = StubModel()
+    batcher = MicroBatcher(model.predict, max_batch_size=100, max_wait=0.05)
+    assert batcher.submit(feed(1)).tolist() == [1000, 1010]
+    assert model.calls == [2]
+
+
+def test_failed_batch_falls_back_to_each_request():
+    model = StubModel()
+    batcher = MicroBatcher(model.predict, max_batch_size=6, max_wait=10)
+    feeds = [feed(1), feed(-1), feed(2)]
+    futures = submit_all(batcher, feeds)
+
+    assert model.calls == [6, 2, 2, 2]
+    assert futures[0].result().tolist() == [1000, 1010]
+    with pytest.raises(ValueError, match='Invalid data point'):
+        futures[1].result()
+    assert futures[2].result().tolist() == [2000, 2010]
+
+
+def submit_in_child(batcher, results):
+    results.put(batcher.submit(feed(3)).tolist())
+
+
+def test_worker_thread_is_restarted_after_a_fork():
+    model = StubModel()
+    batcher = MicroBatcher(model.predict, max_batch_size=100, max_wait=0.01)
+    batcher.submit(feed(1))  # starts the worker thread of this process
+
+    fork = multiprocessing.get_context('fork')
+    results = fork.Queue()
+    process = fork.Process(target=submit_in_child, args=(batcher, results))
+    process.start()
+    assert results.get(timeout=10) == [3000, 3010]
+    process.join()
+    assert batcher.submit(feed(2)).tolist() == [2000, 2010]
@@ -0,0 +1,74 @@
+import os
+
+from src import cache as cache_module
+from src.cache import Cache
+
+
+def test_entries_are_evicted_least_recently_used_first(tmp_path):
+    cache = Cache(tmp_path, max_bytes=300)  # two entries
+    for i, name in enumerate(['old', 'recent']):
+        cache.store(b'x' * 100, 'datasets', name)
+        os.utime(cache.path('datasets', name), (i, i))
+    cache.load('datasets', 'old', max_age=None)  # marks it as used
+
+    cache.store(b'x' * 100, 'datasets', 'new')
+    assert sorted(p.name for p in (tmp_path / 'datasets').iterdir()) == [
+        'new', 'old']
+    assert cache.stats['namespaces']['datasets']['evictions'] == 1
+
+
+def test_batch_trims_once_and_keeps_written_entries(tmp_path, monkeypatch):
+    cache = Cache(tmp_path, max_bytes=250)
+    cache.store(b'x' * 100, 'datasets', 'old')
+    trims = []
+    trim = cache.trim
+    monkeypatch.setattr(cache, 'trim', lambda **kwargs: trims.append(
+        kwargs) or trim(**kwargs))
+
+    with cache.batch():
+        with cache.batch():
+            for i in range(3):
+                cache.store(b'x' * 100, 'models', f'model/{i}.pkl')
+        assert trims == []
+    assert len(trims) == 1
+    # The batch's entry exceeds the budget on its own, but is kept
+    assert not cache.path('datasets', 'old').exists()
+    assert len(list(cache.path('models', 'model').iterdir())) == 3
+
+
+def test_files_of_an_entry_are_evicted_together(tmp_path):
+    cache = Cache(tmp_path, max_bytes=250)
+    with cache.batch():
+        cache.store(b'x' * 100, 'models', 'model/model.pkl')
+        cache.store(b'v1', 'models', 'model/model.version')
+    os.utime(cache.path('models', 'model'), (0, 0))
+
+    cache.store(b'x' * 200, 'features', 'key')
+    assert not cache.path('models', 'model').exists()
+
+
+def write(cache, size, namespace, name):
+    with cache.open_for_writing(namespace, name) as fp:
+        fp.write(b'x' * size)
+
+
+def test_sizes_are_indexed_rather_than_walked(tmp_path, monkeypatch):
+    write(Cache(tmp_path), 100, 'datasets', 'other')  # on disk already
+    cache = Cache(tmp_path, max_bytes=300)
+    write(cache, 100, 'models', 'model/model.pkl')
+
+    def walk(path):
+        raise AssertionError('the cache was walked again')
+
+    monkeypatch.setattr(cache_module, '_size', walk)
+    write(cache, 50, 'models', 'model/model.version')
+    write(cache, 120, 'models', 'model/model.pkl')  # replaces the file
+    namespaces = cache.stats['namespaces']
+    assert namespaces['models']['bytes'] == 170
+    assert namespaces['models']['entries'] == 1
+    assert namespaces['datasets']['entries'] == 1
+
+    write(cache, 50, 'features', 'key')  # evicts 'other'
+    assert not cache.path('datasets', 'other').exists()
+    assert cache.stats['bytes'] == 220
+    assert cache.stats['namespaces']['datasets']['entries'] == 0
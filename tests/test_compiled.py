@@ -0,0 +1,42 @@
+from numpy.testing import assert_allclose, assert_array_equal
+import pytest
+from sklearn.base import clone
+from sklearn.ensemble import ExtraTreesClassifier
+from sklearn.linear_model import SGDClassifier
+
+from src.config import TARGET
+from src.predict.compiled import compile_pipeline
+from src.train.data import DATA_FILEPATH, load_raw_data
+from src.train.pipeline import pipeline
+
+pytestmark = pytest.mark.skipif(not DATA_FILEPATH.exists(),
+                                reason='raw data file not available')
+
+
+@pytest.fixture(scope='module')
+def data():
+    data = load_raw_data(use_cache=False)
+    return data.drop(columns=TARGET), data[TARGET]
+
+
+@pytest.mark.parametrize('estimator', [None, ExtraTreesClassifier(
+    n_estimators=10, random_state=0)])
+def test_compiled_pipeline_matches_original(data, estimator):
+    X, y = data
+    original = clone(pipeline)
+    if estimator is not None:
+        original.set_params(estimator=estimator)
+    original.fit(X[:1500], y[:1500])
+
+    compiled = compile_pipeline(original)
+    X_test = X[1500:]
+    assert_array_equal(compiled.classes_, original.classes_)
+    assert_allclose(compiled.predict_proba(X_test),
+                    original.predict_proba(X_test))
+    assert_array_equal(compiled.predict(X_test), original.predict(X_test))
+
+
+def test_compile_pipeline_rejects_other_estimators():
+    original = clone(pipeline).set_params(estimator=SGDClassifier())
+    with pytest.raises(TypeError, match='forest classifier'):
+        compile_pipeline(original)
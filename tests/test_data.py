@@ -0,0 +1,34 @@
+import os
+import time
+
+import pytest
+
+from src.cache import Cache
+from src.train import data as data_module
+from src.train.data import DATA_FILEPATH, load_raw_data
+
+pytestmark = pytest.mark.skipif(not DATA_FILEPATH.exists(),
+                                reason='raw data file not available')
+
+
+@pytest.mark.parametrize('enabled', [True, False])
+def test_load_raw_data_through_binary_cache(tmp_path, monkeypatch, enabled):
+    monkeypatch.setattr(data_module, 'CACHE', Cache(tmp_path, enabled=enabled))
+    expected = load_raw_data(use_cache=False)
+
+    assert load_raw_data().equals(expected)
+    assert any(tmp_path.rglob('*.npy')) == enabled  # `--disable-cache`
+    assert load_raw_data().equals(expected)
+
+
+def test_binary_cache_does_not_expire(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_module, 'CACHE', Cache(tmp_path))
+    load_raw_data()
+    day_ago = time.time() - 25 * 3600
+    for filepath in tmp_path.rglob('*'):
+        os.utime(filepath, (day_ago, day_ago))
+    monkeypatch.setattr(data_module, '_store_in_binary_cache',
+                        lambda *args: pytest.fail('Converted again'))
+
+    load_raw_data()
+    assert data_module.CACHE.stats['namespaces']['datasets']['hits'] == 1
@@ -0,0 +1,17 @@
+from src.aws import AWS_S3_BUCKET_NAME
+from src.config import COMPILED_MODEL_S3_STORAGE_KEY, MODEL_S3_STORAGE_KEY
+from src.deploy_model import deploy
+from src.train.log import MODEL_FILENAME, REPORT_FILENAME
+
+
+def test_model_without_dataset_replaces_the_compiled_model(s3, tmp_path):
+    s3.put_object(Bucket=AWS_S3_BUCKET_NAME,
+                  Key=COMPILED_MODEL_S3_STORAGE_KEY, Body=b'previous model')
+    (tmp_path / MODEL_FILENAME).write_bytes(b'streamed model')
+    (tmp_path / REPORT_FILENAME).write_text('{}')
+
+    deploy(tmp_path)
+
+    for key in [MODEL_S3_STORAGE_KEY, COMPILED_MODEL_S3_STORAGE_KEY]:
+        body = s3.get_object(Bucket=AWS_S3_BUCKET_NAME, Key=key)['Body']
+        assert body.read() == b'streamed model'
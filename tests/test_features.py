@@ -0,0 +1,82 @@
+"""
+Features against their reference implementations
+
+The reference implementations (see `src.train.features.reference`) are the
+original, DataFrame-based ones that the vectorized kernels replaced.
+"""
+import numpy as np
+from numpy.testing import assert_allclose
+import pytest
+from sklearn.base import clone
+from sklearn.pipeline import FeatureUnion
+from sklearn.preprocessing import FunctionTransformer
+
+from src.train.data import DATA_FILEPATH, load_raw_data
+from src.train.features import (FEATURES_LIST, FEATURES_STORE,
+                                features_generator)
+from src.train.features.base import KernelMixin
+from src.train.features.union import FusedFeatureUnion
+from src.train.features.reference import (reference_generator,
+                                          reference_transformer)
+
+pytestmark = pytest.mark.skipif(not DATA_FILEPATH.exists(),
+                                reason='raw data file not available')
+
+# Kernels compute in the dtype of the columns (float32), while the reference
+# implementations may go through float64 (eg. `distance.euclidean`)
+RTOL = 1e-6
+
+
+@pytest.fixture(scope='module')
+def X():
+    return load_raw_data(use_cache=False)
+
+
+@pytest.mark.parametrize('feature_class', FEATURES_LIST,
+                         ids=[f.name() for f in FEATURES_LIST])
+def test_feature_matches_reference(X, feature_class):
+    feature = feature_class().fit(X)
+    expected = reference_transformer(feature).fit_transform(X)
+
+    assert_allclose(feature.transform(X), expected, rtol=RTOL)
+
+    out = np.empty((len(X), feature.n_outputs))
+    feature.transform_into(X, out)
+    assert_allclose(out, expected, rtol=RTOL)
+
+    # As computed by compiled pipelines, from raw column arrays
+    values = feature.kernel(*[X[c].to_numpy() for c in feature.columns])
+    assert_allclose(values.reshape(len(X), -1), expected, rtol=RTOL)
+
+
+def test_features_generator_matches_reference(X):
+    features = clone(features_generator).fit(X)
+    expected = reference_generator(features).fit_transform(X)
+    assert_allclose(features.transform(X), expected.astype(np.float32),
+                    rtol=RTOL)
+
+
+def test_fused_union_matches_feature_union(X):
+    # Along with a transformer writing no columns in place, a dropped one and
+    # weights
+    transformers = FEATURES_STORE + [
+        ('rally', FunctionTransformer(lambda X: X[['rally']].to_numpy())),
+        ('dropped', 'drop'),
+    ]
+    weights = {'rally': 2., FEATURES_STORE[0][0]: .5}
+    fused = clone(FusedFeatureUnion(transformers,
+                                    transformer_weights=weights)).fit(X)
+    union = clone(FeatureUnion(transformers,
+                               transformer_weights=weights)).fit(X)
+
+    values = fused.transform(X)
+    assert values.dtype == np.float32 and values.flags.c_contiguous
+    assert_allclose(values, union.transform(X).astype(np.float32), rtol=RTOL)
+
+
+def test_kernel_is_abstract():
+    class NoKernel(KernelMixin):
+        columns = ['speed']
+
+    with pytest.raises(TypeError):
+        NoKernel()
@@ -0,0 +1,48 @@
+import pandas as pd
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold
+from sklearn.tree import DecisionTreeClassifier
+
+from src.train.halving import successive_halving
+
+PARAM_GRID = {'max_depth': [1, 2, 4, 8], 'min_samples_leaf': [1, 5, 10]}
+
+
+def make_data():
+    X, y = make_classification(n_samples=900, random_state=0)
+    return pd.DataFrame(X), pd.Series(y)
+
+
+def test_successive_halving():
+    X, y = make_data()
+    best_params, cv_losses, cv_predictions, rounds = successive_halving(
+        DecisionTreeClassifier(random_state=0), X, y, PARAM_GRID,
+        scoring='neg_log_loss', cv=StratifiedKFold(3))
+
+    assert [r['n_candidates'] for r in rounds] == [12, 4, 2]
+    assert [r['n_resources'] for r in rounds] == [100, 300, 900]
+    assert best_params == rounds[-1]['best_params']
+    assert len(cv_losses) == 3
+    assert cv_predictions.index.equals(X.index)  # the last round has all
+
+
+def test_successive_halving_stops_within_time_budget():
+    X, y = make_data()
+    _, _, _, rounds = successive_halving(
+        DecisionTreeClassifier(random_state=0), X, y, PARAM_GRID,
+        scoring='neg_log_loss', cv=StratifiedKFold(3), time_budget=0)
+    assert len(rounds) == 1
+
+
+def test_successive_halving_on_a_parameter_resource():
+    X, y = make_data()
+    best_params, _, _, rounds = successive_halving(
+        RandomForestClassifier(random_state=0), X, y,
+        {'max_depth': [1, 2, 4, 8]}, scoring='neg_log_loss',
+        cv=StratifiedKFold(3), resource='n_estimators', max_resources=9)
+
+    assert [r['n_resources'] for r in rounds] == [3, 9]
+    # The best candidate is refitted with the trees it was evaluated with
+    assert best_params['n_estimators'] == 9
+    assert best_params['max_depth'] in [1, 2, 4, 8]
@@ -0,0 +1,63 @@
+import gc
+import weakref
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.predict import holder
+from src.predict.cache import PredictionCache
+from src.predict.holder import ModelHolder
+
+
+class ConstantModel:
+    def __init__(self, value):
+        self.value = value
+
+    def predict(self, X):
+        return np.full(len(X), self.value)
+
+
+@pytest.fixture
+def model_holder(tmp_path, monkeypatch):
+    model_file = tmp_path / 'model.pkl'
+    model_file.write_bytes(b'model')
+    monkeypatch.setattr(holder, 'MODEL_CACHE_KEY', model_file)
+    loaded = iter(range(100))
+    return ModelHolder(lambda: ConstantModel(next(loaded)))
+
+
+def test_get_with_version(model_holder):
+    model, version = model_holder.get_with_version()
+    assert model is model_holder.get()
+    assert version == model_holder.version == \
+        holder._file_version(holder.MODEL_CACHE_KEY)
+
+
+def test_model_is_reloaded_when_the_cache_file_changes(model_holder):
+    model, version = model_holder.get_with_version()
+    assert model_holder.get_with_version() == (model, version)
+
+    holder.MODEL_CACHE_KEY.write_bytes(b'new model')
+    new_model, new_version = model_holder.get_with_version()
+    assert new_model is not model and new_version != version
+    assert new_version == holder._file_version(holder.MODEL_CACHE_KEY)
+
+
+def test_prediction_cache_is_keyed_on_model_and_version(model_holder):
+    cache = PredictionCache(max_size=10)
+    X = pd.DataFrame({'a': [1., 2.]})
+
+    model, version = model_holder.get_with_version()
+    key = (weakref.ref(model), version)
+    assert cache.predict(model.predict, X, key).tolist() == [0, 0]
+    assert cache.predict(model.predict, X, key).tolist() == [0, 0]
+    assert cache.hits == 2
+
+    holder.MODEL_CACHE_KEY.write_bytes(b'new model')
+    old_model = weakref.ref(model)
+    model, version = model_holder.get_with_version()
+    gc.collect()
+    assert old_model() is None  # not kept alive by the cache
+    key = (weakref.ref(model), version)
+    assert cache.predict(model.predict, X, key).tolist() == [1, 1]
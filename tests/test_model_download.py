@@ -0,0 +1,172 @@
+"""
+Download of the production model into the cache, and its sync with S3
+"""
+from collections import Counter
+import multiprocessing
+import time
+
+import pytest
+
+from src import aws, serialization
+from src.aws import AWS_S3_BUCKET_NAME
+from src.cache import Cache
+from src.predict import utils
+from src.predict.main import get_model
+from src.utils import file_lock
+
+MODEL = {'weights': [1, 2, 3]}
+
+fork = multiprocessing.get_context('fork')
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """An empty cache, where the model is downloaded."""
+    cache = Cache(tmp_path / 'cache')
+    monkeypatch.setattr(utils, 'CACHE', cache)
+    monkeypatch.setattr(utils, 'MODEL_CACHE_KEY',
+                        cache.path('models', utils.MODEL_CACHE_NAME))
+    monkeypatch.setattr(utils, 'MODEL_VERSION_CACHE_KEY',
+                        cache.path('models', utils.MODEL_VERSION_CACHE_NAME))
+    monkeypatch.setattr(utils, 'MODEL_DOWNLOAD_LOCK',
+                        cache.path('models', '.model.lock'))
+    return cache
+
+
+@pytest.fixture
+def downloads(cache, tmp_path, monkeypatch):
+    """Path of a file logging downloads, made by a fake S3 client.
+
+    Each download takes some time, so that concurrent processes overlap.
+    """
+    log = tmp_path / 'downloads.log'
+    log.touch()
+
+    def download_fileobj_from_s3(key, fp):
+        with open(log, 'a') as log_fp:
+            log_fp.write(f'{key}\n')
+        time.sleep(0.5)
+        fp.write(serialization.dumps(MODEL))
+
+    monkeypatch.setattr(utils, 'download_fileobj_from_s3',
+                        download_fileobj_from_s3)
+    return log
+
+
+def download_and_load(results):
+    downloaded = utils.download_model_from_s3('v1')
+    results.put((downloaded, utils.load_model_from_cache()))
+
+
+def test_processes_download_the_model_once(downloads):
+    results = fork.Queue()
+    processes = [fork.Process(target=download_and_load, args=(results,))
+                 for _ in range(2)]
+    for process in processes:
+        process.start()
+    outcomes = [results.get(timeout=10) for _ in processes]
+    for process in processes:
+        process.join()
+
+    assert len(downloads.read_text().splitlines()) == 1
+    # The other process waited, and then loaded the downloaded file
+    assert sorted(downloaded for downloaded, _ in outcomes) == [False, True]
+    assert all(model == MODEL for _, model in outcomes)
+    assert utils.get_cached_model_version() == 'v1'
+
+
+def test_waiting_for_the_download_times_out(downloads, monkeypatch):
+    monkeypatch.setattr(utils, 'MODEL_DOWNLOAD_TIMEOUT', 0.2)
+    with file_lock(utils.MODEL_DOWNLOAD_LOCK):  # held by another download
+        with pytest.raises(TimeoutError):
+            utils.download_model_from_s3('v1')
+    assert downloads.read_text() == ''
+
+
+def die_while_downloading(downloading):
+    def download_fileobj_from_s3(key, fp):
+        fp.write(b'partial model')
+        fp.flush()
+        downloading.set()
+        time.sleep(60)
+
+    utils.download_fileobj_from_s3 = download_fileobj_from_s3
+    utils.download_model_from_s3('v1')
+
+
+def test_files_of_a_dead_download_are_removed(downloads):
+    downloading = fork.Event()
+    process = fork.Process(target=die_while_downloading, args=(downloading,))
+    process.start()
+    assert downloading.wait(timeout=10)
+    process.kill()
+    process.join()
+    directory = utils.MODEL_CACHE_KEY.parent
+    assert len(list(directory.glob('.*.tmp'))) == 1
+
+    assert utils.download_model_from_s3('v1')
+    assert list(directory.glob('.*.tmp')) == []
+    assert utils.load_model_from_cache() == MODEL
+
+
+def test_model_downloaded_by_another_process_is_a_cache_hit(downloads,
+                                                            cache,
+                                                            monkeypatch):
+    utils.download_model_from_s3('v1')  # by another process
+    monkeypatch.setattr(utils, 'get_s3_object_version', lambda key: 'v1')
+
+    assert utils.load_model_from_s3() == MODEL
+    assert len(downloads.read_text().splitlines()) == 1
+    assert cache.stats['namespaces']['models']['hits'] == 1
+
+
+def count_requests(client) -> Counter:
+    """Count the requests made by an S3 client, by operation."""
+    requests = Counter()
+    client.meta.events.register(
+        'before-call.s3.*',
+        lambda model, **kwargs: requests.update([model.name]))
+    return requests
+
+
+def upload_model(s3, model) -> None:
+    s3.put_object(Bucket=AWS_S3_BUCKET_NAME, Key=utils.MODEL_STORAGE_KEY,
+                  Body=serialization.dumps(model))
+
+
+def test_sync_downloads_the_model_only_when_its_version_changes(s3, cache):
+    upload_model(s3, MODEL)
+    requests = count_requests(s3)
+    assert utils.sync_model_cache()
+    assert requests['GetObject'] == 1
+    assert utils.load_model_from_cache() == MODEL
+
+    requests.clear()
+    assert not utils.sync_model_cache()
+    assert requests == {'HeadObject': 1}  # only the version was requested
+
+    upload_model(s3, {'weights': [4, 5, 6]})
+    requests.clear()
+    assert utils.sync_model_cache()
+    assert requests['GetObject'] == 1
+    assert utils.load_model_from_cache() == {'weights': [4, 5, 6]}
+
+
+def test_restart_with_an_unchanged_model_downloads_nothing(s3, cache):
+    upload_model(s3, MODEL)
+    utils.sync_model_cache()
+
+    aws._CLIENTS.clear()  # as in a new process, sharing the cache
+    requests = count_requests(aws.get_s3_client())
+    assert not utils.sync_model_cache()
+    assert requests == {'HeadObject': 1}
+
+
+def test_disabled_cache_downloads_the_model_again(s3, cache):
+    upload_model(s3, MODEL)
+    utils.sync_model_cache()
+
+    cache.disable()
+    requests = count_requests(s3)
+    assert get_model(from_cache=True) == MODEL
+    assert requests['GetObject'] == 1
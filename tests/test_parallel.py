@@ -0,0 +1,21 @@
+import os
+
+import pytest
+
+from src.train.parallel import allocate_jobs
+
+
+@pytest.mark.parametrize('n_jobs, n_tasks, expected', [
+    (8, 4, (4, 2)),   # more cores than tasks: the rest go to each task
+    (8, 3, (3, 2)),   # cores that can't be split evenly stay idle
+    (4, 10, (4, 1)),  # fewer cores than tasks
+    (1, 10, (1, 1)),
+])
+def test_allocate_jobs(n_jobs, n_tasks, expected):
+    assert allocate_jobs(n_jobs, n_tasks) == expected
+
+
+def test_allocate_all_cores(monkeypatch):
+    monkeypatch.setattr(os, 'cpu_count', lambda: 8)
+    assert allocate_jobs(-1, 4) == (4, 2)
+    assert allocate_jobs(-2, 100) == (7, 1)
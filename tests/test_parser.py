@@ -0,0 +1,81 @@
+import io
+import json
+
+import pandas as pd
+import pytest
+
+from src.serve.parser import (EXPECTED_KEYS, ILL_FORMED_LINE,
+                              iter_ndjson_chunks, parse_datapoints)
+from src.schema import HITPOINT_DTYPE, build_frame
+from src.train.data import DATA_FILEPATH
+
+pytestmark = pytest.mark.skipif(not DATA_FILEPATH.exists(),
+                                reason='raw data file not available')
+
+
+@pytest.fixture
+def datapoints():
+    data = pd.read_csv(DATA_FILEPATH, nrows=10)[EXPECTED_KEYS]
+    return json.loads(data.to_json(orient='records'))
+
+
+def test_parse_datapoints(datapoints):
+    frame = parse_datapoints(datapoints)
+    assert list(frame.columns) == EXPECTED_KEYS
+    assert len(frame) == len(datapoints)
+
+
+@pytest.mark.parametrize('key, value', [
+    ('speed', '1.5'),           # number sent as a string
+    ('same.side', 'true'),      # boolean sent as a string
+    ('same.side', 2),           # number that isn't a boolean
+    ('hitpoint', 'X'),          # unknown category
+    ('serve', None),            # missing value
+])
+def test_parse_datapoints_rejects_invalid_values(datapoints, key, value):
+    datapoints[3][key] = value
+    assert parse_datapoints(datapoints) is None
+
+
+def test_parse_datapoints_rejects_missing_or_extra_keys(datapoints):
+    del datapoints[0]['speed']
+    assert parse_datapoints(datapoints) is None
+    datapoints[0]['speed'], datapoints[1]['extra'] = 1., 1.
+    assert parse_datapoints(datapoints) is None
+
+
+def to_ndjson_stream(lines):
+    return io.BytesIO(b''.join(line.encode() + b'\n' for line in lines))
+
+
+def test_iter_ndjson_chunks(datapoints):
+    stream = to_ndjson_stream(json.dumps(d) for d in datapoints)
+    chunks = list(iter_ndjson_chunks(stream, chunk_size=4))
+    assert [len(frame) for frame, _ in chunks] == [4, 4, 2]
+    assert not any(error_msg for _, error_msg in chunks)
+
+
+@pytest.mark.parametrize('line', ['', 'not json', '{"speed": 1.5}'])
+def test_iter_ndjson_chunks_reports_line_number(datapoints, line):
+    lines = [json.dumps(d) for d in datapoints]
+    lines[6] = line
+    stream = to_ndjson_stream(lines)
+    chunks = list(iter_ndjson_chunks(stream, chunk_size=4))
+    # Data points before the invalid line are still predicted
+    assert [len(frame) for frame, _ in chunks[:-1]] == [4, 2]
+    assert chunks[-1] == (None, ILL_FORMED_LINE.format(7))
+
+
+@pytest.mark.parametrize('values', [
+    ['B', None],
+    ['B', float('nan')],
+    pd.Series(['B', None], dtype=HITPOINT_DTYPE),
+])
+def test_build_frame_rejects_missing_categories(values):
+    with pytest.raises(ValueError, match="'hitpoint': Found missing values"):
+        build_frame({'hitpoint': values})
+
+
+def test_build_frame_rejects_unknown_categories():
+    with pytest.raises(ValueError, match='unknown categories'):
+        build_frame({'hitpoint': ['B', 'X']})
@@ -0,0 +1,114 @@
+from pathlib import Path
+
+import numpy as np
+
+import pytest
+from sklearn.base import clone
+
+from src.config import TARGET
+from src.train import retrain as retrain_module
+from src.train.data import DATA_FILEPATH, load_raw_data
+from src.train.dataset import split_labels
+from src.train.pipeline import pipeline
+from src.train.retrain import ID_COLUMN, retrain
+
+pytestmark = pytest.mark.skipif(not DATA_FILEPATH.exists(),
+                                reason='raw data file not available')
+
+
+@pytest.fixture
+def parent(monkeypatch):
+    """Data of a parent experiment, trained on the first 1500 rows."""
+    data = load_raw_data(use_cache=False)
+    parent_dataset = data.iloc[:1500]
+    model = clone(pipeline).fit(*split_labels(parent_dataset))
+    report = {'test_log_loss': 1.}
+    monkeypatch.setattr(retrain_module, 'find_experiment_directory',
+                        lambda parent_id: Path(parent_id))
+    monkeypatch.setattr(retrain_module, '_load_experiment',
+                        lambda directory: (model, parent_dataset, report))
+    return data, model
+
+
+def test_retrain_adds_trees(parent):
+    data, model = parent
+    n_trees = len(model.steps[-1][1].estimators_)
+    retrain('parent', data, log=False)
+    assert len(model.steps[-1][1].estimators_) > n_trees
+
+
+def test_retrain_rejects_missing_classes(parent):
+    data, model = parent
+    # New rows only contain 2 of the 3 classes
+    new_rows = data.iloc[1500:]
+    data = data.drop(new_rows.index[new_rows[TARGET] == 'W'])
+    with pytest.raises(ValueError, match='exactly the classes'):
+        retrain('parent', data, log=False)
+
+
+def test_chained_retrains_evaluate_on_the_same_unseen_data(parent, tmp_path,
+                                                           monkeypatch):
+    data, model = parent
+    experiments, evaluated, fitted = {}, [], []
+
+    def log_experiment(model, dataset, test_log_loss, cv_losses, details,
+                       test_ids):
+        np.save(tmp_path / details['lineage']['test_ids_file'], test_ids)
+        experiments['child'] = (model, dataset, {'test_log_loss':
+                                                 test_log_loss, **details})
+
+    def evaluate(model, X, y):
+        evaluated.append(set(X[ID_COLUMN]))
+        return 1.
+
+    def new_rows(*args):
+        rows = _new_rows(*args)
+        fitted.append(set(rows[ID_COLUMN]))
+        return rows
+
+    _new_rows = retrain_module._new_rows
+    monkeypatch.setattr(retrain_module, 'log_experiment', log_experiment)
+    monkeypatch.setattr(retrain_module, 'evaluate', evaluate)
+    monkeypatch.setattr(retrain_module, '_new_rows', new_rows)
+
+    retrain('parent', data.iloc[:1750])
+    monkeypatch.setattr(retrain_module, '_load_experiment',
+                        lambda directory: experiments['child'])
+    # The child experiment is stored in `tmp_path`
+    retrain(str(tmp_path), data)
+
+    test_ids = evaluated[0]
+    assert evaluated[1] == test_ids
+    parent_train_ids = set(data[ID_COLUMN].iloc[:1500]) - test_ids
+    assert not test_ids & (parent_train_ids | fitted[0] | fitted[1])
+    assert len(fitted[1]) == len(data) - 1750  # only the latest rows are new
+    # Only a reference to the test ids is kept in the report
+    assert 'test_ids' not in experiments['child'][2]['lineage']
+
+
+def test_test_ids_of_older_retrained_parents_are_read_from_the_lineage(
+        parent):
+    data, _ = parent
+    report = {'lineage': {'test_ids': ['1_x', '2_x']}}
+    test_ids = retrain_module._test_ids(data, report, Path('parent'))
+    assert test_ids.tolist() == ['1_x', '2_x']
+
+
+def test_tampered_test_ids_are_rejected(parent, tmp_path):
+    data, _ = parent
+    np.save(tmp_path / 'test_ids.npy', np.array(['1_x', '3_x']))
+    report = {'lineage': {'test_ids_file': 'test_ids.npy',
+                          'test_ids_hash': retrain_module._hash_ids(
+                              np.array(['1_x', '2_x']))}}
+    with pytest.raises(ValueError, match="don't match"):
+        retrain_module._test_ids(data, report, tmp_path)
+
+
+def test_new_rows_ignore_the_dtypes_of_the_parent(parent):
+    data, _ = parent
+    parent_dataset = data.iloc[:1500]
+    floats = parent_dataset.select_dtypes(np.float32).columns
+    parent_dataset = parent_dataset.astype({name: np.float64
+                                            for name in floats})
+    new_rows = retrain_module._new_rows(data, parent_dataset, np.array([]))
+    assert new_rows.equals(data.iloc[1500:])
@@ -0,0 +1,41 @@
+import numpy as np
+from numpy.testing import assert_array_equal
+import pytest
+
+from src import serialization
+from src.predict import utils
+from src.serialization import SERIALIZERS, Serializer
+
+
+@pytest.mark.parametrize('name', list(SERIALIZERS))
+def test_round_trip(tmp_path, name):
+    obj = {'array': np.arange(100000, dtype=np.float32), 'label': 'W'}
+    serializer = SERIALIZERS[name]
+
+    loaded = serialization.loads(serializer.dumps(obj))
+    assert_array_equal(loaded['array'], obj['array'])
+    assert loaded['label'] == obj['label']
+
+    with open(tmp_path / 'obj', 'wb') as fp:
+        serializer.dump(obj, fp)
+    with open(tmp_path / 'obj', 'rb') as fp:
+        assert_array_equal(serialization.load(fp)['array'], obj['array'])
+
+
+def test_serializer_is_abstract():
+    with pytest.raises(TypeError):
+        Serializer()
+
+
+@pytest.mark.parametrize('engine, n_processes, warned', [
+    ('sklearn', 4, True),
+    ('sklearn', 1, False),
+    ('compiled', 4, False),
+])
+def test_warns_when_processes_cannot_share_the_model(monkeypatch, caplog,
+                                                     engine, n_processes,
+                                                     warned):
+    monkeypatch.setattr(utils, 'SERIALIZER', 'buffers')
+    monkeypatch.setattr(utils, 'PREDICT_ENGINE', engine)
+    utils.warn_if_model_not_shared(n_processes)
+    assert ('own copy of it' in caplog.text) == warned
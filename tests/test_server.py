@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+from flask import Flask
+import pytest
+
+from src.schema import COLUMN_DTYPES
+from src.serve import server
+
+
+@pytest.fixture
+def events(monkeypatch):
+    """Calls made to a stub model holder and garbage collector, in order."""
+    events = []
+
+    class Model:
+        def predict(self, X):
+            events.append(('predict', list(X.columns), len(X)))
+
+    monkeypatch.setattr(server, 'MODEL_HOLDER', SimpleNamespace(
+        get=lambda: Model(),
+        start_sync=lambda: events.append('start_sync')))
+    monkeypatch.setattr(server, 'gc', SimpleNamespace(
+        collect=lambda: events.append('collect'),
+        freeze=lambda: events.append('freeze')))
+    return events
+
+
+@pytest.fixture
+def config(events, monkeypatch):
+    """Gunicorn config of a server run (without serving anything)."""
+    configs = []
+    monkeypatch.setattr(server.PreforkServer, 'run',
+                        lambda self: configs.append((self.cfg, self.load())))
+    app = Flask(__name__)
+    server.run(app, host='127.0.0.1', port=8001, workers=3)
+    cfg, loaded_app = configs[0]
+    assert loaded_app is app
+    return cfg
+
+
+def test_options_are_set_on_the_gunicorn_config(config):
+    assert config.bind == ['127.0.0.1:8001']
+    assert config.workers == 3
+    assert config.threads == server.SERVER_THREADS
+    assert config.preload_app
+    assert config.max_requests == server.SERVER_MAX_REQUESTS
+    assert config.max_requests_jitter == server.SERVER_MAX_REQUESTS // 10
+    assert config.timeout == server.SERVER_TIMEOUT
+
+
+def test_model_is_warmed_up_before_the_garbage_collector_is_frozen(config,
+                                                                   events):
+    assert events == [('predict', list(COLUMN_DTYPES), 1), 'collect',
+                      'freeze']
+
+
+def test_model_sync_starts_in_forked_workers(config, events):
+    events.clear()
+    config.post_fork(None, None)  # as called by Gunicorn in each worker
+    assert events == ['start_sync']
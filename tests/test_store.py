@@ -0,0 +1,56 @@
+import os
+import time
+
+from numpy.testing import assert_array_equal
+import pytest
+from sklearn.base import clone
+
+from src.cache import Cache
+from src.train.data import DATA_FILEPATH, load_raw_data
+from src.train.features import features_generator, store
+from src.train.features.store import (StoredFeatures, features_key,
+                                      load_features, save_features)
+
+pytestmark = pytest.mark.skipif(not DATA_FILEPATH.exists(),
+                                reason='raw data file not available')
+
+
+@pytest.fixture
+def stored_features(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, 'CACHE', Cache(tmp_path))
+    data = load_raw_data(use_cache=False)
+    generator = clone(features_generator)
+    key = features_key(DATA_FILEPATH)
+    save_features(key, generator.fit_transform(data), generator, data.index)
+    return data, StoredFeatures(generator, key)
+
+
+def test_stored_features_are_looked_up_by_index(stored_features):
+    data, features = stored_features
+    X = data.sample(frac=0.5, random_state=0)  # shuffled subset
+    assert_array_equal(features.transform(X),
+                       features.generator.transform(X))
+
+
+def test_unknown_rows_are_computed(stored_features):
+    data, features = stored_features
+    X = data.iloc[:10].set_axis(range(10000, 10010))
+    assert_array_equal(features.transform(X),
+                       features.generator.transform(X))
+
+
+def test_save_features_rejects_mismatching_index(stored_features):
+    data, features = stored_features
+    with pytest.raises(ValueError):
+        save_features('key', features.generator.transform(data),
+                      features.generator, data.index[:-1])
+
+
+def test_stored_features_do_not_expire(stored_features, tmp_path):
+    data, features = stored_features
+    day_ago = time.time() - 25 * 3600
+    for filepath in tmp_path.rglob('*'):
+        os.utime(filepath, (day_ago, day_ago))
+
+    load_features(features.key)
+    assert store.CACHE.stats['namespaces']['features']['hits'] == 2
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+from sklearn.base import clone
+
+from src.train.data import DATA_FILEPATH
+from src.train.pipeline import incremental_pipeline
+from src.train.stream import train_stream
+
+pytestmark = pytest.mark.skipif(not DATA_FILEPATH.exists(),
+                                reason='raw data file not available')
+
+
+def test_train_stream_transforms_each_chunk_once(monkeypatch):
+    estimator = clone(incremental_pipeline)
+    features = estimator.named_steps['features']
+    transformed = []
+    transform = features.transform
+    monkeypatch.setattr(features, 'transform',
+                        lambda X: transformed.append(len(X)) or transform(X))
+
+    loss = train_stream(estimator, chunk_size=500, log=False)
+
+    assert np.isfinite(loss)
+    # 4 chunks to train on, then 4 chunks to evaluate on
+    assert len(transformed) == 8
+    assert sum(transformed) == 2000
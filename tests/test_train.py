@@ -0,0 +1,94 @@
+import numpy as np
+from numpy.testing import assert_allclose
+import pandas as pd
+import pytest
+from sklearn.base import clone
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import log_loss
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from src.cache import Cache
+
+from src.train.data import DATA_FILEPATH, load_raw_data
+from src.train.dataset import split_labels
+from src.train.fold import gen_kfold
+from src.train.pipeline import pipeline
+from src.train.planner import FitPlanner
+from src.train import train as train_module
+from src.train.train import cross_validate, hyperopt
+
+pytestmark = pytest.mark.skipif(not DATA_FILEPATH.exists(),
+                                reason='raw data file not available')
+
+
+def test_cross_validate_keeps_out_of_fold_predictions():
+    X, y = split_labels(load_raw_data(use_cache=False))
+    losses, cv_predictions, _ = cross_validate(clone(pipeline), X, y)
+
+    assert cv_predictions.index.equals(X.index)
+    fold_losses = [log_loss(y.iloc[test], cv_predictions.iloc[test],
+                            labels=cv_predictions.columns)
+                   for _, test in gen_kfold().split(X, y)]
+    assert_allclose(losses, fold_losses)
+
+
+def test_planner_skips_fits_already_done():
+    X, y = split_labels(load_raw_data(use_cache=False))
+    planner, estimator = FitPlanner(), clone(pipeline)
+    planner.record(5, estimator, 'train')
+    planner.fit(estimator, X, y, data='train')
+    planner.fit(clone(pipeline), X, y, data='train')
+    assert planner.report == {'fits_done': 6, 'fits_avoided': 1}
+
+
+def test_hyperopt_keeps_out_of_fold_predictions_of_the_best_candidate():
+    X, y = split_labels(load_raw_data(use_cache=False))
+    param_grid = {'estimator__max_depth': [2, 10]}
+    best_estimator, losses, cv_predictions, summary = hyperopt(
+        clone(pipeline), X, y, param_grid)
+
+    n_folds = gen_kfold().get_n_splits()
+    assert summary['n_fits'] == 2 * n_folds + 1  # no fits for predictions
+    assert cv_predictions.index.equals(X.index)
+    fold_losses = [log_loss(y.iloc[test], cv_predictions.iloc[test],
+                            labels=cv_predictions.columns)
+                   for _, test in gen_kfold().split(X, y)]
+    assert_allclose(losses, fold_losses)
+    assert (best_estimator.get_params()['estimator__max_depth']
+            == summary['best_params']['estimator__max_depth'])
+
+
+class CountingScaler(StandardScaler):
+    """Count the fits of all instances, memoized ones being skipped."""
+    n_fits = 0
+
+    def fit(self, X, y=None, sample_weight=None):
+        CountingScaler.n_fits += 1
+        return super().fit(X, y, sample_weight)
+
+
+def test_transformers_are_memoized_until_the_features_code_changes(
+        tmp_path, monkeypatch):
+    monkeypatch.setattr(train_module, 'CACHE', Cache(tmp_path))
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(300, 3)))
+    y = pd.Series(rng.choice(['FE', 'UE', 'W'], size=300))
+    estimator = Pipeline([('features', CountingScaler()),
+                          ('estimator', LogisticRegression())])
+    param_grid = {'estimator__C': [0.1, 1., 10.]}
+    n_folds = gen_kfold().get_n_splits()
+
+    CountingScaler.n_fits = 0
+    hyperopt(estimator, X, y, param_grid)
+    # Once per fold whatever the number of candidates, and once for the refit
+    assert CountingScaler.n_fits == n_folds + 1
+
+    CountingScaler.n_fits = 0
+    hyperopt(estimator, X, y, param_grid)
+    assert CountingScaler.n_fits == 0
+
+    monkeypatch.setattr(train_module, 'features_code_version',
+                        lambda: 'edited')
+    hyperopt(estimator, X, y, param_grid)
+    assert CountingScaler.n_fits == n_folds + 1